@@ -0,0 +1,62 @@
+"""Compares two benchmark reports written by run.py or micro.py.
+
+    python benchmarks/compare.py base.json new.json --fail-above 10
+
+Exits with code 1 when a tracked metric regressed by more than
+``--fail-above`` percent, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+# (metric path, higher is better)
+METRICS = [
+    (("throughput_rps",), True),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p95"), False),
+    (("latency_ms", "p99"), False),
+    (("upstream_calls_per_request",), False),
+    (("us_per_op",), False),
+]
+
+
+def lookup(result: dict, path: tuple[str, ...]):
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--fail-above", type=float, default=None, help="allowed regression, percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)["scenarios"]
+    with open(args.new) as f:
+        new = json.load(f)["scenarios"]
+
+    regressions = []
+    for scenario in sorted(base.keys() & new.keys()):
+        for path, higher_is_better in METRICS:
+            old_value, new_value = lookup(base[scenario], path), lookup(new[scenario], path)
+            if old_value is None or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            worse = -change if higher_is_better else change
+            flag = ""
+            if args.fail_above is not None and worse > args.fail_above:
+                flag = "  REGRESSION"
+                regressions.append((scenario, ".".join(path)))
+            print(f"{scenario:28} {'.'.join(path):28} {old_value:>12} -> {new_value:>12}  {change:+7.1f}%{flag}")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
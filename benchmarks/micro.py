@@ -0,0 +1,71 @@
+"""Micro-benchmarks of request-path helpers that need neither network nor database.
+
+    python benchmarks/micro.py --output benchmarks/results/micro.json
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.cache import TTLCache, round_coords, normalize_city  # noqa: E402
+from services.weather import WeatherAPI  # noqa: E402
+from database.core.rollup_core import rollup_statements  # noqa: E402
+
+
+def cases() -> dict:
+    rng = random.Random(42)
+    coords = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(1000)]
+    keys = [round_coords(lat, lon, 0.01) for lat, lon in coords]
+
+    cache = TTLCache(maxsize=10000, ttl=600)
+    for key in keys:
+        cache.set(key, {"temp": 1.0})
+    full_cache = TTLCache(maxsize=500, ttl=600)
+    observation = {"id": 1, "weather": [{"main": "Rain"}, {"main": "Mist"}], "main": {"temp": 1.5}, "wind": {"speed": 3.2}}
+    rows = [
+        {"lat": lat, "lon": lon, "temp": 1.0, "wind_speed": 2.0, "weather_main": "Rain", "created_at": datetime(2025, 1, 1, i % 24)}
+        for i, (lat, lon) in enumerate(coords[:500])
+    ]
+
+    counter = iter(range(10 ** 12))
+    return {
+        "round_coords": lambda: round_coords(55.75583, 37.6173, 0.01),
+        "normalize_city": lambda: normalize_city("  Saint   Petersburg "),
+        "cache_get_hit": lambda: cache.get(keys[next(counter) % 1000]),
+        "cache_set_evicting": lambda: full_cache.set(next(counter), 1),
+        "parse_observation": lambda: WeatherAPI._parse_observation(observation),
+        "rollup_statement_500_rows": lambda: rollup_statements(rows),
+    }
+
+
+def measure(func, min_time: float) -> dict:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = max(int(min_time / 0.2), 3)
+    best = min(timer.repeat(repeat=runs, number=number)) / number
+    return {"us_per_op": round(best * 1e6, 3), "ops_per_sec": round(1 / best, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-time", type=float, default=1.0, help="approximate seconds per case")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in cases().items():
+        results[name] = measure(func, args.min_time)
+        print(f"{name:28} {results[name]['us_per_op']:>12} us/op")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"python": sys.version.split()[0], "scenarios": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
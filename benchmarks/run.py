@@ -0,0 +1,190 @@
+"""End-to-end benchmark of the service against a local OpenWeather stub.
+
+Starts ``stub_openweather.py`` and the FastAPI app (``src/main.py``) as
+uvicorn subprocesses, drives every scenario with the async load generator
+and writes a JSON report. Postgres is taken from the usual ``DATABASE_*``
+settings (``.env``), e.g. ``docker compose up -d db``; migrations run on
+app start-up as in production.
+
+    python benchmarks/run.py --requests 2000 --concurrency 50
+    python benchmarks/compare.py benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from loadgen import run_load
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+
+HOT_COORDS = [(round(-50 + i * 5.3, 2), round(-170 + i * 17.1, 2)) for i in range(20)]
+HOT_CITIES = [f"Bench City {i}" for i in range(20)]
+
+
+def cold_coords(index: int, offset: int) -> tuple[float, float]:
+    # Distinct 0.01 degree cells for every request, never repeated across scenarios of one run.
+    cell = offset + index
+    return round(-80 + (cell // 3000) * 0.05, 2), round(-170 + (cell % 3000) * 0.1, 2)
+
+
+def build_scenarios(args, nonce: str) -> dict:
+    rng = random.Random(42)
+    batch_pool = [{"lat": lat, "lon": lon} for lat, lon in (cold_coords(i, 10_000_000) for i in range(500))]
+    batch_pool += [{"city": f"Bench Batch City {i}"} for i in range(100)]
+
+    def get_weather(params):
+        return lambda client, index: client.get("/weather", params=params(index))
+
+    return {
+        "coords_cold": (None, get_weather(lambda i: dict(zip(("lat", "lon"), cold_coords(i, 0))))),
+        "coords_hot": (
+            [dict(lat=lat, lon=lon) for lat, lon in HOT_COORDS],
+            get_weather(lambda i: dict(zip(("lat", "lon"), HOT_COORDS[i % len(HOT_COORDS)]))),
+        ),
+        "city_cold": (None, get_weather(lambda i: {"city": f"Bench {nonce} {i}"})),
+        "city_hot": (
+            [{"city": city} for city in HOT_CITIES],
+            get_weather(lambda i: {"city": HOT_CITIES[i % len(HOT_CITIES)]}),
+        ),
+        "batch": (
+            None,
+            lambda client, index: client.post(
+                "/weather/batch", json={"locations": rng.sample(batch_pool, args.batch_size)}
+            ),
+        ),
+    }
+
+
+def start_process(cmd: list[str], cwd: Path, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(cmd, cwd=cwd, env={**os.environ, **env})
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                await client.get(url, timeout=1)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise TimeoutError(f"{url} did not start in {timeout}s")
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        return subprocess.run(["git", *cmd], cwd=BENCH_DIR, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "src"))}
+
+
+async def run(args) -> dict:
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    uvicorn = [sys.executable, "-m", "uvicorn", "--host", "127.0.0.1", "--log-level", "warning"]
+
+    stub = start_process(
+        [*uvicorn, "--port", str(args.stub_port), "stub_openweather:app"],
+        BENCH_DIR,
+        {
+            "STUB_LATENCY": str(args.stub_latency),
+            "STUB_JITTER": str(args.stub_jitter),
+            "STUB_ERROR_RATE": str(args.stub_error_rate),
+        },
+    )
+    app = start_process(
+        [*uvicorn, "--port", str(args.app_port), "main:app"],
+        SRC_DIR,
+        {
+            "OPEN_WEATHER_URL": stub_url,
+            # The stub has no quota; keep the limiter and the hot refresher out of the measurements.
+            "OPEN_WEATHER_CALLS_PER_MINUTE": "10000000",
+            "OPEN_WEATHER_BURST": "100000",
+            "HOT_REFRESH_BUDGET": "0",
+        },
+    )
+    try:
+        await wait_ready(f"{stub_url}/_stats", stub, 30)
+        await wait_ready(f"{app_url}/metrics", app, args.startup_timeout)
+
+        nonce = uuid.uuid4().hex[:8]
+        results = {}
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=app_url, timeout=60, limits=limits) as client, httpx.AsyncClient(base_url=stub_url) as stub_client:
+            for name, (warmup, make_request) in build_scenarios(args, nonce).items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                for params in warmup or ():
+                    await client.get("/weather", params=params)
+                await stub_client.post("/_reset")
+
+                result = await run_load(client, make_request, args.requests, args.concurrency)
+                upstream = (await stub_client.get("/_stats")).json()
+                result["upstream_calls"] = upstream
+                result["upstream_calls_per_request"] = round(
+                    sum(v for k, v in upstream.items() if not k.endswith("_errors")) / args.requests, 4
+                )
+                results[name] = result
+                print(
+                    f"{name:12} {result['throughput_rps']:>9} rps  "
+                    f"p50 {result['latency_ms']['p50']:>8} ms  p95 {result['latency_ms']['p95']:>8} ms  "
+                    f"p99 {result['latency_ms']['p99']:>8} ms  errors {result['error_ratio']:.2%}  "
+                    f"upstream/req {result['upstream_calls_per_request']}"
+                )
+        return results
+    finally:
+        for process in (app, stub):
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=50, help="locations per POST /weather/batch")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=None, help="comma-separated subset")
+    parser.add_argument("--stub-latency", type=float, default=0.05, help="mean OpenWeather latency, seconds")
+    parser.add_argument("--stub-jitter", type=float, default=0.01)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--app-port", type=int, default=8800)
+    parser.add_argument("--stub-port", type=int, default=8900)
+    parser.add_argument("--startup-timeout", type=float, default=60, help="seconds to wait for migrations and start-up")
+    parser.add_argument("--output", type=Path, default=None, help="defaults to benchmarks/results/<time>-<commit>.json")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    revision = git_revision()
+    scenarios = asyncio.run(run(args))
+
+    report = {
+        **revision,
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "app_port", "stub_port")},
+        "scenarios": scenarios,
+    }
+    output = args.output or BENCH_DIR / "results" / f"{started_at:%Y%m%dT%H%M%S}-{revision['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Local stand-in for the OpenWeather endpoints the service uses.
+
+Answers are deterministic for a given location, so scenarios are repeatable.
+Latency and failures are injected from the environment:
+
+- ``STUB_LATENCY``: mean delay per call in seconds (default ``0.05``).
+- ``STUB_JITTER``: uniform +/- jitter around the mean in seconds (default ``0.01``).
+- ``STUB_ERROR_RATE``: share of calls answered with ``STUB_ERROR_STATUS`` (default ``0``).
+- ``STUB_ERROR_STATUS``: status code of injected failures (default ``503``).
+
+``GET /_stats`` returns call counts per endpoint, ``POST /_reset`` zeroes them.
+
+Run: ``uvicorn stub_openweather:app --port 8900`` from this directory.
+"""
+import asyncio
+import hashlib
+import os
+import random
+from collections import Counter
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+STUB_LATENCY = float(os.environ.get("STUB_LATENCY", 0.05))
+STUB_JITTER = float(os.environ.get("STUB_JITTER", 0.01))
+STUB_ERROR_RATE = float(os.environ.get("STUB_ERROR_RATE", 0))
+STUB_ERROR_STATUS = int(os.environ.get("STUB_ERROR_STATUS", 503))
+
+WEATHER_MAIN = ("Clear", "Clouds", "Rain", "Snow", "Drizzle", "Mist")
+
+app = FastAPI()
+calls: Counter = Counter()
+
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode(), digest_size=8).digest(), "big")
+
+
+def _observation(station_id: int) -> dict:
+    rnd = random.Random(station_id)
+    return {
+        "id": station_id,
+        "weather": [{"main": rnd.choice(WEATHER_MAIN)}],
+        "main": {"temp": round(rnd.uniform(-30, 35), 2)},
+        "wind": {"speed": round(rnd.uniform(0, 20), 2)},
+    }
+
+
+def _station_id(lat: float, lon: float) -> int:
+    # One station per 0.1 degree cell, like nearby coordinates sharing a city.
+    return _seed(round(lat, 1), round(lon, 1)) % 10_000_000
+
+
+async def _answer(endpoint: str, body) -> JSONResponse:
+    calls[endpoint] += 1
+    delay = STUB_LATENCY + random.uniform(-STUB_JITTER, STUB_JITTER)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    if STUB_ERROR_RATE and random.random() < STUB_ERROR_RATE:
+        calls[f"{endpoint}_errors"] += 1
+        return JSONResponse({"cod": STUB_ERROR_STATUS, "message": "injected failure"}, status_code=STUB_ERROR_STATUS)
+    return JSONResponse(body)
+
+
+@app.get("/data/2.5/weather")
+async def weather(lat: float, lon: float):
+    return await _answer("weather", _observation(_station_id(lat, lon)))
+
+
+@app.get("/data/2.5/group")
+async def group(id: str):
+    return await _answer("group", {"list": [_observation(int(x)) for x in id.split(",")]})
+
+
+@app.get("/geo/1.0/direct")
+async def geocode(q: str, limit: int = Query(default=1)):
+    rnd = random.Random(_seed(q.casefold()))
+    return await _answer("geocode", [{"name": q, "lat": round(rnd.uniform(-60, 70), 4), "lon": round(rnd.uniform(-180, 180), 4)}])
+
+
+@app.get("/_stats")
+async def stats():
+    return dict(calls)
+
+
+@app.post("/_reset")
+async def reset():
+    calls.clear()
+    return {}
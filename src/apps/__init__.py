@@ -1 +1,7 @@
-from apps.get_weather import weather_router
\ No newline at end of file
+from apps.get_weather import weather_router
+from apps.history import history_router
+from apps.stats import stats_router
+from apps.metrics import metrics_router
+from apps.forecast import forecast_router
+from apps.cities import cities_router
+from apps.subscriptions import subscriptions_router
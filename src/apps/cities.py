@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import ORJSONResponse
+from typing import Annotated
+from templates.schemas.city_responses import CitySuggestions
+from services.weather import weather_api
+from services.gazetteer import SUGGEST_MAX_LIMIT
+
+cities_router = APIRouter()
+
+
+# async def on purpose: the lookup takes microseconds, a sync endpoint would add a thread pool hop.
+@cities_router.get("/cities/suggest", summary="Подсказки названий городов", response_model=CitySuggestions)
+async def suggest_cities(q: Annotated[str, Query(min_length=1, max_length=100, description="Начало названия города")],
+                         limit: Annotated[int, Query(ge=1, le=SUGGEST_MAX_LIMIT, description="Сколько подсказок вернуть")] = 10):
+    """
+    Input:
+    - "q": начало названия на любом языке из справочника, без учёта регистра и диакритики.
+    Output:
+    items: города, чьё название начинается с "q", по убыванию населения.
+    Отвечает из локального справочника GeoNames (GAZETTEER_PATH), без обращения к OpenWeather.
+    """
+    if weather_api.gazetteer is None:
+        raise HTTPException(
+            503,
+            detail="Справочник городов не загружен.",
+        )
+
+    return ORJSONResponse({"items": weather_api.gazetteer.suggest(q, limit)})
@@ -0,0 +1,137 @@
+from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import ORJSONResponse
+from typing import Annotated
+from datetime import datetime
+import time
+import numpy as np
+from templates.schemas.forecast_responses import Forecast
+from templates.schemas.forecast_batch import ForecastBatchRequest, ForecastBatchResponse
+from services.weather import weather_api
+from services.forecast import sample_many, forecast_points
+from services.config import REQUEST_DEADLINE, FORECAST_MAX_HOURS
+from services.resilience import deadline_scope, UpstreamTimeoutError, UpstreamUnavailableError
+from database.config import app_timezone
+from loguru import logger
+
+forecast_router = APIRouter()
+
+
+def hourly_times(hours: int) -> np.ndarray:
+    """Unix times of the next ``hours`` full hours."""
+    next_hour = (int(time.time()) // 3600 + 1) * 3600
+    return next_hour + np.arange(hours, dtype=np.int64) * 3600
+
+
+def format_times(times: np.ndarray) -> list[str]:
+    return [datetime.fromtimestamp(t, app_timezone).isoformat() for t in times.tolist()]
+
+
+@forecast_router.get("/forecast", summary="Прогноз по городу или координатам", response_model=Forecast)
+async def get_forecast(city: Annotated[str | None, Query(description="Название города")] = None,
+                       lat: Annotated[float | None, Query(ge=-90, le=90, description="Широта")] = None,
+                       lon: Annotated[float | None, Query(ge=-180, le=180, description="Долгота")] = None,
+                       at: Annotated[datetime | None, Query(description="Момент времени; без часового пояса — время приложения")] = None,
+                       hours: Annotated[int, Query(ge=1, le=FORECAST_MAX_HOURS, description="Сколько часов вперёд, если не указан at")] = 24):
+    """
+    Input:
+    - Должен быть указан "city" ИЛИ *оба* "lat" и "lon".
+    - "at" — прогноз на один момент времени, иначе почасовой прогноз на "hours" часов с ближайшего полного часа.
+    Output:
+    points: список точек прогноза с "time", "temperature" (°C), "wind_speed" (м/с) и "weather_main".
+    Значения между шагами прогноза OpenWeather (3 часа) интерполируются линейно.
+    """
+    has_coords = lat is not None and lon is not None
+    has_city = city is not None and city.strip() != ""
+    if not (has_coords or has_city):
+        raise HTTPException(
+            400,
+            detail="Укажите либо city, либо пару lat+lon.",
+        )
+
+    if at is not None:
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=app_timezone)
+        times = np.array([int(at.timestamp())], dtype=np.int64)
+    else:
+        times = hourly_times(hours)
+
+    logger.info(f"Forecast query parameters: {city=}, {lat=}, {lon=}, {at=}, {hours=}")
+
+    try:
+        with deadline_scope(REQUEST_DEADLINE):
+            lat, lon, series = await weather_api.get_forecast(lat=lat, lon=lon, city=city)
+    except UpstreamTimeoutError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            504,
+            detail=str(e),
+        )
+    except UpstreamUnavailableError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            503,
+            detail=str(e),
+        )
+    except Exception as e:
+        logger.error(str(e))
+        raise HTTPException(
+            500,
+            detail=str(e),
+        )
+
+    if at is not None and not series["time"][0] <= times[0] <= series["time"][-1]:
+        raise HTTPException(
+            400,
+            detail="Момент времени вне горизонта прогноза.",
+        )
+
+    sample = sample_many([series], times)
+    return ORJSONResponse({"lat": lat, "lon": lon, "points": forecast_points(sample, 0, format_times(times))})
+
+
+@forecast_router.post("/forecast/batch", summary="Прогноз для списка городов и координат", response_model=ForecastBatchResponse)
+async def get_forecast_batch(body: ForecastBatchRequest):
+    """
+    Input:
+    - "locations": не больше BATCH_MAX_ITEMS объектов с "city" ИЛИ *обоими* "lat" и "lon".
+    - "hours": почасовой прогноз на столько часов с ближайшего полного часа.
+    - Одинаковые локации запрашиваются у OpenWeather один раз.
+    Output:
+    items: список в порядке запроса, для каждой локации "forecast" или "error"; неполная локация получает "error".
+    """
+    if body.hours > FORECAST_MAX_HOURS:
+        raise HTTPException(
+            400,
+            detail=f"Не больше {FORECAST_MAX_HOURS} часов прогноза.",
+        )
+
+    logger.info(f"Forecast batch query for {len(body.locations)} locations, {body.hours} hours")
+    errors = [location.location_error() for location in body.locations]
+    with deadline_scope(REQUEST_DEADLINE):
+        fetched = iter(await weather_api.get_forecast_many(
+            [location.model_dump() for location, error in zip(body.locations, errors) if error is None]
+        ))
+    results = [ValueError(error) if error is not None else next(fetched) for error in errors]
+
+    times = hourly_times(body.hours)
+    time_labels = format_times(times)
+    series_list = [result[2] for result in results if not isinstance(result, Exception)]
+    # Every location is sampled in one vectorized pass.
+    sample = sample_many(series_list, times) if series_list else None
+
+    items = []
+    row = 0
+    for location, result in zip(body.locations, results):
+        if isinstance(result, Exception):
+            logger.error(f"Forecast batch item {location} failed: {result}")
+            items.append({"location": location.model_dump(), "forecast": None, "error": str(result)})
+            continue
+
+        items.append({
+            "location": location.model_dump(),
+            "forecast": {"lat": result[0], "lon": result[1], "points": forecast_points(sample, row, time_labels)},
+            "error": None,
+        })
+        row += 1
+
+    return ORJSONResponse({"items": items})
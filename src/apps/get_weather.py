@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, Header, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 from typing import Annotated
+import orjson
 from templates.schemas.weather_responses import Weather
-from services.weather import WeatherAPI
-from database.core.post_weather_core import post_weather_implementation
+from templates.schemas.weather_batch import WeatherBatchRequest, WeatherBatchResponse
+from services.weather import weather_api
+from services.config import REQUEST_DEADLINE, NEAREST_MAX_DISTANCE_KM, WEATHER_STALE_TTL
+from services.resilience import deadline_scope, UpstreamTimeoutError, UpstreamUnavailableError
+from services.http_cache import cache_control, etag_matches, not_modified
+from database.core.post_weather_core import post_weather_implementation, post_weather_batch_implementation
 from loguru import logger
 
 weather_router = APIRouter()
@@ -10,15 +16,20 @@ weather_router = APIRouter()
 @weather_router.get("/weather", summary="Погода по городу или координатам", response_model=Weather)
 async def get_weather(city: Annotated[str | None, Query(description="Название города")] = None,
                       lat: Annotated[float | None, Query(ge=-90, le=90, description="Широта")] = None,
-                      lon: Annotated[float | None, Query(ge=-180, le=180, description="Долгота")] = None):
+                      lon: Annotated[float | None, Query(ge=-180, le=180, description="Долгота")] = None,
+                      max_distance_km: Annotated[float | None, Query(gt=0, le=NEAREST_MAX_DISTANCE_KM, description="Принять свежее наблюдение в пределах этого расстояния, км")] = None,
+                      if_none_match: Annotated[str | None, Header(description="ETag ранее полученного ответа")] = None):
     """
     Input:
     - Должен быть указан "city" ИЛИ *оба* "lat" и "lon".
     - Если указаны и город, и координаты — используются координаты.
+    - "max_distance_km": ответить свежим наблюдением ближайшей точки в этом радиусе, если оно есть.
+    - "If-None-Match": при совпадении ETag ответ 304 без тела и без записи в историю.
     Output:
     temperature: float, температура в Цельсиях.
     wind_speed: float, скорость ветра в м/с.
     weather_main: str, обшая характеристика погоды.
+    Cache-Control: max-age — сколько ещё наблюдение свежее, stale-while-revalidate — WEATHER_STALE_TTL.
     """
     has_coords = lat is not None and lon is not None
     has_city = city is not None and city.strip() != ""
@@ -28,12 +39,19 @@ async def get_weather(city: Annotated[str | None, Query(description="Назва
             detail="Укажите либо city, либо пару lat+lon.",
         )
     
-    logger.info(f"Query parameters: {city=}, {lat=}, {lon=}")
-    external_api = WeatherAPI()
+    logger.info(f"Query parameters: {city=}, {lat=}, {lon=}, {max_distance_km=}")
 
     try:
-        cur_weather = await external_api.get_weather_by_loc(lat=lat, lon=lon, city=city)
+        with deadline_scope(REQUEST_DEADLINE):
+            cur_weather = await weather_api.get_weather_by_loc(lat=lat, lon=lon, city=city, max_distance_km=max_distance_km)
         logger.info(f"Response from core {cur_weather}")
+        headers = {
+            "ETag": cur_weather["etag"],
+            "Cache-Control": cache_control(cur_weather["expires_in"], WEATHER_STALE_TTL),
+        }
+        if etag_matches(if_none_match, cur_weather["etag"]):
+            return not_modified(headers)
+
         await post_weather_implementation(
             lat=cur_weather["lat"],
             lon=cur_weather["lon"],
@@ -42,14 +60,66 @@ async def get_weather(city: Annotated[str | None, Query(description="Назва
             weather_main=cur_weather["weather_main"]
         )
 
-        return Weather(
-            temperature=cur_weather["temp"],
-            wind_speed=cur_weather["wind_speed"],
-            weather_main=cur_weather["weather_main"]
+        # Returning a Response skips response_model validation; the body was encoded when the observation was fetched.
+        return Response(content=cur_weather["response_body"], media_type="application/json", headers=headers)
+    except UpstreamTimeoutError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            504,
+            detail=str(e),
+        )
+    except UpstreamUnavailableError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            503,
+            detail=str(e),
         )
     except Exception as e:
         logger.error(str(e))
         raise HTTPException(
             500,
             detail=str(e),
-        )       
+        )
+
+
+@weather_router.post("/weather/batch", summary="Погода для списка городов и координат", response_model=WeatherBatchResponse)
+async def get_weather_batch(body: WeatherBatchRequest):
+    """
+    Input:
+    - "locations": не больше BATCH_MAX_ITEMS объектов с "city" ИЛИ *обоими* "lat" и "lon".
+    - Одинаковые локации запрашиваются у OpenWeather один раз.
+    Output:
+    items: список в порядке запроса, для каждой локации "weather" или "error"; неполная локация получает "error".
+    """
+    logger.info(f"Batch query for {len(body.locations)} locations")
+    errors = [location.location_error() for location in body.locations]
+    with deadline_scope(REQUEST_DEADLINE):
+        fetched = iter(await weather_api.get_weather_many(
+            [location.model_dump() for location, error in zip(body.locations, errors) if error is None]
+        ))
+    results = [ValueError(error) if error is not None else next(fetched) for error in errors]
+
+    items = []
+    history = []
+    for location, result in zip(body.locations, results):
+        if isinstance(result, Exception):
+            logger.error(f"Batch item {location} failed: {result}")
+            items.append({"location": location.model_dump(), "weather": None, "error": str(result)})
+            continue
+
+        history.append({
+            "lat": result["lat"],
+            "lon": result["lon"],
+            "temp": result["temp"],
+            "wind_speed": result["wind_speed"],
+            "weather_main": result["weather_main"]
+        })
+        items.append({
+            "location": location.model_dump(),
+            "weather": orjson.Fragment(result["response_body"]),
+            "error": None,
+        })
+
+    await post_weather_batch_implementation(history)
+
+    return ORJSONResponse({"items": items})
@@ -0,0 +1,188 @@
+from fastapi import APIRouter, Query, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Literal
+from datetime import datetime, timedelta
+import orjson
+from templates.schemas.history_responses import HistoryPage
+from services.config import HISTORY_SETTLE_SECONDS, HISTORY_CACHE_MAX_AGE, HISTORY_SETTLED_MAX_AGE
+from services.http_cache import strong_etag, etag_matches, cache_control, not_modified
+from services.cache import TTLCache
+from database.config import app_timezone, HISTORY_RETENTION_DAYS
+from database.core.history_core import (
+    export_history_implementation,
+    get_history_implementation,
+    get_history_version_implementation,
+    decode_cursor,
+    to_db_time,
+)
+from loguru import logger
+
+history_router = APIRouter()
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Read at most once per HISTORY_CACHE_MAX_AGE, so a settled 304 rarely touches the database.
+history_version = TTLCache(maxsize=1, ttl=HISTORY_CACHE_MAX_AGE)
+
+
+def parse_bbox(min_lat: float | None,
+               min_lon: float | None,
+               max_lat: float | None,
+               max_lon: float | None) -> tuple[float, float, float, float] | None:
+    bbox = (min_lat, min_lon, max_lat, max_lon)
+    if all(x is None for x in bbox):
+        return None
+    if any(x is None for x in bbox):
+        raise HTTPException(
+            400,
+            detail="Для фильтра по области укажите все четыре параметра min_lat, min_lon, max_lat, max_lon.",
+        )
+    return bbox
+
+
+def parse_near(near_lat: float | None,
+               near_lon: float | None,
+               radius_km: float | None) -> tuple[float, float, float] | None:
+    near = (near_lat, near_lon, radius_km)
+    if all(x is None for x in near):
+        return None
+    if any(x is None for x in near):
+        raise HTTPException(
+            400,
+            detail="Для поиска рядом с точкой укажите near_lat, near_lon и radius_km.",
+        )
+    return near
+
+
+def is_settled(upper_bound: datetime | None) -> bool:
+    """True when the write path can add no more rows before ``upper_bound`` (naive, application timezone)."""
+    if upper_bound is None:
+        return False
+    settled_until = datetime.now(app_timezone).replace(tzinfo=None) - timedelta(seconds=HISTORY_SETTLE_SECONDS)
+    return upper_bound <= settled_until
+
+
+async def settled_etag(request: Request) -> str | None:
+    """ETag of a settled response, known from the query and the history data version.
+
+    A backfill can still add rows to the past; it bumps the version (see
+    rebuild_rollups_implementation), which changes every settled tag.
+    None when the version cannot be read.
+    """
+    version = history_version.get("version")
+    if version is None:
+        try:
+            version = await get_history_version_implementation()
+        except Exception as e:
+            logger.warning(f"History version lookup failed: {e}")
+            return None
+        history_version.set("version", version)
+
+    query = sorted(request.query_params.multi_items())
+    # Retention drops old rows, so with it enabled tags change once a day.
+    retention = str(datetime.now(app_timezone).date()) if HISTORY_RETENTION_DAYS > 0 else ""
+    return strong_etag(request.url.path, orjson.dumps(query), retention, str(version))
+
+
+@history_router.get("/history", summary="История запросов с курсорной пагинацией", response_model=HistoryPage)
+async def get_history(request: Request,
+                      limit: Annotated[int, Query(ge=1, le=1000, description="Размер страницы")] = 100,
+                      cursor: Annotated[str | None, Query(description="next_cursor из предыдущей страницы")] = None,
+                      date_from: Annotated[datetime | None, Query(description="Начало периода (включительно)")] = None,
+                      date_to: Annotated[datetime | None, Query(description="Конец периода (не включительно)")] = None,
+                      min_lat: Annotated[float | None, Query(ge=-90, le=90, description="Южная граница области")] = None,
+                      min_lon: Annotated[float | None, Query(ge=-180, le=180, description="Западная граница области")] = None,
+                      max_lat: Annotated[float | None, Query(ge=-90, le=90, description="Северная граница области")] = None,
+                      max_lon: Annotated[float | None, Query(ge=-180, le=180, description="Восточная граница области")] = None,
+                      near_lat: Annotated[float | None, Query(ge=-90, le=90, description="Широта точки поиска")] = None,
+                      near_lon: Annotated[float | None, Query(ge=-180, le=180, description="Долгота точки поиска")] = None,
+                      radius_km: Annotated[float | None, Query(gt=0, le=1000, description="Радиус поиска в км")] = None,
+                      if_none_match: Annotated[str | None, Header(description="ETag ранее полученной страницы")] = None):
+    """
+    Input:
+    - "limit": размер страницы, 1–1000.
+    - "cursor": значение next_cursor предыдущей страницы; без него — первая страница.
+    - Фильтры как у /history/export, плюс "near_lat", "near_lon", "radius_km" для поиска рядом с точкой.
+    - "If-None-Match": при совпадении ETag ответ 304 без тела.
+    Output:
+    items: строки истории, от новых к старым.
+    next_cursor: str | None, курсор следующей страницы (None — страниц больше нет).
+    Страницы старше HISTORY_SETTLE_SECONDS (по cursor или date_to) меняются только
+    при дозагрузке истории и кешируются на HISTORY_SETTLED_MAX_AGE, остальные — на HISTORY_CACHE_MAX_AGE.
+    """
+    bbox = parse_bbox(min_lat, min_lon, max_lat, max_lon)
+    near = parse_near(near_lat, near_lon, radius_km)
+    bounds = [to_db_time(date_to)] if date_to is not None else []
+    if cursor is not None:
+        try:
+            bounds.append(to_db_time(decode_cursor(cursor)[0]))
+        except Exception:
+            raise HTTPException(400, detail="Некорректный cursor.")
+
+    headers = {}
+    etag = await settled_etag(request) if is_settled(min(bounds, default=None)) else None
+    if etag is not None:
+        headers = {"ETag": etag, "Cache-Control": cache_control(HISTORY_SETTLED_MAX_AGE)}
+        if etag_matches(if_none_match, etag):
+            return not_modified(headers)
+
+    # Rows are already JSON-ready dicts, so the page is encoded without building HistoryPage.
+    body = orjson.dumps(await get_history_implementation(
+        limit, cursor=cursor, date_from=date_from, date_to=date_to, bbox=bbox, near=near
+    ))
+    if not headers:
+        etag = strong_etag(body)
+        headers = {"ETag": etag, "Cache-Control": cache_control(HISTORY_CACHE_MAX_AGE)}
+        if etag_matches(if_none_match, etag):
+            return not_modified(headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@history_router.get("/history/export", summary="Выгрузка истории запросов (NDJSON/CSV)")
+async def export_history(request: Request,
+                         fmt: Annotated[Literal["ndjson", "csv"], Query(alias="format", description="Формат выгрузки")] = "ndjson",
+                         date_from: Annotated[datetime | None, Query(description="Начало периода (включительно)")] = None,
+                         date_to: Annotated[datetime | None, Query(description="Конец периода (не включительно)")] = None,
+                         min_lat: Annotated[float | None, Query(ge=-90, le=90, description="Южная граница области")] = None,
+                         min_lon: Annotated[float | None, Query(ge=-180, le=180, description="Западная граница области")] = None,
+                         max_lat: Annotated[float | None, Query(ge=-90, le=90, description="Северная граница области")] = None,
+                         max_lon: Annotated[float | None, Query(ge=-180, le=180, description="Восточная граница области")] = None,
+                         near_lat: Annotated[float | None, Query(ge=-90, le=90, description="Широта точки поиска")] = None,
+                         near_lon: Annotated[float | None, Query(ge=-180, le=180, description="Долгота точки поиска")] = None,
+                         radius_km: Annotated[float | None, Query(gt=0, le=1000, description="Радиус поиска в км")] = None,
+                         if_none_match: Annotated[str | None, Header(description="ETag ранее полученной выгрузки")] = None):
+    """
+    Input:
+    - "format": ndjson (по умолчанию) или csv.
+    - "date_from"/"date_to": период по created_at, ISO 8601.
+    - "min_lat", "min_lon", "max_lat", "max_lon": прямоугольная область, указываются вместе.
+    - "near_lat", "near_lon", "radius_km": точки в радиусе, указываются вместе.
+    Output:
+    Поток строк истории (id, created_at, lat, lon, weather_main, temp, wind_speed),
+    отсортированный по created_at. Выгрузка идёт через серверный курсор и не
+    держит весь результат в памяти.
+    Выгрузка с date_to старше HISTORY_SETTLE_SECONDS получает ETag и кешируется,
+    остальные отдаются с Cache-Control: no-cache.
+    """
+    bbox = parse_bbox(min_lat, min_lon, max_lat, max_lon)
+    near = parse_near(near_lat, near_lon, radius_km)
+    logger.info(f"History export: {fmt=}, {date_from=}, {date_to=}, {bbox=}, {near=}")
+
+    etag = await settled_etag(request) if is_settled(to_db_time(date_to) if date_to is not None else None) else None
+    if etag is not None:
+        headers = {"ETag": etag, "Cache-Control": cache_control(HISTORY_SETTLED_MAX_AGE)}
+        if etag_matches(if_none_match, etag):
+            return not_modified(headers)
+    else:
+        # The body is streamed, so there is no ETag to revalidate an open-ended export with.
+        headers = {"Cache-Control": "no-cache"}
+
+    return StreamingResponse(
+        export_history_implementation(fmt, date_from=date_from, date_to=date_to, bbox=bbox, near=near),
+        media_type=MEDIA_TYPES[fmt],
+        headers={**headers, "Content-Disposition": f'attachment; filename="weather_history.{fmt}"'},
+    )
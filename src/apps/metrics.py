@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Response
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+
+from services.metrics import StatsCollector
+from services.weather import weather_api, weather_refresher, subscription_hub
+from database.config import pool_status
+from database.retry import retry_stats
+from database.core.post_weather_core import history_writer
+
+metrics_router = APIRouter()
+
+CACHE_COUNTERS = ("hits", "misses", "evictions", "l2_hits", "l2_misses", "l2_errors", "fill_waits")
+
+REGISTRY.register(StatsCollector("weather_cache", weather_api.weather_cache.stats, counters=CACHE_COUNTERS))
+REGISTRY.register(StatsCollector("weather_geocode_cache", weather_api.geocode_cache.stats, counters=CACHE_COUNTERS))
+REGISTRY.register(StatsCollector("weather_forecast_cache", weather_api.forecast_cache.stats, counters=CACHE_COUNTERS))
+REGISTRY.register(StatsCollector(
+    "weather_gazetteer",
+    lambda: weather_api.gazetteer.stats() if weather_api.gazetteer is not None else {},
+    counters=("hits", "misses"),
+))
+REGISTRY.register(StatsCollector("weather_nearby", weather_api.nearby.stats, counters=("hits", "misses", "evictions")))
+REGISTRY.register(StatsCollector(
+    "weather_upstream",
+    lambda: {
+        "calls": weather_api.upstream_calls,
+        "retries": weather_api.upstream_retries,
+        "rate_limited": weather_api.rate_limiter.rejected,
+        "in_flight": weather_api.inflight.in_flight(),
+        "coalesced": weather_api.inflight.shared,
+        "breaker_open": int(weather_api.breaker.state != weather_api.breaker.CLOSED),
+        "breaker_opened": weather_api.breaker.opened,
+    },
+    counters=("calls", "retries", "rate_limited", "coalesced", "breaker_opened"),
+))
+REGISTRY.register(StatsCollector(
+    "weather_subscriptions",
+    subscription_hub.stats,
+    counters=("polls", "poll_failures", "changes", "coalesced", "slow_disconnects"),
+))
+REGISTRY.register(StatsCollector("weather_refresher", weather_refresher.stats, counters=("refreshed", "failed", "skipped_budget")))
+REGISTRY.register(StatsCollector(
+    "weather_history_writer", history_writer.stats, counters=("submitted", "dropped", "flushed", "failed", "flushes")
+))
+REGISTRY.register(StatsCollector("weather_db_pool", pool_status))
+REGISTRY.register(StatsCollector("weather_db_retry", retry_stats, counters=("retries", "gave_up", "permanent")))
+
+
+@metrics_router.get("/metrics", summary="Метрики в формате Prometheus", include_in_schema=False)
+async def get_metrics():
+    """
+    Output:
+    Гистограммы задержек HTTP-запросов, вызовов OpenWeather и операций с БД,
+    счётчики кешей, пула соединений, буфера истории и повторов. Метрики
+    считаются в каждом процессе отдельно.
+    """
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Query
+from typing import Annotated, Literal
+from datetime import datetime
+from templates.schemas.stats_responses import Stats
+from database.core.rollup_core import get_stats_implementation
+from apps.history import parse_bbox
+from loguru import logger
+
+stats_router = APIRouter()
+
+
+@stats_router.get("/stats", summary="Агрегированная статистика по истории запросов", response_model=Stats)
+async def get_stats(granularity: Annotated[Literal["hour", "day"], Query(description="Размер временного интервала")] = "day",
+                    date_from: Annotated[datetime | None, Query(description="Начало периода (включительно)")] = None,
+                    date_to: Annotated[datetime | None, Query(description="Конец периода (не включительно)")] = None,
+                    min_lat: Annotated[float | None, Query(ge=-90, le=90, description="Южная граница области")] = None,
+                    min_lon: Annotated[float | None, Query(ge=-180, le=180, description="Западная граница области")] = None,
+                    max_lat: Annotated[float | None, Query(ge=-90, le=90, description="Северная граница области")] = None,
+                    max_lon: Annotated[float | None, Query(ge=-180, le=180, description="Восточная граница области")] = None,
+                    by_cell: Annotated[bool, Query(description="Разбить интервалы по ячейкам геосетки")] = False):
+    """
+    Input:
+    - "granularity": hour или day.
+    - "date_from"/"date_to", "min_lat", "min_lon", "max_lat", "max_lon": фильтры как у /history.
+    - "by_cell": вернуть статистику отдельно по каждой ячейке сетки (ROLLUP_CELL_DEG).
+    Output:
+    buckets: по каждому интервалу число запросов, min/max/avg температуры и скорости ветра,
+    гистограмма weather_main. Считается по предагрегированной таблице weather_rollups,
+    сырые строки weather_requests не читаются.
+    """
+    bbox = parse_bbox(min_lat, min_lon, max_lat, max_lon)
+    logger.info(f"Stats query: {granularity=}, {date_from=}, {date_to=}, {bbox=}, {by_cell=}")
+
+    buckets = await get_stats_implementation(
+        granularity, date_from=date_from, date_to=date_to, bbox=bbox, by_cell=by_cell
+    )
+    return Stats(granularity=granularity, buckets=buckets)
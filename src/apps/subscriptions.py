@@ -0,0 +1,197 @@
+import asyncio
+from fastapi import APIRouter, Query, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Annotated
+import orjson
+from pydantic import ValidationError
+from templates.schemas.weather_batch import WeatherLocation
+from services.weather import subscription_hub
+from services.subscriptions import Subscription
+from services.config import (
+    SUBSCRIPTION_HEARTBEAT,
+    SUBSCRIPTION_SEND_TIMEOUT,
+    SUBSCRIPTION_MAX_LOCATIONS,
+    REQUEST_DEADLINE,
+)
+from services.resilience import deadline_scope, UpstreamTimeoutError, UpstreamUnavailableError
+from loguru import logger
+
+subscriptions_router = APIRouter()
+
+
+def parse_locations(cities: list[str], coords: list[str]) -> list[dict]:
+    locations = []
+    try:
+        for city in cities:
+            locations.append(WeatherLocation(city=city).model_dump())
+        for pair in coords:
+            lat, lon = pair.split(",")
+            locations.append(WeatherLocation(lat=float(lat), lon=float(lon)).model_dump())
+    except (ValueError, ValidationError):
+        raise HTTPException(
+            400,
+            detail="Локации задаются параметрами city=<город> и coords=<lat>,<lon>.",
+        )
+    if not locations:
+        raise HTTPException(
+            400,
+            detail="Укажите хотя бы одну локацию.",
+        )
+    if len(locations) > SUBSCRIPTION_MAX_LOCATIONS:
+        raise HTTPException(
+            400,
+            detail=f"Не больше {SUBSCRIPTION_MAX_LOCATIONS} локаций на подписку.",
+        )
+    return locations
+
+
+async def resolve_subscription(locations: list[dict]) -> Subscription:
+    """Resolves locations into a subscription, not yet attached to the hub; errors are mapped as on /weather."""
+    if subscription_hub.is_full():
+        raise HTTPException(
+            503,
+            detail="Слишком много подписок, попробуйте позже.",
+        )
+    try:
+        with deadline_scope(REQUEST_DEADLINE):
+            subscription = Subscription(await subscription_hub.resolve(locations))
+    except UpstreamTimeoutError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            504,
+            detail=str(e),
+        )
+    except UpstreamUnavailableError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            503,
+            detail=str(e),
+        )
+    except Exception as e:
+        logger.error(str(e))
+        raise HTTPException(
+            500,
+            detail=str(e),
+        )
+    return subscription
+
+
+@subscriptions_router.get("/subscribe/sse", summary="Подписка на обновления погоды (Server-Sent Events)")
+async def subscribe_sse(city: Annotated[list[str], Query(description="Город, можно указать несколько раз")] = [],
+                        coords: Annotated[list[str], Query(description="Координаты lat,lon, можно указать несколько раз")] = []):
+    """
+    Input:
+    - "city" и "coords" (lat,lon) — повторяемые параметры, всего не больше SUBSCRIPTION_MAX_LOCATIONS локаций.
+    Output:
+    Поток text/event-stream: событие "weather" с {"location", "weather"} сразу для
+    каждой известной локации и затем только при изменении погоды; комментарий
+    ": ping" каждые SUBSCRIPTION_HEARTBEAT секунд тишины.
+    """
+    locations = parse_locations(city, coords)
+    logger.info(f"SSE subscription to {len(locations)} locations")
+    subscription = await resolve_subscription(locations)
+
+    async def stream():
+        # Attached only once the response runs: a client gone before the first chunk
+        # never starts the generator, and nothing would detach it.
+        subscription_hub.attach(subscription)
+        try:
+            # Sends the headers at once, so the client knows the subscription is open.
+            yield b": subscribed\n\n"
+            while True:
+                events = await subscription.next(SUBSCRIPTION_HEARTBEAT)
+                if events is None:
+                    return
+                if not events:
+                    yield b": ping\n\n"
+                    continue
+                # The send of one chunk waits for the client, and meanwhile updates coalesce in the subscription.
+                yield b"".join(b"event: weather\ndata: " + orjson.dumps(event) + b"\n\n" for event in events)
+        finally:
+            subscription_hub.detach(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@subscriptions_router.websocket("/subscribe/ws")
+async def subscribe_ws(websocket: WebSocket):
+    """
+    Input:
+    - Сообщения клиента {"locations": [{"city": ...} | {"lat": ..., "lon": ...}]} — каждое заменяет набор локаций.
+    Output:
+    {"type": "weather", "location", "weather"} при изменении погоды, {"type": "ping"} каждые
+    SUBSCRIPTION_HEARTBEAT секунд тишины, {"type": "error", "detail"} на некорректное сообщение.
+    Клиент, который не принимает сообщение SUBSCRIPTION_SEND_TIMEOUT секунд, отключается.
+    """
+    await websocket.accept()
+    current: Subscription | None = None
+    started = asyncio.Event()
+
+    async def send(message: dict) -> None:
+        await asyncio.wait_for(websocket.send_text(orjson.dumps(message).decode()), SUBSCRIPTION_SEND_TIMEOUT)
+
+    async def receive() -> None:
+        nonlocal current
+        while True:
+            try:
+                body = orjson.loads(await websocket.receive_text())
+                locations = [WeatherLocation(**location).model_dump() for location in body["locations"]]
+                if not locations or len(locations) > SUBSCRIPTION_MAX_LOCATIONS:
+                    raise ValueError(f"От 1 до {SUBSCRIPTION_MAX_LOCATIONS} локаций на подписку.")
+                subscription = await resolve_subscription(locations)
+            except WebSocketDisconnect:
+                raise
+            except HTTPException as e:
+                await send({"type": "error", "detail": e.detail})
+                continue
+            except Exception as e:
+                await send({"type": "error", "detail": str(e)})
+                continue
+            subscription_hub.attach(subscription)
+            previous, current = current, subscription
+            if previous is not None:
+                # Wakes deliver() from waiting on the replaced subscription.
+                previous.close()
+                subscription_hub.detach(previous)
+            started.set()
+
+    async def deliver() -> None:
+        await started.wait()
+        while True:
+            subscription = current
+            events = await subscription.next(SUBSCRIPTION_HEARTBEAT)
+            if events is None:
+                if subscription is not current:
+                    continue
+                await websocket.close(1001)
+                return
+            if not events:
+                await send({"type": "ping"})
+            for event in events:
+                await send({"type": "weather", **event})
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(deliver())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if isinstance(error, asyncio.TimeoutError):
+                subscription_hub.slow_disconnects += 1
+                logger.warning("WebSocket subscriber is too slow, closing")
+                try:
+                    await asyncio.wait_for(websocket.close(1008), SUBSCRIPTION_SEND_TIMEOUT)
+                except Exception:
+                    pass
+            elif error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"WebSocket subscription failed: {error}")
+    finally:
+        # Detach before awaiting: a cancelled endpoint may not get past the next await.
+        if current is not None:
+            subscription_hub.detach(current)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,11 +1,8 @@
-from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 import orjson
-from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine
 
-import pytz
-import functools
-import asyncio
+from zoneinfo import ZoneInfo
+import uuid
 from loguru import logger
 import os
 from dotenv import load_dotenv
@@ -21,39 +18,88 @@ DATABASE_LOGIN = os.environ.get("DATABASE_LOGIN")
 DATABASE_PASSWORD = os.environ.get("DATABASE_PASSWORD")
 DATABASE_NAME = os.environ.get("DATABASE_NAME")
 
+HISTORY_BATCH_SIZE = int(os.environ.get("HISTORY_BATCH_SIZE", 500))
+HISTORY_FLUSH_INTERVAL = float(os.environ.get("HISTORY_FLUSH_INTERVAL", 1.0))
+HISTORY_QUEUE_MAXSIZE = int(os.environ.get("HISTORY_QUEUE_MAXSIZE", 50000))
+HISTORY_DROP_POLICY = os.environ.get("HISTORY_DROP_POLICY", "drop_oldest")
+
+PARTITION_INTERVAL = os.environ.get("PARTITION_INTERVAL", "month")
+PARTITION_PREMAKE = int(os.environ.get("PARTITION_PREMAKE", 3))
+PARTITION_MAINTENANCE_INTERVAL = float(os.environ.get("PARTITION_MAINTENANCE_INTERVAL", 3600))
+HISTORY_RETENTION_DAYS = int(os.environ.get("HISTORY_RETENTION_DAYS", 0))
+
+ROLLUP_CELL_DEG = float(os.environ.get("ROLLUP_CELL_DEG", 0.1))
+
+DB_RETRY_ATTEMPTS = int(os.environ.get("DB_RETRY_ATTEMPTS", 3))
+DB_RETRY_BASE_DELAY = float(os.environ.get("DB_RETRY_BASE_DELAY", 0.05))
+DB_RETRY_MAX_DELAY = float(os.environ.get("DB_RETRY_MAX_DELAY", 1.0))
+DB_RETRY_DEADLINE = float(os.environ.get("DB_RETRY_DEADLINE", 5))
+
+# Per process: with several uvicorn workers Postgres sees workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100))
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+# asyncpg limit on bind parameters in one statement; multi-row inserts are split to stay under it.
+DB_MAX_BIND_PARAMS = 32767
+
+# Disable in app pods when a separate job runs `alembic upgrade head`.
+RUN_MIGRATIONS = os.environ.get("RUN_MIGRATIONS", "true").lower() in ("1", "true", "yes")
+
 logger.info(f"postgresql+asyncpg://{DATABASE_LOGIN}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}")
 
+def json_serializer(value) -> str:
+    # orjson returns bytes, while SQLAlchemy's JSON bind processors expect str.
+    return orjson.dumps(value).decode()
+
 def database_url_asyncpg():
     return f"postgresql+asyncpg://{DATABASE_LOGIN}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
 
-app_timezone = pytz.timezone(APP_TIMEZONE)
-database_engine = create_engine(
-    f"postgresql+psycopg2://{DATABASE_LOGIN}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}",
-    json_serializer=orjson.dumps,
-    json_deserializer=orjson.loads,
-)
+def database_connect_args() -> dict:
+    """asyncpg connect arguments.
+
+    Behind PgBouncer in transaction mode a session may land on a different
+    server connection for every transaction, so named prepared statements
+    cannot be cached: both asyncpg's and SQLAlchemy's statement caches are
+    disabled and statement names are made unique.
+    """
+    if DB_PGBOUNCER:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+    }
+
+app_timezone = ZoneInfo(APP_TIMEZONE)
 database_engine_async = create_async_engine(
     # f"postgresql+asyncpg://{DATABASE_LOGIN}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}",
     database_url_asyncpg(),
-    json_serializer=orjson.dumps,
+    json_serializer=json_serializer,
     json_deserializer=orjson.loads,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=database_connect_args(),
 )
 
-def retry_async(num_attempts):
-    def decorator(func):
-        @functools.wraps(func)
-        async def wrapper(*args, **kwargs):
-            for try_index in range(num_attempts + 1):
-                try:
-                    return await func(*args, **kwargs)
-                except Exception as e:
-                    if try_index == num_attempts:
-                        raise e
-                    print(
-                        f"Exception occurred: {e}. Retrying... ({try_index + 1}/{num_attempts})"
-                    )
-                    await asyncio.sleep(1)
-
-        return wrapper
-
-    return decorator
+def pool_status() -> dict[str, int | float]:
+    """Utilization of the async engine pool."""
+    pool = database_engine_async.pool
+    capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "utilization": pool.checkedout() / capacity if capacity else 0.0,
+    }
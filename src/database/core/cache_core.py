@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from database.config import database_engine_async
+
+from database.oop.database_worker import DatabaseWorkerAsync
+from database.orm import CacheEntries
+from database.retry import NO_RETRY, retry_policy_scope
+
+database_worker = DatabaseWorkerAsync(database_engine_async)
+
+
+def _expires_at(ttl: float):
+    return func.now() + timedelta(seconds=ttl)
+
+
+async def get_cache_entries_implementation(keys: list[str]) -> dict[str, bytes]:
+    # Cache reads sit on the request path: a miss is cheaper than a retry.
+    with retry_policy_scope(NO_RETRY):
+        rows = await database_worker.custom_orm_select(
+            cls_from=[CacheEntries.key, CacheEntries.value],
+            where_params=[CacheEntries.key.in_(keys), CacheEntries.expires_at > func.now()],
+        )
+    return {row.key: row.value for row in rows}
+
+
+async def set_cache_entry_implementation(key: str, value: bytes, ttl: float) -> None:
+    with retry_policy_scope(NO_RETRY):
+        await database_worker.custom_upsert(
+            cls_to=CacheEntries,
+            index_elements=[CacheEntries.key],
+            data=[{"key": key, "value": value, "expires_at": _expires_at(ttl)}],
+            update_set=["value", "expires_at"],
+        )
+
+
+async def add_cache_entry_implementation(key: str, value: bytes, ttl: float) -> bool:
+    """Stores the entry unless a live one exists, returning whether it was stored."""
+    stmt = insert(CacheEntries).values(key=key, value=value, expires_at=_expires_at(ttl))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CacheEntries.key],
+        set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+        where=CacheEntries.expires_at <= func.now(),
+    ).returning(CacheEntries.key)
+    with retry_policy_scope(NO_RETRY):
+        return bool(await database_worker.session_scalars_commit(stmt))
+
+
+async def delete_cache_entry_implementation(key: str) -> None:
+    with retry_policy_scope(NO_RETRY):
+        await database_worker.custom_delete_all(CacheEntries, where_params=[CacheEntries.key == key])
+
+
+async def purge_cache_implementation() -> None:
+    await database_worker.custom_delete_all(CacheEntries, where_params=[CacheEntries.expires_at <= func.now()])
@@ -0,0 +1,34 @@
+from database.config import database_engine_async
+
+from database.oop.database_worker import DatabaseWorkerAsync
+from database.orm import GeocodeCache
+from database.retry import NO_RETRY, retry_policy_scope
+
+from loguru import logger
+
+database_worker = DatabaseWorkerAsync(database_engine_async)
+
+
+async def get_geocode_implementation(query: str) -> tuple[float, float] | None:
+    # Both calls sit on the request path: asking upstream is cheaper than a retry.
+    with retry_policy_scope(NO_RETRY):
+        row: GeocodeCache | None = await database_worker.custom_orm_select(
+            cls_from=GeocodeCache,
+            where_params=[GeocodeCache.query == query],
+            sql_limit=1,
+            return_unpacked=True,
+        )
+    if not row:
+        return None
+    return row.lat, row.lon
+
+
+async def post_geocode_implementation(query: str, lat: float, lon: float) -> None:
+    with retry_policy_scope(NO_RETRY):
+        await database_worker.custom_upsert(
+            cls_to=GeocodeCache,
+            index_elements=[GeocodeCache.query],
+            data=[{"query": query, "lat": lat, "lon": lon}],
+            update_set=["lat", "lon"],
+        )
+    logger.info(f"Geocode cached: {query=}, {lat=}, {lon=}")
@@ -0,0 +1,209 @@
+import base64
+import csv
+import io
+import math
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable
+
+import orjson
+from sqlalchemy import func, text, tuple_
+
+from database.config import database_engine_async, app_timezone
+
+from database.oop.database_worker import DatabaseWorkerAsync
+from database.orm import WeatherRequests
+from database.retry import NO_RETRY, retry_policy_scope
+
+database_worker = DatabaseWorkerAsync(database_engine_async)
+
+HISTORY_FIELDS = ["id", "created_at", "lat", "lon", "weather_main", "temp", "wind_speed"]
+EXPORT_CHUNK_ROWS = 500
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+# last_value is 1 both before and after the first nextval, is_called tells them apart.
+HISTORY_VERSION_SQL = "SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM public.weather_requests_version_seq"
+BUMP_HISTORY_VERSION_SQL = "SELECT nextval('public.weather_requests_version_seq')"
+
+
+def to_db_time(value: datetime) -> datetime:
+    """created_at is stored as naive time in the application timezone."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(app_timezone).replace(tzinfo=None)
+
+
+def near_bbox(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float]:
+    """Bounding box that contains the circle, used to hit the GiST index before the exact check."""
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    return (
+        max(lat - dlat, -90.0),
+        max(lon - dlon, -180.0),
+        min(lat + dlat, 90.0),
+        min(lon + dlon, 180.0),
+    )
+
+
+def distance_km(lat: float, lon: float):
+    """Haversine distance from (lat, lon) to the row location as a SQL expression."""
+    dlat = func.radians(WeatherRequests.lat - lat)
+    dlon = func.radians(WeatherRequests.lon - lon)
+    a = (
+        func.power(func.sin(dlat / 2), 2)
+        + math.cos(math.radians(lat)) * func.cos(func.radians(WeatherRequests.lat)) * func.power(func.sin(dlon / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
+
+
+def history_filters(
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    near: tuple[float, float, float] | None = None,
+) -> list:
+    """Builds where params matching the (created_at, id), BRIN (created_at) and GiST (point(lon, lat)) indexes.
+
+    ``near`` is (lat, lon, radius_km).
+    """
+    where_params = []
+    if date_from is not None:
+        where_params.append(WeatherRequests.created_at >= to_db_time(date_from))
+    if date_to is not None:
+        where_params.append(WeatherRequests.created_at < to_db_time(date_to))
+
+    boxes = [bbox] if bbox is not None else []
+    if near is not None:
+        boxes.append(near_bbox(*near))
+        where_params.append(distance_km(near[0], near[1]) <= near[2])
+    for min_lat, min_lon, max_lat, max_lon in boxes:
+        where_params.append(
+            func.point(WeatherRequests.lon, WeatherRequests.lat).op("<@")(
+                func.box(func.point(min_lon, min_lat), func.point(max_lon, max_lat))
+            )
+        )
+    return where_params
+
+
+def encode_cursor(row: WeatherRequests) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([row.created_at.isoformat(), row.id])).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    created_at, row_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(created_at), int(row_id)
+
+
+def history_row(row: WeatherRequests) -> dict:
+    return {
+        "id": row.id,
+        "created_at": row.created_at.isoformat(),
+        "lat": row.lat,
+        "lon": row.lon,
+        "weather_main": row.weather_main,
+        "temp": row.temp,
+        "wind_speed": row.wind_speed,
+    }
+
+
+async def get_history_implementation(
+    limit: int,
+    cursor: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    near: tuple[float, float, float] | None = None,
+) -> dict:
+    """Returns one page, newest first, with keyset pagination on (created_at, id)."""
+    where_params = history_filters(date_from, date_to, bbox, near)
+    if cursor is not None:
+        where_params.append(
+            tuple_(WeatherRequests.created_at, WeatherRequests.id) < tuple_(*decode_cursor(cursor))
+        )
+
+    rows: list[WeatherRequests] = await database_worker.custom_orm_select(
+        cls_from=WeatherRequests,
+        where_params=where_params,
+        order_by=[WeatherRequests.created_at.desc(), WeatherRequests.id.desc()],
+        sql_limit=limit + 1,
+    )
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {
+        "items": [history_row(row) for row in rows[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+
+async def get_recent_history_implementation(date_from: datetime, limit: int) -> list[dict]:
+    """Up to ``limit`` newest rows created after ``date_from``, newest first."""
+    rows: list[WeatherRequests] = await database_worker.custom_orm_select(
+        cls_from=WeatherRequests,
+        where_params=history_filters(date_from=date_from),
+        order_by=[WeatherRequests.created_at.desc(), WeatherRequests.id.desc()],
+        sql_limit=limit,
+    )
+    return [history_row(row) for row in rows]
+
+
+async def get_history_version_implementation() -> int:
+    """Data version of past history: bumped when rows are added behind the write path, e.g. by a backfill."""
+    with retry_policy_scope(NO_RETRY):
+        return (await database_worker.session_scalars(text(HISTORY_VERSION_SQL)))[0]
+
+
+async def copy_history_implementation(
+    data: Iterable | AsyncIterable,
+    columns: list[str] | None = None,
+    chunk_size: int = 10000,
+) -> int:
+    """Backfills history with COPY, bumping the data version in the same transaction.
+
+    Rollups are not touched; run ``rebuild_rollups_implementation`` over the loaded days afterwards.
+    """
+    return await database_worker.custom_copy(
+        WeatherRequests,
+        data,
+        columns=columns,
+        chunk_size=chunk_size,
+        post_sql=[BUMP_HISTORY_VERSION_SQL],
+    )
+
+
+async def export_history_implementation(
+    fmt: str,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    near: tuple[float, float, float] | None = None,
+) -> AsyncIterator[bytes]:
+    """Streams matching history rows as NDJSON or CSV, ``EXPORT_CHUNK_ROWS`` rows per chunk."""
+    rows = database_worker.custom_orm_stream(
+        cls_from=WeatherRequests,
+        where_params=history_filters(date_from, date_to, bbox, near),
+        order_by=[WeatherRequests.created_at, WeatherRequests.id],
+    )
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=HISTORY_FIELDS)
+        writer.writeheader()
+        count = 0
+        async for row in rows:
+            writer.writerow(history_row(row))
+            count += 1
+            if count % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+        return
+
+    chunk = []
+    async for row in rows:
+        chunk.append(orjson.dumps(history_row(row)))
+        if len(chunk) == EXPORT_CHUNK_ROWS:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert
+
+from database.config import (
+    app_timezone,
+    DB_MAX_BIND_PARAMS,
+    HISTORY_BATCH_SIZE,
+    HISTORY_FLUSH_INTERVAL,
+    HISTORY_QUEUE_MAXSIZE,
+    HISTORY_DROP_POLICY,
+)
+from database.oop.database_worker import DatabaseWorkerAsync
+from database.orm import WeatherRequests
+from database.core.rollup_core import rollup_statements, rollup_write_lock
+
+from loguru import logger
+
+DROP_POLICIES = ("block", "drop_new", "drop_oldest")
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Write-behind buffer for ``weather_requests``.
+
+    Rows are queued from the request path and inserted in multi-row batches,
+    flushed when ``batch_size`` rows are collected or ``flush_interval``
+    seconds pass since the first row of the batch. When the queue is full
+    ``drop_policy`` decides what happens: ``block`` waits for room,
+    ``drop_new`` discards the incoming row, ``drop_oldest`` evicts the head
+    of the queue. Each batch also updates ``weather_rollups`` in the same
+    transaction; batches of any size are split into statements within the
+    driver's bind parameter limit.
+    """
+
+    def __init__(
+        self,
+        database_worker: DatabaseWorkerAsync,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL,
+        max_queue: int = HISTORY_QUEUE_MAXSIZE,
+        drop_policy: str = HISTORY_DROP_POLICY,
+    ) -> None:
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy should be one of {DROP_POLICIES}, got {drop_policy!r}")
+
+        self.database_worker = database_worker
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+        self.submitted = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closed = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops accepting rows and flushes everything still queued."""
+        if self._task is None:
+            return
+        self._closed = True
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+
+        rest = []
+        while not self.queue.empty():
+            row = self.queue.get_nowait()
+            if row is not _STOP:
+                rest.append(row)
+        for i in range(0, len(rest), self.batch_size):
+            await self._flush(rest[i:i + self.batch_size])
+
+    async def submit(self, row: dict) -> bool:
+        if self._closed:
+            self.dropped += 1
+            return False
+
+        row.setdefault("created_at", datetime.now(app_timezone).replace(tzinfo=None))
+
+        if self.drop_policy == "block":
+            await self.queue.put(row)
+        else:
+            try:
+                self.queue.put_nowait(row)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                if self.drop_policy == "drop_new":
+                    return False
+                self.queue.get_nowait()
+                self.queue.put_nowait(row)
+
+        self.submitted += 1
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            row = await self.queue.get()
+            if row is _STOP:
+                return
+
+            batch = [row]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+        chunk_size = DB_MAX_BIND_PARAMS // max(len(row) for row in batch)
+        stmts = [insert(WeatherRequests).values(batch[i:i + chunk_size]) for i in range(0, len(batch), chunk_size)]
+        try:
+            await self.database_worker.session_execute_many_commit(
+                [rollup_write_lock(), *stmts, *rollup_statements(batch)]
+            )
+            self.flushed += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"History flush failed, {len(batch)} rows dropped: {e}")
+        finally:
+            self.last_flush_seconds = time.perf_counter() - started
+            self.total_flush_seconds += self.last_flush_seconds
+            self.flushes += 1
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+            "avg_flush_seconds": self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+        }
@@ -0,0 +1,191 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from database.config import (
+    database_engine_async,
+    app_timezone,
+    PARTITION_INTERVAL,
+    PARTITION_PREMAKE,
+    PARTITION_MAINTENANCE_INTERVAL,
+    HISTORY_RETENTION_DAYS,
+)
+from database.oop.database_worker import DatabaseWorkerAsync
+from database.orm import WeatherRequests
+from database.partitions import (
+    attach_default_partition_sql,
+    bound_interval,
+    check_interval,
+    create_partition_sql,
+    default_partition_name,
+    detach_partition_sql,
+    drop_partition_sql,
+    move_rows_sql,
+    next_period,
+    overlaps,
+    parse_partition_bound,
+    partition_name,
+    period_start,
+    periods,
+)
+
+from loguru import logger
+
+database_worker = DatabaseWorkerAsync(database_engine_async)
+
+# Any constant works, it only has to be the same in every worker and replica.
+PARTITION_LOCK_KEY = 7_106_301
+
+LIST_PARTITIONS_SQL = text(
+    """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    JOIN pg_namespace n ON n.oid = p.relnamespace
+    WHERE n.nspname = :schema AND p.relname = :table
+    """
+)
+
+
+class PartitionMaintainer:
+    """Keeps ``weather_requests`` partitions ahead of time and drops expired ones.
+
+    Every ``maintenance_interval`` seconds it creates partitions for the
+    current period and ``premake`` periods ahead, and, when
+    ``retention_days`` is positive, detaches and drops partitions that lie
+    entirely before the retention horizon. A transaction-level advisory
+    lock lets only one worker across the fleet do this at a time.
+
+    Partitions are read by their bounds, not their names. The period
+    length comes from the newest partition, so ``interval`` only applies
+    to a table that has none yet. Ranges already covered, e.g. by the
+    legacy partition the migration attaches, are skipped.
+    """
+
+    def __init__(
+        self,
+        database_worker: DatabaseWorkerAsync,
+        interval: str = PARTITION_INTERVAL,
+        premake: int = PARTITION_PREMAKE,
+        retention_days: int = HISTORY_RETENTION_DAYS,
+        maintenance_interval: float = PARTITION_MAINTENANCE_INTERVAL,
+    ) -> None:
+        check_interval(interval)
+        self.database_worker = database_worker
+        self.interval = interval
+        self.premake = premake
+        self.retention_days = retention_days
+        self.maintenance_interval = maintenance_interval
+        self.schema = WeatherRequests.__table__.schema
+        self.table = WeatherRequests.__tablename__
+        self._task: asyncio.Task | None = None
+        self._interval_warned = False
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {e}")
+            await asyncio.sleep(self.maintenance_interval)
+
+    def _table_interval(self, bounds: dict[str, tuple[datetime | None, datetime | None]]) -> str:
+        """Period length of the newest partition spanning exactly one period, else the configured one."""
+        closed = sorted((lower, upper) for lower, upper in bounds.values() if lower is not None and upper is not None)
+        for lower, upper in reversed(closed):
+            interval = bound_interval(lower, upper)
+            if interval is None:
+                continue
+            if interval != self.interval and not self._interval_warned:
+                logger.warning(f"Partitions of {self.table} are by {interval}, PARTITION_INTERVAL={self.interval} is ignored")
+                self._interval_warned = True
+            return interval
+        return self.interval
+
+    async def _create_partition(self, session, start: datetime, interval: str, has_default: bool) -> None:
+        end = next_period(start, interval)
+        default = default_partition_name(self.table)
+        stranded = has_default and await session.scalar(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{self.schema}"."{default}" WHERE created_at >= :start AND created_at < :end)'),
+            {"start": start, "end": end},
+        )
+        if not stranded:
+            await session.execute(text(create_partition_sql(self.schema, self.table, start, interval)))
+            return
+
+        # Postgres refuses a partition for rows the DEFAULT partition already holds:
+        # take DEFAULT out, create the partition, route its rows there and put DEFAULT back.
+        await session.execute(text(detach_partition_sql(self.schema, self.table, default)))
+        await session.execute(text(create_partition_sql(self.schema, self.table, start, interval)))
+        await session.execute(text(move_rows_sql(self.schema, self.table, default, start, end)))
+        await session.execute(text(attach_default_partition_sql(self.schema, self.table)))
+        logger.warning(f"Moved rows of [{start}, {end}) out of {default}")
+
+    async def maintain(self) -> None:
+        now = datetime.now(app_timezone).replace(tzinfo=None)
+
+        async with self.database_worker.async_session_maker() as session:
+            locked = await session.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+            if not locked:
+                return
+
+            result = await session.execute(LIST_PARTITIONS_SQL, {"schema": self.schema, "table": self.table})
+            bounds = {}
+            has_default = False
+            for name, expr in result.all():
+                bound = parse_partition_bound(expr)
+                if bound is None:
+                    has_default = True
+                else:
+                    bounds[name] = bound
+
+            interval = self._table_interval(bounds)
+            current = period_start(now, interval)
+            ahead = current
+            for _ in range(self.premake):
+                ahead = next_period(ahead, interval)
+
+            created = []
+            for start in periods(current, ahead, interval):
+                end = next_period(start, interval)
+                if any(overlaps(start, end, bound) for bound in bounds.values()):
+                    continue
+                await self._create_partition(session, start, interval, has_default)
+                name = partition_name(self.table, start, interval)
+                bounds[name] = (start, end)
+                created.append(name)
+
+            dropped = []
+            if self.retention_days > 0:
+                horizon = now - timedelta(days=self.retention_days)
+                for name, (_, upper) in bounds.items():
+                    if upper is not None and upper <= horizon:
+                        for stmt in drop_partition_sql(self.schema, self.table, name):
+                            await session.execute(text(stmt))
+                        dropped.append(name)
+
+            await session.commit()
+
+        if created:
+            logger.info(f"Created partitions: {created}")
+        if dropped:
+            logger.info(f"Dropped expired partitions: {dropped}")
+
+
+partition_maintainer = PartitionMaintainer(database_worker)
@@ -1,17 +1,10 @@
-from fastapi import UploadFile
-from fastapi.responses import JSONResponse
-
-import uuid
-
 from database.config import database_engine_async
-# from backend.templates.responses import TemplateResponsesNamespace
 
 from database.oop.database_worker import DatabaseWorkerAsync
-from database.orm import WeatherRequests
-
-from loguru import logger
+from database.core.history_writer import HistoryWriter
 
 database_worker = DatabaseWorkerAsync(database_engine_async)
+history_writer = HistoryWriter(database_worker)
 
 async def post_weather_implementation(
     lat: float,
@@ -19,7 +12,7 @@ async def post_weather_implementation(
     temp: float,
     weather_main: str,
     wind_speed: float
-) -> JSONResponse:
+) -> bool:
     data_to_insert = {
         "lat": lat,
         "lon": lon,
@@ -27,18 +20,11 @@ async def post_weather_implementation(
         "weather_main": weather_main,
         "wind_speed": wind_speed
     }
-    request: WeatherRequests = await database_worker.custom_insert(
-        cls_to=WeatherRequests, data=[data_to_insert], returning=WeatherRequests, return_unpacked=True
-    )
-    logger.info(f"{request}")
+    return await history_writer.submit(data_to_insert)
+
 
-    return JSONResponse(
-        content={
-            "status": "success",
-            "result": 
-                request.as_dict(
-                    transform_dates=True
-                ),
-        },
-        status_code=200
-    )
+async def post_weather_batch_implementation(rows: list[dict]) -> int:
+    submitted = 0
+    for row in rows:
+        submitted += await history_writer.submit(dict(row))
+    return submitted
@@ -0,0 +1,181 @@
+import math
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+
+from database.config import database_engine_async, DB_MAX_BIND_PARAMS, ROLLUP_CELL_DEG
+
+from database.oop.database_worker import DatabaseWorkerAsync
+from database.orm import WeatherRollups
+from database.core.history_core import to_db_time, BUMP_HISTORY_VERSION_SQL
+
+database_worker = DatabaseWorkerAsync(database_engine_async)
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+ROLLUP_KEY = ["granularity", "bucket_start", "cell_lat", "cell_lon"]
+# History flushes hold it shared, a rebuild holds it exclusively: a rebuild never races a flush into its window.
+ROLLUP_LOCK_KEY = 7_106_303
+
+
+def rollup_cell(lat: float, lon: float, cell_deg: float = ROLLUP_CELL_DEG) -> tuple[float, float]:
+    """South-west corner of the grid cell that contains the point."""
+    return (
+        round(math.floor(lat / cell_deg) * cell_deg, 6),
+        round(math.floor(lon / cell_deg) * cell_deg, 6),
+    )
+
+
+def bucket_start(value: datetime, granularity: str) -> datetime:
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        value = value.replace(hour=0)
+    return value
+
+
+def rollup_statements(rows: list[dict]) -> list:
+    """Upserts that add a batch of history rows to the hourly and daily rollups.
+
+    The batch is pre-aggregated in memory so each (bucket, cell) is touched
+    once, and rows are sorted by key so concurrent writers lock in the same
+    order. Large batches are split into several statements, each within
+    ``DB_MAX_BIND_PARAMS``; run them in one transaction, in order.
+    """
+    aggregated: dict[tuple, dict] = {}
+    for row in rows:
+        cell_lat, cell_lon = rollup_cell(row["lat"], row["lon"])
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (granularity, bucket_start(row["created_at"], granularity), cell_lat, cell_lon)
+            item = aggregated.get(key)
+            if item is None:
+                aggregated[key] = {
+                    **dict(zip(ROLLUP_KEY, key)),
+                    "count": 1,
+                    "temp_min": row["temp"],
+                    "temp_max": row["temp"],
+                    "temp_sum": row["temp"],
+                    "wind_speed_min": row["wind_speed"],
+                    "wind_speed_max": row["wind_speed"],
+                    "wind_speed_sum": row["wind_speed"],
+                    "weather_main_hist": {row["weather_main"]: 1},
+                }
+                continue
+            item["count"] += 1
+            item["temp_min"] = min(item["temp_min"], row["temp"])
+            item["temp_max"] = max(item["temp_max"], row["temp"])
+            item["temp_sum"] += row["temp"]
+            item["wind_speed_min"] = min(item["wind_speed_min"], row["wind_speed"])
+            item["wind_speed_max"] = max(item["wind_speed_max"], row["wind_speed"])
+            item["wind_speed_sum"] += row["wind_speed"]
+            hist = item["weather_main_hist"]
+            hist[row["weather_main"]] = hist.get(row["weather_main"], 0) + 1
+
+    items = [aggregated[key] for key in sorted(aggregated)]
+    chunk_size = DB_MAX_BIND_PARAMS // len(items[0]) if items else 1
+    return [rollup_upsert(items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
+
+
+def rollup_write_lock():
+    """Statement that opens a history flush transaction, so that rebuilds wait for it."""
+    return text("SELECT pg_advisory_xact_lock_shared(:key)").bindparams(key=ROLLUP_LOCK_KEY)
+
+
+def rollup_upsert(items: list[dict]):
+    stmt = insert(WeatherRollups).values(items)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "count": WeatherRollups.count + excluded.count,
+            "temp_min": func.least(WeatherRollups.temp_min, excluded.temp_min),
+            "temp_max": func.greatest(WeatherRollups.temp_max, excluded.temp_max),
+            "temp_sum": WeatherRollups.temp_sum + excluded.temp_sum,
+            "wind_speed_min": func.least(WeatherRollups.wind_speed_min, excluded.wind_speed_min),
+            "wind_speed_max": func.greatest(WeatherRollups.wind_speed_max, excluded.wind_speed_max),
+            "wind_speed_sum": WeatherRollups.wind_speed_sum + excluded.wind_speed_sum,
+            "weather_main_hist": func.weather_hist_merge(WeatherRollups.weather_main_hist, excluded.weather_main_hist),
+        },
+    )
+
+
+REBUILD_ROLLUPS_SQL = """
+INSERT INTO public.weather_rollups
+SELECT
+    CAST(:granularity AS text),
+    date_trunc(CAST(:granularity AS text), created_at) AS bucket_start,
+    round((floor(lat / :cell) * :cell)::numeric, 6)::double precision AS cell_lat,
+    round((floor(lon / :cell) * :cell)::numeric, 6)::double precision AS cell_lon,
+    count(*),
+    min(temp), max(temp), sum(temp),
+    min(wind_speed), max(wind_speed), sum(wind_speed),
+    public.weather_hist_sum(jsonb_build_object(weather_main, 1))
+FROM public.weather_requests
+WHERE created_at >= :date_from AND created_at < :date_to
+GROUP BY 2, 3, 4
+"""
+
+
+async def rebuild_rollups_implementation(date_from: datetime, date_to: datetime) -> None:
+    """Recomputes rollups from raw history, e.g. after a COPY backfill that bypassed the write path.
+
+    The bounds are widened to whole days so daily buckets are never rebuilt
+    from part of their rows. History flushes wait while the rebuild runs.
+    Also bumps the history data version, so settled /history ETags change.
+    """
+    date_from = bucket_start(to_db_time(date_from), "day")
+    date_to = to_db_time(date_to)
+    if bucket_start(date_to, "day") < date_to:
+        date_to = bucket_start(date_to, "day") + timedelta(days=1)
+    params = {"date_from": date_from, "date_to": date_to, "cell": ROLLUP_CELL_DEG}
+    stmts = [
+        text("SELECT pg_advisory_xact_lock(:key)").bindparams(key=ROLLUP_LOCK_KEY),
+        text(
+            "DELETE FROM public.weather_rollups WHERE bucket_start >= :date_from AND bucket_start < :date_to"
+        ).bindparams(**{k: params[k] for k in ("date_from", "date_to")}),
+    ]
+    for granularity in ROLLUP_GRANULARITIES:
+        stmts.append(text(REBUILD_ROLLUPS_SQL).bindparams(granularity=granularity, **params))
+    stmts.append(text(BUMP_HISTORY_VERSION_SQL))
+    await database_worker.session_execute_many_commit(stmts)
+
+
+async def get_stats_implementation(
+    granularity: str,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    by_cell: bool = False,
+) -> list[dict]:
+    where_params = [WeatherRollups.granularity == granularity]
+    if date_from is not None:
+        where_params.append(WeatherRollups.bucket_start >= bucket_start(to_db_time(date_from), granularity))
+    if date_to is not None:
+        where_params.append(WeatherRollups.bucket_start < to_db_time(date_to))
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        cell_min_lat, cell_min_lon = rollup_cell(min_lat, min_lon)
+        where_params.append(WeatherRollups.cell_lat.between(cell_min_lat, max_lat))
+        where_params.append(WeatherRollups.cell_lon.between(cell_min_lon, max_lon))
+
+    count = func.sum(WeatherRollups.count)
+    group_by = [WeatherRollups.bucket_start]
+    if by_cell:
+        group_by += [WeatherRollups.cell_lat, WeatherRollups.cell_lon]
+
+    rows = await database_worker.custom_orm_select(
+        cls_from=[
+            *group_by,
+            count.label("count"),
+            func.min(WeatherRollups.temp_min).label("temp_min"),
+            func.max(WeatherRollups.temp_max).label("temp_max"),
+            (func.sum(WeatherRollups.temp_sum) / count).label("temp_avg"),
+            func.min(WeatherRollups.wind_speed_min).label("wind_speed_min"),
+            func.max(WeatherRollups.wind_speed_max).label("wind_speed_max"),
+            (func.sum(WeatherRollups.wind_speed_sum) / count).label("wind_speed_avg"),
+            func.weather_hist_sum(WeatherRollups.weather_main_hist).label("weather_main"),
+        ],
+        where_params=where_params,
+        group_by=group_by,
+        order_by=group_by,
+    )
+    return [dict(row._mapping) for row in rows]
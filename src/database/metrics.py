@@ -0,0 +1,29 @@
+import functools
+import time
+
+from prometheus_client import Histogram
+
+DB_QUERY_SECONDS = Histogram(
+    "weather_db_query_seconds",
+    "Latency of DatabaseWorkerAsync operations, retries included.",
+    ["operation", "outcome"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def timed(func):
+    """Records the latency of a coroutine method in DB_QUERY_SECONDS under its name."""
+    operation = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await func(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            DB_QUERY_SECONDS.labels(operation, outcome).observe(time.perf_counter() - started)
+
+    return wrapper
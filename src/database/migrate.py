@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.config import database_engine_async
+from loguru import logger
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+
+def _upgrade(connection, revision: str) -> None:
+    # Alembic is only needed when migrating, so it is not imported with the app.
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(SRC_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(SRC_DIR / "migrations"))
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+
+
+async def run_migrations(engine: AsyncEngine = database_engine_async, revision: str = "head") -> None:
+    """Upgrades the schema in-process over the app engine.
+
+    Concurrent callers are serialized by an advisory lock in migrations/env.py.
+    Pooled connections are dropped afterwards so no prepared statement
+    outlives a schema change.
+    """
+    async with engine.connect() as connection:
+        await connection.run_sync(_upgrade, revision)
+    await engine.dispose()
+    logger.info(f"Database schema is at {revision}")
@@ -1,10 +1,12 @@
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, table, column
 
-from typing import Type, TypeVar, Any
+from typing import Type, TypeVar, Any, Iterable, AsyncIterable, AsyncIterator
+import uuid
 
-from database.config import retry_async
+from database.retry import retry_async
+from database.metrics import timed
 from database.orm._base_class import Base
 
 
@@ -18,25 +20,37 @@ class DatabaseWorkerAsync:
             self.engine_async, expire_on_commit=False
         )
 
-    @retry_async(5)
+    @timed
+    @retry_async()
     async def session_execute(self, stmt) -> list:
         async with self.async_session_maker() as session:
             result = await session.execute(stmt)
             return result.all()
 
-    @retry_async(5)
+    @timed
+    @retry_async()
     async def session_scalars(self, stmt) -> list:
         async with self.async_session_maker() as session:
             result = await session.scalars(stmt)
             return result.all()
 
-    @retry_async(5)
+    @timed
+    @retry_async()
     async def session_execute_commit(self, stmt) -> None:
         async with self.async_session_maker() as session:
             await session.execute(stmt)
             await session.commit()
 
-    @retry_async(5)
+    @timed
+    @retry_async()
+    async def session_execute_many_commit(self, stmts: list) -> None:
+        async with self.async_session_maker() as session:
+            for stmt in stmts:
+                await session.execute(stmt)
+            await session.commit()
+
+    @timed
+    @retry_async()
     async def session_scalars_commit(self, stmt) -> list:
         async with self.async_session_maker() as session:
             result = await session.scalars(stmt)
@@ -99,7 +113,38 @@ class DatabaseWorkerAsync:
 
         return result[0] if len(result) == 1 and return_unpacked else result
 
-    @retry_async(5)
+    async def custom_orm_stream(
+        self,
+        cls_from: list[Type[ModelType]] | Type[ModelType] | Any,
+        where_params: list = None,
+        order_by: list = None,
+        sql_limit: int = None,
+        yield_per: int = 1000,
+    ) -> AsyncIterator[Type[ModelType] | Any]:
+        """Yields rows through a server-side cursor, ``yield_per`` rows per fetch."""
+        stmt = select(*cls_from) if isinstance(cls_from, list) else select(cls_from)
+
+        if where_params:
+            stmt = stmt.where(*where_params)
+
+        if order_by:
+            stmt = stmt.order_by(*order_by)
+
+        if sql_limit:
+            stmt = stmt.limit(sql_limit)
+
+        stmt = stmt.execution_options(yield_per=yield_per)
+
+        async with self.async_session_maker() as session:
+            if isinstance(cls_from, list):
+                result = await session.stream(stmt)
+            else:
+                result = await session.stream_scalars(stmt)
+            async for row in result:
+                yield row
+
+    @timed
+    @retry_async()
     async def custom_orm_bulk_update(self, cls_to: Type[ModelType], data: list) -> None:
         async with self.async_session_maker() as session:
             await session.execute(update(cls_to), data)
@@ -158,6 +203,109 @@ class DatabaseWorkerAsync:
             return result[0] if return_unpacked and len(result) == 1 else result
         await self.session_execute_commit(stmt)
 
+    @timed
+    async def custom_copy(
+        self,
+        cls_to: Type[ModelType],
+        data: Iterable | AsyncIterable,
+        columns: list[str] = None,
+        chunk_size: int = 10000,
+        index_elements: list[str] = None,
+        update_set: list[str] = None,
+        post_sql: list[str] = None,
+    ) -> int:
+        """Bulk-loads rows with the binary COPY protocol.
+
+        ``data`` may be a sync or async iterable of dicts or tuples; it is read
+        in ``chunk_size`` pieces so memory stays bounded. Without
+        ``index_elements`` rows are copied straight into the table. With it,
+        rows go through a temporary staging table and are merged by
+        ``INSERT ... SELECT ... ON CONFLICT``, updating ``update_set`` columns
+        (or doing nothing when it is empty). ``post_sql`` statements run
+        after the load. Everything runs in one transaction. ORM-side column defaults are not applied, so columns
+        without a server default must be present in ``columns``.
+        The call is not retried because ``data`` cannot be replayed.
+        Returns the number of rows copied (or inserted/updated when merging).
+        """
+        target = cls_to.__table__
+        chunks = self._iter_chunks(data, chunk_size, columns)
+        first = await anext(chunks, None)
+        if first is None:
+            return 0
+        columns, rows = first
+
+        async with self.engine_async.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+
+            async with driver_connection.transaction():
+                if index_elements is None:
+                    copy_to = {"table_name": target.name, "schema_name": target.schema}
+                else:
+                    stage_name = f"_stage_{target.name}_{uuid.uuid4().hex[:8]}"
+                    await driver_connection.execute(
+                        f'CREATE TEMP TABLE "{stage_name}" '
+                        f'(LIKE "{target.schema}"."{target.name}" INCLUDING DEFAULTS) ON COMMIT DROP'
+                    )
+                    copy_to = {"table_name": stage_name}
+
+                copied = 0
+                while rows:
+                    await driver_connection.copy_records_to_table(
+                        records=rows, columns=columns, **copy_to
+                    )
+                    copied += len(rows)
+                    # A tuple default to anext() raises SystemError on Python 3.11.
+                    chunk = await anext(chunks, None)
+                    rows = chunk[1] if chunk is not None else []
+
+                if index_elements is None:
+                    for sql in post_sql or []:
+                        await driver_connection.execute(sql)
+                    return copied
+
+                stage = table(stage_name, *[column(x) for x in columns])
+                stmt = insert(cls_to).from_select(columns, select(*stage.c))
+                if update_set:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=index_elements,
+                        set_={x: getattr(stmt.excluded, x) for x in update_set},
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+                status = await driver_connection.execute(
+                    str(stmt.compile(dialect=conn.dialect))
+                )
+                for sql in post_sql or []:
+                    await driver_connection.execute(sql)
+                return int(status.rsplit(" ", 1)[-1])
+
+    @staticmethod
+    async def _iter_chunks(
+        data: Iterable | AsyncIterable, chunk_size: int, columns: list[str] = None
+    ) -> AsyncIterator[tuple[list[str], list[tuple]]]:
+        if not hasattr(data, "__aiter__"):
+            async def _as_async(items):
+                for item in items:
+                    yield item
+
+            data = _as_async(data)
+
+        chunk = []
+        async for row in data:
+            if isinstance(row, dict):
+                if columns is None:
+                    columns = list(row)
+                row = tuple(row.get(x) for x in columns)
+            elif columns is None:
+                raise ValueError("columns should be passed when rows are tuples")
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield columns, chunk
+                chunk = []
+        if chunk:
+            yield columns, chunk
+
     async def custom_update(
         self,
         cls_to: Type[ModelType],
@@ -1 +1,4 @@
 from database.orm.weather_requests_model import WeatherRequests
+from database.orm.geocode_cache_model import GeocodeCache
+from database.orm.weather_rollups_model import WeatherRollups
+from database.orm.cache_entries_model import CacheEntries
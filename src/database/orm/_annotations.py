@@ -5,6 +5,7 @@ from sqlalchemy.dialects.postgresql import (
     ARRAY,
     BIGINT,
     BOOLEAN,
+    BYTEA,
     DATE,
     DOUBLE_PRECISION,
     INTEGER,
@@ -138,6 +139,8 @@ DateColumnNN = Annotated[
 
 JsonbColumn = Annotated[dict, mapped_column(JSONB)]
 
+BytesColumn = Annotated[bytes, mapped_column(BYTEA)]
+
 ListIntegerColumn = Annotated[
     list[int],
     mapped_column(ARRAY(INTEGER)),
@@ -0,0 +1,17 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database.orm._base_class import Base
+from database.orm._annotations import (
+    TextPrimaryKey,
+    BytesColumn,
+    TimestampColumn
+)
+
+class CacheEntries(Base):
+    __tablename__ = "cache_entries"
+    # Shared cache tier (services.shared_cache.PostgresBackend): no WAL, emptied on crash recovery.
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[TextPrimaryKey] = mapped_column(index=False)
+    value: Mapped[BytesColumn] = mapped_column(nullable=False)
+    expires_at: Mapped[TimestampColumn] = mapped_column(nullable=False)
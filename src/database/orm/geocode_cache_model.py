@@ -0,0 +1,17 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import func
+
+from database.orm._base_class import Base
+from database.orm._annotations import (
+    TextPrimaryKey,
+    TimestampWTColumn,
+    DoubleColumn
+)
+
+class GeocodeCache(Base):
+    __tablename__ = "geocode_cache"
+
+    query: Mapped[TextPrimaryKey] = mapped_column(index=False)
+    lat: Mapped[DoubleColumn] = mapped_column(nullable=False)
+    lon: Mapped[DoubleColumn] = mapped_column(nullable=False)
+    created_at: Mapped[TimestampWTColumn] = mapped_column(nullable=False, default=func.now())
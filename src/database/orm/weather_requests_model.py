@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func
 
 from database.orm._base_class import Base
 from database.orm._annotations import (
@@ -12,11 +12,31 @@ from database.orm._annotations import (
 
 class WeatherRequests(Base):
     __tablename__ = "weather_requests"
-    
-    id: Mapped[IntegerPrimaryKey] = mapped_column()
-    created_at: Mapped[TimestampWTColumn] = mapped_column(nullable=False, default=func.now())
+    # Partitions are managed by database.core.partition_core.
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    id: Mapped[IntegerPrimaryKey] = mapped_column(index=False, autoincrement=True)
+    created_at: Mapped[TimestampWTColumn] = mapped_column(primary_key=True, nullable=False, default=func.now())
     lat: Mapped[DoubleColumn] = mapped_column(nullable=False)
     lon: Mapped[DoubleColumn] = mapped_column(nullable=False)
     weather_main: Mapped[TextColumn] = mapped_column(nullable=False)
     temp: Mapped[DoubleColumn] = mapped_column(nullable=False)
     wind_speed: Mapped[DoubleColumn] = mapped_column(nullable=False)
+
+
+# Serves the (created_at DESC, id DESC) keyset pages of /history, scanned backwards.
+Index(
+    "ix_public_weather_requests_created_at_id",
+    WeatherRequests.created_at,
+    WeatherRequests.id,
+)
+Index(
+    "ix_public_weather_requests_created_at_brin",
+    WeatherRequests.created_at,
+    postgresql_using="brin",
+)
+Index(
+    "ix_public_weather_requests_location_gist",
+    func.point(WeatherRequests.lon, WeatherRequests.lat),
+    postgresql_using="gist",
+)
@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database.orm._base_class import Base
+from database.orm._annotations import (
+    BigintColumn,
+    TextColumn,
+    TimestampWTColumn,
+    DoubleColumn,
+    JsonbColumn
+)
+
+class WeatherRollups(Base):
+    __tablename__ = "weather_rollups"
+
+    granularity: Mapped[TextColumn] = mapped_column(primary_key=True, nullable=False)
+    bucket_start: Mapped[TimestampWTColumn] = mapped_column(primary_key=True)
+    cell_lat: Mapped[DoubleColumn] = mapped_column(primary_key=True)
+    cell_lon: Mapped[DoubleColumn] = mapped_column(primary_key=True)
+    count: Mapped[BigintColumn] = mapped_column(nullable=False)
+    temp_min: Mapped[DoubleColumn] = mapped_column(nullable=False)
+    temp_max: Mapped[DoubleColumn] = mapped_column(nullable=False)
+    temp_sum: Mapped[DoubleColumn] = mapped_column(nullable=False)
+    wind_speed_min: Mapped[DoubleColumn] = mapped_column(nullable=False)
+    wind_speed_max: Mapped[DoubleColumn] = mapped_column(nullable=False)
+    wind_speed_sum: Mapped[DoubleColumn] = mapped_column(nullable=False)
+    weather_main_hist: Mapped[JsonbColumn] = mapped_column(nullable=False)
@@ -0,0 +1,119 @@
+import re
+from datetime import datetime, timedelta
+
+PARTITION_INTERVALS = ("day", "month")
+
+NAME_FORMATS = {
+    "day": "%Y_%m_%d",
+    "month": "%Y_%m",
+}
+
+
+def check_interval(interval: str) -> None:
+    if interval not in PARTITION_INTERVALS:
+        raise ValueError(f"Partition interval should be one of {PARTITION_INTERVALS}, got {interval!r}")
+
+
+def period_start(value: datetime, interval: str) -> datetime:
+    check_interval(interval)
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "month":
+        value = value.replace(day=1)
+    return value
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    check_interval(interval)
+    if interval == "day":
+        return start + timedelta(days=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(table: str, start: datetime, interval: str) -> str:
+    return f"{table}_p{start.strftime(NAME_FORMATS[interval])}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+RANGE_BOUND = re.compile(r"FOR VALUES FROM \((.+)\) TO \((.+)\)")
+
+
+def _bound_value(value: str) -> datetime | None:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def parse_partition_bound(expr: str) -> tuple[datetime | None, datetime | None] | None:
+    """Returns (from, to) of a range bound as printed by pg_get_expr, None for DEFAULT.
+
+    MINVALUE and MAXVALUE ends are returned as None.
+    """
+    match = RANGE_BOUND.fullmatch(expr.strip())
+    if match is None:
+        return None
+    return _bound_value(match.group(1)), _bound_value(match.group(2))
+
+
+def bound_interval(start: datetime, end: datetime) -> str | None:
+    """The interval a [start, end) bound spans, None if it is not exactly one period."""
+    for interval in PARTITION_INTERVALS:
+        if period_start(start, interval) == start and next_period(start, interval) == end:
+            return interval
+    return None
+
+
+def overlaps(start: datetime, end: datetime, bound: tuple[datetime | None, datetime | None]) -> bool:
+    lower, upper = bound
+    return (lower is None or lower < end) and (upper is None or start < upper)
+
+
+def periods(start: datetime, end: datetime, interval: str) -> list[datetime]:
+    """Starts of every period that intersects [start, end]."""
+    current = period_start(start, interval)
+    result = []
+    while current <= end:
+        result.append(current)
+        current = next_period(current, interval)
+    return result
+
+
+def create_partition_sql(schema: str, table: str, start: datetime, interval: str) -> str:
+    end = next_period(start, interval)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{schema}"."{partition_name(table, start, interval)}" '
+        f'PARTITION OF "{schema}"."{table}" '
+        f"FOR VALUES FROM ('{start.isoformat(sep=' ')}') TO ('{end.isoformat(sep=' ')}')"
+    )
+
+
+def create_default_partition_sql(schema: str, table: str) -> str:
+    return f'CREATE TABLE IF NOT EXISTS "{schema}"."{default_partition_name(table)}" PARTITION OF "{schema}"."{table}" DEFAULT'
+
+
+def attach_default_partition_sql(schema: str, table: str) -> str:
+    return f'ALTER TABLE "{schema}"."{table}" ATTACH PARTITION "{schema}"."{default_partition_name(table)}" DEFAULT'
+
+
+def detach_partition_sql(schema: str, table: str, name: str) -> str:
+    return f'ALTER TABLE "{schema}"."{table}" DETACH PARTITION "{schema}"."{name}"'
+
+
+def move_rows_sql(schema: str, table: str, source: str, start: datetime, end: datetime) -> str:
+    """Moves rows of [start, end) from a detached partition back into the table, routing them anew."""
+    return (
+        f'WITH moved AS (DELETE FROM "{schema}"."{source}" '
+        f"WHERE created_at >= '{start.isoformat(sep=' ')}' AND created_at < '{end.isoformat(sep=' ')}' RETURNING *) "
+        f'INSERT INTO "{schema}"."{table}" SELECT * FROM moved'
+    )
+
+
+def drop_partition_sql(schema: str, table: str, name: str) -> list[str]:
+    return [
+        detach_partition_sql(schema, table, name),
+        f'DROP TABLE "{schema}"."{name}"',
+    ]
@@ -0,0 +1,125 @@
+import asyncio
+import contextvars
+import functools
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+
+from sqlalchemy import exc as sa_exc
+from loguru import logger
+
+from database.config import DB_RETRY_ATTEMPTS, DB_RETRY_BASE_DELAY, DB_RETRY_MAX_DELAY, DB_RETRY_DEADLINE
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How a database call is retried.
+
+    ``attempts`` is the number of retries after the first try. Delays follow
+    full-jitter exponential backoff between 0 and
+    ``min(max_delay, base_delay * 2**n)``. No retry starts once ``deadline``
+    seconds have passed since the first try.
+    """
+
+    attempts: int = DB_RETRY_ATTEMPTS
+    base_delay: float = DB_RETRY_BASE_DELAY
+    max_delay: float = DB_RETRY_MAX_DELAY
+    deadline: float | None = DB_RETRY_DEADLINE
+
+
+NO_RETRY = RetryPolicy(attempts=0)
+
+# serialization_failure, deadlock_detected, lock_not_available, connection
+# exceptions (class 08), too_many_connections, admin/crash shutdown,
+# cannot_connect_now.
+TRANSIENT_SQLSTATES = {"40001", "40P01", "55P03", "53300", "57P01", "57P02", "57P03"}
+TRANSIENT_SQLSTATE_CLASSES = {"08"}
+
+_counters: Counter = Counter()
+
+_policy_override: contextvars.ContextVar[RetryPolicy | None] = contextvars.ContextVar("db_retry_policy", default=None)
+
+
+@contextmanager
+def retry_policy_scope(policy: RetryPolicy):
+    """Overrides the retry policy of every database call made inside the block."""
+    token = _policy_override.set(policy)
+    try:
+        yield
+    finally:
+        _policy_override.reset(token)
+
+
+def retry_stats() -> dict[str, int]:
+    """Retries made, calls that gave up after retrying and calls failed with a permanent error."""
+    return {name: _counters[name] for name in ("retries", "gave_up", "permanent")}
+
+
+def _sqlstate(error: BaseException) -> str | None:
+    for candidate in (error, getattr(error, "orig", None), error.__cause__):
+        sqlstate = getattr(candidate, "sqlstate", None)
+        if sqlstate:
+            return sqlstate
+    return None
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for errors that a retry may fix: lost connections, pool timeouts, serialization failures, deadlocks."""
+    sqlstate = _sqlstate(error)
+    if sqlstate is not None:
+        return sqlstate in TRANSIENT_SQLSTATES or sqlstate[:2] in TRANSIENT_SQLSTATE_CLASSES
+
+    if isinstance(error, sa_exc.DBAPIError):
+        if error.connection_invalidated:
+            return True
+        return isinstance(error, (sa_exc.OperationalError, sa_exc.InterfaceError))
+
+    return isinstance(error, (sa_exc.TimeoutError, ConnectionError, OSError, asyncio.TimeoutError))
+
+
+def retry_async(policy: RetryPolicy | int | None = None):
+    """Retries transient database errors of the decorated coroutine.
+
+    ``policy`` may be a RetryPolicy or, for backwards compatibility, a number
+    of retries. A call can override it with a ``retry_policy=`` keyword
+    argument or with :func:`retry_policy_scope`. Permanent errors
+    (constraint violations, programming errors, ...) are raised at once.
+    """
+    if policy is None:
+        policy = RetryPolicy()
+    elif isinstance(policy, int):
+        policy = replace(RetryPolicy(), attempts=policy)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, retry_policy: RetryPolicy | None = None, **kwargs):
+            current = retry_policy or _policy_override.get() or policy
+            started = time.monotonic()
+            for try_index in range(current.attempts + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    if not is_transient(e):
+                        _counters["permanent"] += 1
+                        raise
+                    delay = random.uniform(0, min(current.max_delay, current.base_delay * 2 ** try_index))
+                    out_of_time = (
+                        current.deadline is not None
+                        and time.monotonic() - started + delay > current.deadline
+                    )
+                    if try_index == current.attempts or out_of_time:
+                        _counters["gave_up"] += 1
+                        raise
+                    _counters["retries"] += 1
+                    logger.warning(
+                        f"{func.__qualname__} failed with a transient error "
+                        f"{type(e).__name__} (sqlstate {_sqlstate(e)}). "
+                        f"Retrying in {delay:.2f}s ({try_index + 1}/{current.attempts})"
+                    )
+                    await asyncio.sleep(delay)
+
+        return wrapper
+
+    return decorator
@@ -1,23 +1,38 @@
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 import asyncio
-import subprocess
 from contextlib import asynccontextmanager
 
-from apps import weather_router
+from apps import weather_router, history_router, stats_router, metrics_router, forecast_router, cities_router, subscriptions_router
+from services.weather import weather_api, weather_refresher, subscription_hub
+from services.metrics import MetricsMiddleware
+from database.core.post_weather_core import history_writer
+from database.core.partition_core import partition_maintainer
+from database.config import RUN_MIGRATIONS
+from database.migrate import run_migrations
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
-        output = subprocess.check_output(["python", "-m", "alembic", "upgrade", "head"], text=True)
-        print(output)
+        if RUN_MIGRATIONS:
+            await run_migrations()
+        await weather_api.start()
+        await weather_api.warm_nearby()
+        await history_writer.start()
+        await partition_maintainer.start()
+        await weather_refresher.start()
         yield
     finally:
-        pass
+        await subscription_hub.stop()
+        await weather_refresher.stop()
+        await partition_maintainer.stop()
+        await history_writer.stop()
+        await weather_api.close()
 
-app = FastAPI(lifespan=lifespan, docs_url="/docs", redoc_url="/redoc", openapi_url="/openapi.json")
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse, docs_url="/docs", redoc_url="/redoc", openapi_url="/openapi.json")
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,7 +40,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["content-disposition"],
+    expose_headers=["content-disposition", "etag"],
 )
+# Event streams stay open for hours and would swamp the latency histogram.
+app.add_middleware(MetricsMiddleware, skip_paths=("/metrics", "/subscribe/sse"))
 
 app.include_router(weather_router)
+app.include_router(forecast_router)
+app.include_router(cities_router)
+app.include_router(subscriptions_router)
+app.include_router(history_router)
+app.include_router(stats_router)
+app.include_router(metrics_router)
@@ -1,14 +1,17 @@
 import asyncio
 from logging.config import fileConfig
 
-from sqlalchemy import pool
+from sqlalchemy import pool, text
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 
-from database.config import database_url_asyncpg
+from database.config import database_url_asyncpg, database_connect_args
 from database.orm.weather_requests_model import WeatherRequests
+from database.orm.geocode_cache_model import GeocodeCache
+from database.orm.weather_rollups_model import WeatherRollups
+from database.orm.cache_entries_model import CacheEntries
 from database.orm._base_class import Base
 import os
 from dotenv import load_dotenv
@@ -22,7 +25,8 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# When the app runs migrations in-process it owns logging, so alembic.ini must not reconfigure it.
+if config.config_file_name is not None and "connection" not in config.attributes:
     fileConfig(config.config_file_name)
 
 DATABASE_HOST = os.environ.get("DATABASE_HOST") #"localhost"
@@ -69,11 +73,22 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+# Session-level advisory lock: when several workers or replicas start at once, one migrates and the rest wait, then find nothing to do.
+MIGRATION_LOCK_KEY = 7_106_302
+
+
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    # Leaves the connection outside a transaction, as autocommit_block() migrations expect.
+    connection.commit()
+    try:
+        context.configure(connection=connection, target_metadata=target_metadata)
 
-    with context.begin_transaction():
-        context.run_migrations()
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        connection.commit()
 
 
 async def run_async_migrations() -> None:
@@ -86,6 +101,7 @@ async def run_async_migrations() -> None:
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
+        connect_args=database_connect_args(),
     )
 
     async with connectable.connect() as connection:
@@ -97,7 +113,12 @@ async def run_async_migrations() -> None:
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
 
-    asyncio.run(run_async_migrations())
+    connection = config.attributes.get("connection")
+    if connection is None:
+        asyncio.run(run_async_migrations())
+    else:
+        # In-process run from database/migrate.py on a connection of the app engine.
+        do_run_migrations(connection)
 
 
 if context.is_offline_mode():
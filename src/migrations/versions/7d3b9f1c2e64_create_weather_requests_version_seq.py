@@ -0,0 +1,29 @@
+"""create weather_requests_version_seq
+
+Revision ID: 7d3b9f1c2e64
+Revises: 4c2f8e9d7a15
+Create Date: 2026-10-19 10:14:52.803316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3b9f1c2e64'
+down_revision: Union[str, Sequence[str], None] = '4c2f8e9d7a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Data version of past history, bumped by backfills; part of the settled /history ETags.
+    op.execute(sa.schema.CreateSequence(sa.Sequence('weather_requests_version_seq', schema='public')))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('weather_requests_version_seq', schema='public')))
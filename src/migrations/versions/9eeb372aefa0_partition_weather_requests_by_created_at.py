@@ -0,0 +1,128 @@
+"""partition weather_requests by created_at
+
+Revision ID: 9eeb372aefa0
+Revises: b1d65b8ae032
+Create Date: 2026-10-18 19:12:45.530118
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from database.config import app_timezone, PARTITION_INTERVAL, PARTITION_PREMAKE
+from database.partitions import (
+    create_default_partition_sql,
+    create_partition_sql,
+    next_period,
+    period_start,
+    periods,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9eeb372aefa0'
+down_revision: Union[str, Sequence[str], None] = 'b1d65b8ae032'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, created_at, lat, lon, weather_main, temp, wind_speed"
+
+
+def _rename_old_objects(suffix: str) -> None:
+    op.execute(f"ALTER TABLE public.weather_requests RENAME TO weather_requests{suffix}")
+    op.execute(f"ALTER TABLE public.weather_requests{suffix} RENAME CONSTRAINT weather_requests_pkey TO weather_requests{suffix}_pkey")
+    op.execute(f"ALTER INDEX IF EXISTS public.ix_public_weather_requests_created_at_id RENAME TO ix_public_weather_requests{suffix}_created_at_id")
+    op.execute(f"ALTER INDEX IF EXISTS public.ix_public_weather_requests_created_at_brin RENAME TO ix_public_weather_requests{suffix}_created_at_brin")
+    op.execute(f"ALTER INDEX IF EXISTS public.ix_public_weather_requests_location_gist RENAME TO ix_public_weather_requests{suffix}_location_gist")
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_public_weather_requests_created_at_id', 'weather_requests', ['created_at', 'id'], unique=False, schema='public')
+    op.create_index('ix_public_weather_requests_created_at_brin', 'weather_requests', ['created_at'], unique=False, schema='public', postgresql_using='brin')
+    op.create_index('ix_public_weather_requests_location_gist', 'weather_requests', [sa.text('point(lon, lat)')], unique=False, schema='public', postgresql_using='gist')
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The existing table is attached as the partition of everything before
+    the cutover instead of being copied, so no rows move. The steps that
+    scan it (a unique index and a CHECK constraint) run first, outside the
+    transaction and without blocking writes; what remains is catalog
+    changes under a short lock, safe to run at app startup.
+    """
+    now = datetime.now(app_timezone).replace(tzinfo=None)
+    # One full period of margin: rows written while this runs must still fit the old table.
+    cutover = next_period(next_period(period_start(now, PARTITION_INTERVAL), PARTITION_INTERVAL), PARTITION_INTERVAL)
+    bind = op.get_bind()
+
+    with op.get_context().autocommit_block():
+        op.create_index('weather_requests_id_created_at_key', 'weather_requests', ['id', 'created_at'], unique=True, schema='public', postgresql_concurrently=True, if_not_exists=True)
+        exists = bind.execute(sa.text("SELECT 1 FROM pg_constraint WHERE conname = 'weather_requests_legacy_range'")).scalar()
+        if not exists:
+            op.execute(f"ALTER TABLE public.weather_requests ADD CONSTRAINT weather_requests_legacy_range CHECK (created_at < '{cutover.isoformat(sep=' ')}') NOT VALID")
+        # Validation scans the table under a lock that still lets rows in.
+        op.execute("ALTER TABLE public.weather_requests VALIDATE CONSTRAINT weather_requests_legacy_range")
+
+    # The partitioned primary key has to include created_at.
+    op.execute("ALTER TABLE public.weather_requests DROP CONSTRAINT weather_requests_pkey")
+    op.execute("ALTER TABLE public.weather_requests ADD CONSTRAINT weather_requests_pkey PRIMARY KEY USING INDEX weather_requests_id_created_at_key")
+    _rename_old_objects("_legacy")
+
+    op.execute(
+        """
+        CREATE TABLE public.weather_requests (
+            id INTEGER NOT NULL DEFAULT nextval('public.weather_requests_id_seq'),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            lat DOUBLE PRECISION NOT NULL,
+            lon DOUBLE PRECISION NOT NULL,
+            weather_main TEXT NOT NULL,
+            temp DOUBLE PRECISION NOT NULL,
+            wind_speed DOUBLE PRECISION NOT NULL,
+            CONSTRAINT weather_requests_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE public.weather_requests_id_seq OWNED BY public.weather_requests.id")
+    # On the empty parent; attaching reuses the legacy table's matching indexes.
+    _create_indexes()
+
+    # The validated CHECK proves the partition constraint, so attaching does not scan.
+    op.execute(f"ALTER TABLE public.weather_requests ATTACH PARTITION public.weather_requests_legacy FOR VALUES FROM (MINVALUE) TO ('{cutover.isoformat(sep=' ')}')")
+    op.execute("ALTER TABLE public.weather_requests_legacy DROP CONSTRAINT weather_requests_legacy_range")
+
+    ahead = period_start(now, PARTITION_INTERVAL)
+    for _ in range(PARTITION_PREMAKE):
+        ahead = next_period(ahead, PARTITION_INTERVAL)
+    for start in periods(cutover, max(ahead, cutover), PARTITION_INTERVAL):
+        op.execute(create_partition_sql("public", "weather_requests", start, PARTITION_INTERVAL))
+    # Catches rows outside the managed range so inserts never fail; stays empty
+    # as long as partition maintenance keeps partitions ahead of time.
+    op.execute(create_default_partition_sql("public", "weather_requests"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename_old_objects("_partitioned")
+
+    op.execute(
+        """
+        CREATE TABLE public.weather_requests (
+            id INTEGER NOT NULL DEFAULT nextval('public.weather_requests_id_seq'),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            lat DOUBLE PRECISION NOT NULL,
+            lon DOUBLE PRECISION NOT NULL,
+            weather_main TEXT NOT NULL,
+            temp DOUBLE PRECISION NOT NULL,
+            wind_speed DOUBLE PRECISION NOT NULL,
+            CONSTRAINT weather_requests_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE public.weather_requests_id_seq OWNED BY public.weather_requests.id")
+    op.execute(f"INSERT INTO public.weather_requests ({COLUMNS}) SELECT {COLUMNS} FROM public.weather_requests_partitioned")
+    op.execute("DROP TABLE public.weather_requests_partitioned")
+
+    _create_indexes()
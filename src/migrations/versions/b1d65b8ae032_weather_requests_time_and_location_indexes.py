@@ -0,0 +1,40 @@
+"""weather_requests time and location indexes
+
+Revision ID: b1d65b8ae032
+Revises: 560552979321
+Create Date: 2026-10-18 18:41:07.218641
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1d65b8ae032'
+down_revision: Union[str, Sequence[str], None] = '560552979321'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the table writable while the indexes build,
+    # and cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        # BRIN cannot return rows in order; the keyset pages of /history read this btree backwards.
+        op.create_index('ix_public_weather_requests_created_at_id', 'weather_requests', ['created_at', 'id'], unique=False, schema='public', postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_public_weather_requests_created_at_brin', 'weather_requests', ['created_at'], unique=False, schema='public', postgresql_using='brin', postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_public_weather_requests_location_gist', 'weather_requests', [sa.text('point(lon, lat)')], unique=False, schema='public', postgresql_using='gist', postgresql_concurrently=True, if_not_exists=True)
+        # Duplicates the primary key index.
+        op.drop_index(op.f('ix_public_weather_requests_id'), table_name='weather_requests', schema='public', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_public_weather_requests_id'), 'weather_requests', ['id'], unique=False, schema='public', postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_public_weather_requests_location_gist', table_name='weather_requests', schema='public', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_public_weather_requests_created_at_brin', table_name='weather_requests', schema='public', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_public_weather_requests_created_at_id', table_name='weather_requests', schema='public', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,91 @@
+import time
+import unicodedata
+import typing as tp
+from collections import OrderedDict
+
+
+class TTLCache:
+    """In-process LRU cache with a per-entry time to live.
+
+    ``ttl=None`` disables expiry, leaving a plain bounded LRU.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[tp.Hashable, tuple[float, tp.Any]] = OrderedDict()
+
+    def get(self, key: tp.Hashable, default: tp.Any = None) -> tp.Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            # Expired entries stay until evicted so they can still be served stale.
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: tp.Hashable, value: tp.Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = float("inf") if ttl is None else time.monotonic() + ttl
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def peek(self, key: tp.Hashable) -> tuple[tp.Any, float] | None:
+        """Returns (value, seconds until expiry) even for expired entries, without touching LRU order or counters."""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        return value, expires_at - time.monotonic()
+
+    def pop(self, key: tp.Hashable, default: tp.Any = None) -> tp.Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: tp.Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] >= time.monotonic()
+
+
+def round_coords(lat: float, lon: float, grid: float) -> tuple[float, float]:
+    """Snaps coordinates to a ``grid``-degree lattice so nearby points share a cache key."""
+    return (
+        round(round(lat / grid) * grid, 6),
+        round(round(lon / grid) * grid, 6),
+    )
+
+
+def normalize_city(city: str) -> str:
+    """Folds case, Unicode forms and whitespace so spelling variants share a cache key."""
+    return " ".join(unicodedata.normalize("NFKC", city).casefold().split())
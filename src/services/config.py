@@ -0,0 +1,77 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+OPEN_WEATHER_KEY = os.environ.get("OPEN_WEATHER_KEY")
+OPEN_WEATHER_URL = os.environ.get("OPEN_WEATHER_URL", "https://api.openweathermap.org")
+
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 20))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP2 = os.environ.get("HTTP2", "false").lower() in ("1", "true", "yes")
+
+WEATHER_CACHE_TTL = float(os.environ.get("WEATHER_CACHE_TTL", 600))
+WEATHER_CACHE_GRID = float(os.environ.get("WEATHER_CACHE_GRID", 0.01))
+WEATHER_CACHE_MAXSIZE = int(os.environ.get("WEATHER_CACHE_MAXSIZE", 10000))
+WEATHER_STALE_TTL = float(os.environ.get("WEATHER_STALE_TTL", 60))
+GEOCODE_CACHE_MAXSIZE = int(os.environ.get("GEOCODE_CACHE_MAXSIZE", 50000))
+
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 500))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 20))
+GROUP_MAX_IDS = int(os.environ.get("GROUP_MAX_IDS", 20))
+
+HOT_REFRESH_TOP_N = int(os.environ.get("HOT_REFRESH_TOP_N", 300))
+HOT_REFRESH_LEAD = float(os.environ.get("HOT_REFRESH_LEAD", 60))
+HOT_REFRESH_BUDGET = int(os.environ.get("HOT_REFRESH_BUDGET", 120))
+HOT_REFRESH_TICK = float(os.environ.get("HOT_REFRESH_TICK", 10))
+HOT_HALF_LIFE = float(os.environ.get("HOT_HALF_LIFE", 600))
+HOT_REFRESH_MIN_SCORE = float(os.environ.get("HOT_REFRESH_MIN_SCORE", 2))
+
+OPEN_WEATHER_CALLS_PER_MINUTE = float(os.environ.get("OPEN_WEATHER_CALLS_PER_MINUTE", 600))
+OPEN_WEATHER_BURST = float(os.environ.get("OPEN_WEATHER_BURST", 50))
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", 2))
+UPSTREAM_BACKOFF_BASE = float(os.environ.get("UPSTREAM_BACKOFF_BASE", 0.2))
+UPSTREAM_BACKOFF_MAX = float(os.environ.get("UPSTREAM_BACKOFF_MAX", 2))
+BREAKER_FAILURE_RATIO = float(os.environ.get("BREAKER_FAILURE_RATIO", 0.5))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", 20))
+BREAKER_WINDOW = float(os.environ.get("BREAKER_WINDOW", 30))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", 15))
+REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE", 5))
+UPSTREAM_MIN_CALL_TIME = float(os.environ.get("UPSTREAM_MIN_CALL_TIME", 0.2))
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "none")
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", "weatherapi:")
+CACHE_COMPRESS_MIN_BYTES = int(os.environ.get("CACHE_COMPRESS_MIN_BYTES", 0))
+CACHE_GEOCODE_TTL = float(os.environ.get("CACHE_GEOCODE_TTL", 7 * 86400))
+CACHE_FILL_LOCK_TTL = float(os.environ.get("CACHE_FILL_LOCK_TTL", 5))
+CACHE_FILL_WAIT = float(os.environ.get("CACHE_FILL_WAIT", 2))
+CACHE_PURGE_INTERVAL = float(os.environ.get("CACHE_PURGE_INTERVAL", 300))
+
+FORECAST_TTL = float(os.environ.get("FORECAST_TTL", 3600))
+FORECAST_CACHE_GRID = float(os.environ.get("FORECAST_CACHE_GRID", 0.05))
+FORECAST_CACHE_MAXSIZE = int(os.environ.get("FORECAST_CACHE_MAXSIZE", 10000))
+FORECAST_MAX_HOURS = int(os.environ.get("FORECAST_MAX_HOURS", 120))
+
+NEAREST_MAX_DISTANCE_KM = float(os.environ.get("NEAREST_MAX_DISTANCE_KM", 10))
+NEAREST_CELL_DEG = float(os.environ.get("NEAREST_CELL_DEG", 0.05))
+NEAREST_MAX_AGE = float(os.environ.get("NEAREST_MAX_AGE", WEATHER_CACHE_TTL))
+NEAREST_INDEX_MAXSIZE = int(os.environ.get("NEAREST_INDEX_MAXSIZE", 50000))
+NEAREST_WARM_ROWS = int(os.environ.get("NEAREST_WARM_ROWS", 5000))
+
+# Directory built by `python -m services.gazetteer`; empty disables local city lookup.
+GAZETTEER_PATH = os.environ.get("GAZETTEER_PATH", "")
+
+# History rows reach the table within this many seconds of their created_at (HISTORY_FLUSH_INTERVAL plus slack);
+# pages of older rows no longer change and are cached for HISTORY_SETTLED_MAX_AGE.
+HISTORY_SETTLE_SECONDS = float(os.environ.get("HISTORY_SETTLE_SECONDS", 60))
+HISTORY_CACHE_MAX_AGE = float(os.environ.get("HISTORY_CACHE_MAX_AGE", 5))
+HISTORY_SETTLED_MAX_AGE = float(os.environ.get("HISTORY_SETTLED_MAX_AGE", 3600))
+
+SUBSCRIPTION_POLL_INTERVAL = float(os.environ.get("SUBSCRIPTION_POLL_INTERVAL", 60))
+SUBSCRIPTION_HEARTBEAT = float(os.environ.get("SUBSCRIPTION_HEARTBEAT", 15))
+SUBSCRIPTION_SEND_TIMEOUT = float(os.environ.get("SUBSCRIPTION_SEND_TIMEOUT", 10))
+SUBSCRIPTION_MAX_LOCATIONS = int(os.environ.get("SUBSCRIPTION_MAX_LOCATIONS", 50))
+SUBSCRIPTION_MAX_CONNECTIONS = int(os.environ.get("SUBSCRIPTION_MAX_CONNECTIONS", 1000))
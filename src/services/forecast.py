@@ -0,0 +1,109 @@
+import typing as tp
+
+import numpy as np
+
+# One 3-hour step of the OpenWeather 5 day forecast: 18 bytes, 40 steps per location.
+FORECAST_DTYPE = np.dtype([("time", "<i8"), ("temp", "<f4"), ("wind_speed", "<f4"), ("code", "<i2")])
+
+# OpenWeather condition id -> group name ("Rain", "Clouds", ...), learned from responses.
+CONDITION_MAIN: dict[int, str] = {}
+
+
+def parse_forecast(resp: dict[str, tp.Any]) -> np.ndarray:
+    """Packs a ``/data/2.5/forecast`` response into a time-sorted FORECAST_DTYPE array."""
+    items = resp["list"]
+    series = np.empty(len(items), dtype=FORECAST_DTYPE)
+    for i, item in enumerate(items):
+        weather = item["weather"][0]
+        CONDITION_MAIN.setdefault(weather["id"], weather["main"])
+        series[i] = (item["dt"], item["main"]["temp"], item["wind"]["speed"], weather["id"])
+    series.sort(order="time")
+    return series
+
+
+def series_to_json(series: np.ndarray) -> dict[str, list]:
+    codes = series["code"].tolist()
+    return {
+        "time": series["time"].tolist(),
+        "temp": series["temp"].tolist(),
+        "wind_speed": series["wind_speed"].tolist(),
+        "code": codes,
+        "main": {str(code): CONDITION_MAIN.get(code, "") for code in set(codes)},
+    }
+
+
+def series_from_json(data: dict[str, list]) -> np.ndarray:
+    for code, main in data["main"].items():
+        CONDITION_MAIN.setdefault(int(code), main)
+    series = np.empty(len(data["time"]), dtype=FORECAST_DTYPE)
+    for field in ("time", "temp", "wind_speed", "code"):
+        series[field] = data[field]
+    return series
+
+
+def _stack(series_list: list[np.ndarray]) -> np.ndarray:
+    """Stacks series into one (locations, steps) array; short rows repeat their last step one second apart."""
+    steps = max(2, max(len(series) for series in series_list))
+    if all(len(series) == steps for series in series_list):
+        # Much faster than np.stack, which re-promotes the structured dtype per row.
+        return np.frombuffer(b"".join(series.tobytes() for series in series_list), dtype=FORECAST_DTYPE).reshape(len(series_list), steps)
+    grid = np.empty((len(series_list), steps), dtype=FORECAST_DTYPE)
+    for row, series in enumerate(series_list):
+        grid[row, :len(series)] = series
+        if len(series) < steps:
+            grid[row, len(series):] = series[-1]
+            grid["time"][row, len(series):] = series["time"][-1] + np.arange(1, steps - len(series) + 1)
+    return grid
+
+
+def sample_many(series_list: list[np.ndarray], times: np.ndarray) -> dict[str, np.ndarray]:
+    """Samples every series at the same unix ``times`` in one vectorized pass.
+
+    Returns arrays of shape (len(series_list), len(times)): ``temp`` and
+    ``wind_speed`` interpolated linearly between steps, ``code`` of the step
+    in effect (the latest at or before the time) and ``valid``, False past
+    the end of a series. Times before the first step take its values.
+    """
+    grid = _stack(series_list)
+    rows, steps = grid.shape
+    ends = np.array([series["time"][-1] for series in series_list])
+
+    # Rows are shifted into disjoint, increasing bands of one flat array, so a
+    # single searchsorted locates every (row, time) pair at once.
+    base = min(int(grid["time"].min()), int(times.min()))
+    span = max(int(grid["time"].max()), int(times.max())) - base + 1
+    offsets = np.arange(rows, dtype=np.int64)[:, None] * span
+    flat_time = (grid["time"] - base + offsets).ravel()
+    query = times[None, :] - base + offsets
+
+    row_start = np.arange(rows)[:, None] * steps
+    left = np.searchsorted(flat_time, query.ravel(), side="right").reshape(query.shape) - 1
+    left = np.clip(left, row_start, row_start + steps - 2)
+    right = left + 1
+
+    t0, t1 = flat_time[left], flat_time[right]
+    weight = np.clip((query - t0) / (t1 - t0), 0.0, 1.0)
+
+    flat = grid.ravel()
+    sample = {}
+    for field in ("temp", "wind_speed"):
+        values = flat[field].astype(np.float64)
+        sample[field] = values[left] * (1 - weight) + values[right] * weight
+    sample["code"] = np.where(query >= t1, flat["code"][right], flat["code"][left])
+    sample["valid"] = times[None, :] <= ends[:, None]
+    return sample
+
+
+def forecast_points(sample: dict[str, np.ndarray], row: int, times: list[str]) -> list[dict[str, tp.Any]]:
+    """JSON-ready points of one sampled row, dropping those past the forecast horizon."""
+    return [
+        {"time": time, "temperature": round(temp, 2), "wind_speed": round(wind_speed, 2), "weather_main": CONDITION_MAIN.get(code, "")}
+        for time, temp, wind_speed, code, valid in zip(
+            times,
+            sample["temp"][row].tolist(),
+            sample["wind_speed"][row].tolist(),
+            sample["code"][row].tolist(),
+            sample["valid"][row].tolist(),
+        )
+        if valid
+    ]
@@ -0,0 +1,232 @@
+"""Offline city gazetteer built from a GeoNames ``cities*.txt`` dump.
+
+Build the index once, then point GAZETTEER_PATH at the output directory::
+
+    python -m services.gazetteer cities15000.zip /data/gazetteer
+
+The index is a handful of ``.npy`` files that are memory-mapped, so the
+pages are shared between workers and loaded by the OS on demand.
+"""
+import argparse
+import io
+import os
+import unicodedata
+import zipfile
+import typing as tp
+
+import numpy as np
+
+from services.cache import normalize_city
+
+KEY_BYTES = 48
+# Prefix ranges longer than this are answered from the precomputed top table.
+SCAN_LIMIT = 256
+TOP_PREFIX_CHARS = 3
+SUGGEST_MAX_LIMIT = 20
+NO_PLACE = np.iinfo(np.uint32).max
+
+PLACE_DTYPE = np.dtype([
+    ("lat", "<f4"),
+    ("lon", "<f4"),
+    ("population", "<i8"),
+    ("country", "S2"),
+    ("name_start", "<u4"),
+    ("name_len", "<u2"),
+])
+
+# Columns of the GeoNames "geoname" table.
+NAME, ASCIINAME, ALTERNATENAMES, LATITUDE, LONGITUDE, FEATURE_CLASS, COUNTRY, POPULATION = 1, 2, 3, 4, 5, 6, 8, 14
+
+
+def normalize_key(name: str) -> str:
+    """normalize_city with diacritics dropped, so "Zürich", "zurich" and "ZÜRICH" match."""
+    decomposed = unicodedata.normalize("NFKD", normalize_city(name))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def encode_key(name: str, max_bytes: int = KEY_BYTES) -> bytes:
+    # UTF-8 bytes sort in code point order, so byte prefixes are string prefixes.
+    return normalize_key(name).encode()[:max_bytes]
+
+
+def _read_lines(source: str) -> tp.Iterator[str]:
+    if source.endswith(".zip"):
+        with zipfile.ZipFile(source) as archive:
+            member = next(name for name in archive.namelist() if name.endswith(".txt"))
+            with archive.open(member) as raw:
+                yield from io.TextIOWrapper(raw, encoding="utf-8")
+    else:
+        with open(source, encoding="utf-8") as file:
+            yield from file
+
+
+def _rank(places: np.ndarray, population: np.ndarray, limit: int) -> np.ndarray:
+    """Distinct ``places`` ordered by population, at most ``limit``."""
+    if len(places) > SCAN_LIMIT:
+        places = np.unique(places)
+        if len(places) > limit:
+            places = places[np.argpartition(-population[places], limit - 1)[:limit]]
+    ranked = places[np.argsort(-population[places], kind="stable")].tolist()
+    return np.array(list(dict.fromkeys(ranked))[:limit], dtype=np.uint32)
+
+
+def build_gazetteer(source: str, out_dir: str, min_population: int = 0, alternate_names: bool = True) -> int:
+    """Writes the index of populated places (feature class P) from ``source`` into ``out_dir``, returning their count."""
+    rows = []
+    names = bytearray()
+    keys: dict[tuple[bytes, int], None] = {}
+    for line in _read_lines(source):
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) <= POPULATION or fields[FEATURE_CLASS] != "P":
+            continue
+        population = int(fields[POPULATION] or 0)
+        if population < min_population:
+            continue
+
+        place = len(rows)
+        name = fields[NAME].encode()
+        rows.append((float(fields[LATITUDE]), float(fields[LONGITUDE]), population,
+                     fields[COUNTRY].encode()[:2], len(names), len(name)))
+        names += name
+
+        variants = [fields[NAME], fields[ASCIINAME]]
+        if alternate_names and fields[ALTERNATENAMES]:
+            variants += fields[ALTERNATENAMES].split(",")
+        for variant in variants:
+            key = encode_key(variant)
+            if key:
+                keys[(key, place)] = None
+
+    places = np.array(rows, dtype=PLACE_DTYPE)
+    entries = sorted(keys)
+    key_array = np.array([key for key, _ in entries], dtype=f"S{KEY_BYTES}")
+    key_places = np.array([place for _, place in entries], dtype=np.uint32)
+
+    # Short prefixes match too many keys to rank per request, so their top places are stored.
+    prefixes = sorted({
+        key.decode(errors="ignore")[:length].encode()
+        for key in set(key_array.tolist())
+        for length in range(1, TOP_PREFIX_CHARS + 1)
+    } - {b""})
+    top_keys = []
+    top_places = []
+    for prefix in prefixes:
+        lo = np.searchsorted(key_array, prefix, side="left")
+        hi = np.searchsorted(key_array, prefix + b"\xff", side="left")
+        if hi - lo <= SCAN_LIMIT:
+            continue
+        ranked = _rank(key_places[lo:hi], places["population"], SUGGEST_MAX_LIMIT)
+        top_keys.append(prefix)
+        top_places.append(np.pad(ranked, (0, SUGGEST_MAX_LIMIT - len(ranked)), constant_values=NO_PLACE))
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "places.npy"), places)
+    np.save(os.path.join(out_dir, "names.npy"), np.frombuffer(bytes(names), dtype=np.uint8))
+    np.save(os.path.join(out_dir, "keys.npy"), key_array)
+    np.save(os.path.join(out_dir, "key_places.npy"), key_places)
+    np.save(os.path.join(out_dir, "top_keys.npy"), np.array(top_keys, dtype=f"S{TOP_PREFIX_CHARS * 4}"))
+    np.save(os.path.join(out_dir, "top_places.npy"), np.array(top_places, dtype=np.uint32).reshape(-1, SUGGEST_MAX_LIMIT))
+    return len(places)
+
+
+class Gazetteer:
+    """Memory-mapped city index: sorted normalized names pointing to places ranked by population."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.places = self._load("places.npy")
+        # Population is copied for ranking; the other columns stay memory-mapped.
+        self.population = np.ascontiguousarray(self.places["population"])
+        self.names = memoryview(self._load("names.npy"))
+        self.keys = self._load("keys.npy")
+        self.key_places = self._load("key_places.npy")
+        self.top_keys = self._load("top_keys.npy")
+        self.top_places = self._load("top_places.npy")
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, name: str) -> np.ndarray:
+        # A plain ndarray view of the mapping: np.memmap slices are much slower to create.
+        return np.asarray(np.load(os.path.join(self.path, name), mmap_mode="r"))
+
+    def _range(self, key: bytes, prefix: bool) -> tuple[int, int]:
+        lo = int(np.searchsorted(self.keys, key, side="left"))
+        hi = int(np.searchsorted(self.keys, key + b"\xff" if prefix else key, side="left" if prefix else "right"))
+        return lo, hi
+
+    def describe(self, indices: np.ndarray) -> list[dict[str, tp.Any]]:
+        rows = self.places[np.asarray(indices, dtype=np.intp)]
+        return [
+            {
+                "name": bytes(self.names[start:start + length]).decode(),
+                "country": country.decode(),
+                "lat": round(lat, 5),
+                "lon": round(lon, 5),
+                "population": population,
+            }
+            for start, length, country, lat, lon, population in zip(
+                rows["name_start"].tolist(),
+                rows["name_len"].tolist(),
+                rows["country"].tolist(),
+                rows["lat"].tolist(),
+                rows["lon"].tolist(),
+                rows["population"].tolist(),
+            )
+        ]
+
+    def suggest(self, query: str, limit: int = 10) -> list[dict[str, tp.Any]]:
+        """Most populous places with a name starting with ``query``."""
+        # One byte is left for the b"\xff" upper bound; numpy would cut a longer key to the column width.
+        key = encode_key(query, KEY_BYTES - 1)
+        limit = min(limit, SUGGEST_MAX_LIMIT)
+        if not key:
+            return []
+        lo, hi = self._range(key, prefix=True)
+        if lo == hi:
+            return []
+        if hi - lo > SCAN_LIMIT and len(key) <= self.top_keys.dtype.itemsize:
+            at = int(np.searchsorted(self.top_keys, key))
+            if at < len(self.top_keys) and self.top_keys[at] == key:
+                ranked = self.top_places[at][:limit]
+                return self.describe(ranked[ranked != NO_PLACE])
+        return self.describe(_rank(self.key_places[lo:hi], self.population, limit))
+
+    def resolve(self, city: str) -> tuple[float, float] | None:
+        """Coordinates of the most populous place named exactly ``city``.
+
+        A trailing ", CC" is read as an ISO country code, as in "Moscow, RU".
+        """
+        name, _, country = city.rpartition(",")
+        country = country.strip().upper()
+        if not name or len(country) != 2:
+            name, country = city, ""
+
+        lo, hi = self._range(encode_key(name), prefix=False)
+        places = np.unique(self.key_places[lo:hi])
+        if country:
+            places = places[self.places["country"][places] == country.encode()]
+        if len(places) == 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        row = self.places[places[np.argmax(self.population[places])]]
+        return float(row["lat"]), float(row["lon"])
+
+    def stats(self) -> dict[str, int]:
+        return {"places": len(self.places), "keys": len(self.keys), "hits": self.hits, "misses": self.misses}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Builds the offline city index from a GeoNames cities dump.")
+    parser.add_argument("source", help="GeoNames cities500/1000/5000/15000 .txt or .zip")
+    parser.add_argument("out_dir", help="directory for the index, used as GAZETTEER_PATH")
+    parser.add_argument("--min-population", type=int, default=0)
+    parser.add_argument("--no-alternate-names", action="store_true", help="index only the name and its ASCII form")
+    args = parser.parse_args()
+
+    count = build_gazetteer(args.source, args.out_dir, args.min_population, alternate_names=not args.no_alternate_names)
+    print(f"Indexed {count} places into {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
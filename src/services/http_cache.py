@@ -0,0 +1,33 @@
+import hashlib
+
+from fastapi import Response
+
+
+def strong_etag(*parts: bytes | str) -> str:
+    """Quoted ETag hashed from ``parts``: equal parts give the same tag in every process."""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Evaluates If-None-Match, which compares tags weakly (RFC 9110, 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def cache_control(max_age: float, stale_while_revalidate: float = 0) -> str:
+    value = f"public, max-age={max(int(max_age), 0)}"
+    if stale_while_revalidate > 0:
+        value += f", stale-while-revalidate={int(stale_while_revalidate)}"
+    return value
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,86 @@
+import time
+import typing as tp
+
+from prometheus_client import Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "weather_http_request_seconds",
+    "End-to-end HTTP request latency.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("weather_http_requests_in_flight", "HTTP requests being served.")
+UPSTREAM_SECONDS = Histogram(
+    "weather_upstream_request_seconds",
+    "Latency of single OpenWeather calls, retries counted separately.",
+    ["endpoint", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+UPSTREAM_ENDPOINTS = {
+    "/data/2.5/weather": "weather",
+    "/data/2.5/group": "group",
+    "/data/2.5/forecast": "forecast",
+    "/geo/1.0/direct": "geocode",
+}
+
+
+class StatsCollector(Collector):
+    """Exposes a ``stats()``-style dict as metrics, read at scrape time.
+
+    Keys listed in ``counters`` are exported as counters, the rest as gauges.
+    """
+
+    def __init__(self, prefix: str, source: tp.Callable[[], dict[str, int | float]], counters: tp.Iterable[str] = ()) -> None:
+        self.prefix = prefix
+        self.source = source
+        self.counters = set(counters)
+
+    def collect(self) -> tp.Iterator:
+        for key, value in self.source().items():
+            name = f"{self.prefix}_{key}"
+            if key in self.counters:
+                yield CounterMetricFamily(name, f"{self.prefix} {key}.", value=value)
+            else:
+                yield GaugeMetricFamily(name, f"{self.prefix} {key}.", value=value)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that records latency and in-flight count of HTTP requests.
+
+    Requests are labelled by route template (``/history``, not the raw path)
+    so the label set stays bounded; unmatched paths share ``unmatched``.
+    Streaming responses are timed until the last body chunk is sent.
+    """
+
+    def __init__(self, app, skip_paths: tp.Iterable[str] = ("/metrics",)) -> None:
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - started)
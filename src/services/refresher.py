@@ -0,0 +1,156 @@
+import asyncio
+import time
+import typing as tp
+
+from loguru import logger
+
+
+class HotLocations:
+    """Exponentially decayed request counter per location.
+
+    Scores halve every ``half_life`` seconds, so the ranking follows current
+    traffic rather than all-time totals. At most ``max_tracked`` keys are kept;
+    the coldest are forgotten first.
+    """
+
+    def __init__(self, half_life: float = 300.0, max_tracked: int = 10000) -> None:
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self._scores: dict[tp.Hashable, float] = {}
+        self._epoch = time.monotonic()
+
+    def record(self, key: tp.Hashable, weight: float = 1.0) -> None:
+        # Instead of decaying every score, new hits are weighted up over time.
+        boost = 2 ** ((time.monotonic() - self._epoch) / self.half_life)
+        self._scores[key] = self._scores.get(key, 0.0) + weight * boost
+        if len(self._scores) > self.max_tracked * 2:
+            self._prune()
+
+    def top(self, n: int, min_score: float = 0.0) -> list[tp.Hashable]:
+        """The ``n`` hottest keys whose decayed score is at least ``min_score``."""
+        hottest = sorted(self._scores, key=self._scores.__getitem__, reverse=True)[:n]
+        if min_score <= 0:
+            return hottest
+        threshold = min_score * 2 ** ((time.monotonic() - self._epoch) / self.half_life)
+        return [key for key in hottest if self._scores[key] >= threshold]
+
+    def rebase(self) -> None:
+        """Rescales scores so the growing boost never overflows."""
+        now = time.monotonic()
+        factor = 2 ** (-(now - self._epoch) / self.half_life)
+        self._epoch = now
+        self._scores = {key: score * factor for key, score in self._scores.items() if score * factor > 1e-3}
+
+    def _prune(self) -> None:
+        keep = self.top(self.max_tracked)
+        self._scores = {key: self._scores[key] for key in keep}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class CallBudget:
+    """Fixed one-minute window of allowed upstream calls."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.per_minute = per_minute
+        self._window = 0
+        self._used = 0
+
+    def try_acquire(self) -> bool:
+        window = int(time.monotonic() // 60)
+        if window != self._window:
+            self._window = window
+            self._used = 0
+        if self._used >= self.per_minute:
+            return False
+        self._used += 1
+        return True
+
+
+class HotLocationRefresher:
+    """Keeps the most requested locations in the weather cache warm.
+
+    Every ``tick`` seconds the ``top_n`` hottest cache keys whose entry is
+    missing or expires within ``lead`` seconds are refreshed, spending at
+    most ``budget_per_minute`` upstream calls per minute. Keys scoring below
+    ``min_score`` are left to expire, so cold locations cost no calls.
+    """
+
+    def __init__(
+        self,
+        weather_api,
+        top_n: int,
+        lead: float,
+        budget_per_minute: int,
+        tick: float,
+        min_score: float = 0.0,
+    ) -> None:
+        self.weather_api = weather_api
+        self.top_n = top_n
+        self.lead = lead
+        self.min_score = min_score
+        self.budget = CallBudget(budget_per_minute)
+        self.tick = tick
+        self._task: asyncio.Task | None = None
+
+        self.refreshed = 0
+        self.failed = 0
+        self.skipped_budget = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.error(f"Hot location refresh failed: {e}")
+
+    async def refresh_once(self) -> None:
+        hot = self.weather_api.hot_locations
+        hot.rebase()
+
+        due = []
+        for key in hot.top(self.top_n, self.min_score):
+            entry = self.weather_api.weather_cache.peek(key)
+            if entry is None or entry[1] < self.lead:
+                due.append(key)
+        # Soonest expiring first, so a tight budget goes where it matters.
+        due.sort(key=lambda key: (self.weather_api.weather_cache.peek(key) or (None, float("-inf")))[1])
+
+        tasks = []
+        for key in due:
+            if not self.budget.try_acquire():
+                self.skipped_budget += len(due) - len(tasks)
+                break
+            # Another process may already have refreshed it in the shared cache.
+            tasks.append(self.weather_api.refresh_weather(key, min_ttl=self.lead))
+
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.failed += 1
+                logger.warning(f"Hot location refresh failed: {result}")
+            else:
+                self.refreshed += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "tracked": len(self.weather_api.hot_locations),
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "skipped_budget": self.skipped_budget,
+        }
@@ -0,0 +1,150 @@
+import asyncio
+import random
+import time
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+
+class UpstreamUnavailableError(Exception):
+    """OpenWeather cannot be called right now (circuit open or rate limit exhausted)."""
+
+
+class UpstreamTimeoutError(UpstreamUnavailableError):
+    """The request deadline expired before OpenWeather answered."""
+
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float | None):
+    """Sets a deadline for every upstream call made inside the block.
+
+    Tasks created inside the block (e.g. coalesced fetches) inherit it,
+    because asyncio copies the context on task creation. A nested scope can
+    only shorten the deadline.
+    """
+    deadline = None if seconds is None else time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> float | None:
+    """The absolute ``time.monotonic()`` deadline of the current context, if any."""
+    return _deadline.get()
+
+
+def remaining_time() -> float | None:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursts up to ``capacity``.
+
+    A caller reserves its token up front, driving the balance below zero if
+    it has to wait, and then sleeps until the token is due. Waiters are
+    therefore served in arrival order, and none of them holds up the others
+    while it sleeps.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.rejected = 0
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, deadline: float | None = None) -> bool:
+        """Takes one token, unless it only becomes due after ``deadline`` (a ``time.monotonic()`` value)."""
+        self._refill()
+        wait = max(1 - self.tokens, 0) / self.rate
+        if deadline is not None and time.monotonic() + wait > deadline:
+            self.rejected += 1
+            return False
+        # Reserved before sleeping, so later callers queue behind this one.
+        self.tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """Opens when the failure ratio over the last ``window`` seconds crosses ``failure_ratio``.
+
+    At least ``min_calls`` outcomes are needed before it can open. While open,
+    calls fail fast for ``open_seconds``; then a single probe call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_ratio: float, min_calls: int, window: float, open_seconds: float) -> None:
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.opened = 0
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probe_started: float | None = None
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self._opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self._probe_started = None
+        # A probe that never reported back (cancelled, rate limited) is replaced after open_seconds.
+        if self.state == self.HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.open_seconds):
+            self._probe_started = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self._outcomes.clear()
+        self._record(True)
+
+    def record_failure(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self._record(False)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+            self._open()
+
+    def _record(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
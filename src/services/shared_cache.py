@@ -0,0 +1,376 @@
+import asyncio
+import time
+import typing as tp
+import zlib
+
+import orjson
+from loguru import logger
+
+from services.cache import TTLCache
+
+
+class Codec:
+    """orjson payloads, zlib-compressed when longer than ``compress_min_bytes``.
+
+    ``compress_min_bytes=0`` disables compression. A one-byte header tells
+    the formats apart, so the setting can change while old entries live.
+    """
+
+    RAW = b"j"
+    ZLIB = b"z"
+
+    def __init__(self, compress_min_bytes: int = 0, level: int = 6) -> None:
+        self.compress_min_bytes = compress_min_bytes
+        self.level = level
+
+    def dumps(self, value: tp.Any) -> bytes:
+        data = orjson.dumps(value)
+        if self.compress_min_bytes and len(data) >= self.compress_min_bytes:
+            return self.ZLIB + zlib.compress(data, self.level)
+        return self.RAW + data
+
+    def loads(self, payload: bytes) -> tp.Any:
+        header, data = payload[:1], payload[1:]
+        if header == self.ZLIB:
+            data = zlib.decompress(data)
+        return orjson.loads(data)
+
+
+class CacheBackend:
+    """Shared (L2) cache storage for opaque payloads."""
+
+    name = "base"
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, payload: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def add(self, key: str, payload: bytes, ttl: float) -> bool:
+        """Stores the payload only if the key is absent, returning whether it was stored."""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process backend, shared only by caches of one process; for tests and local runs."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 100000) -> None:
+        self._data = TTLCache(maxsize=maxsize)
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        found = {}
+        for key in keys:
+            payload = self._data.get(key)
+            if payload is not None:
+                found[key] = payload
+        return found
+
+    async def set(self, key: str, payload: bytes, ttl: float) -> None:
+        self._data.set(key, payload, ttl=ttl)
+
+    async def add(self, key: str, payload: bytes, ttl: float) -> bool:
+        if key in self._data:
+            return False
+        self._data.set(key, payload, ttl=ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key)
+
+
+class RedisBackend(CacheBackend):
+    """Redis-protocol backend (Redis, Valkey, KeyDB, ...).
+
+    Needs the ``redis`` package. ``fakeredis://`` URLs start an embedded
+    fake server from the ``fakeredis`` package, for local runs and tests.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client=None) -> None:
+        self.url = url
+        self.client = client
+
+    async def start(self) -> None:
+        if self.client is not None:
+            return
+        if self.url.startswith("fakeredis://"):
+            import fakeredis
+
+            self.client = fakeredis.FakeAsyncRedis()
+        else:
+            import redis.asyncio
+
+            self.client = redis.asyncio.from_url(self.url)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        values = await self.client.mget(keys)
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set(self, key: str, payload: bytes, ttl: float) -> None:
+        await self.client.set(key, payload, px=max(int(ttl * 1000), 1))
+
+    async def add(self, key: str, payload: bytes, ttl: float) -> bool:
+        return bool(await self.client.set(key, payload, px=max(int(ttl * 1000), 1), nx=True))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+
+class PostgresBackend(CacheBackend):
+    """Backend on the UNLOGGED ``cache_entries`` table; expired rows are purged every ``purge_interval`` seconds."""
+
+    name = "postgres"
+
+    def __init__(self, purge_interval: float = 300) -> None:
+        self.purge_interval = purge_interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        from database.core.cache_core import purge_cache_implementation
+
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                await purge_cache_implementation()
+            except Exception as e:
+                logger.error(f"Cache purge failed: {e}")
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        from database.core.cache_core import get_cache_entries_implementation
+
+        return await get_cache_entries_implementation(keys)
+
+    async def set(self, key: str, payload: bytes, ttl: float) -> None:
+        from database.core.cache_core import set_cache_entry_implementation
+
+        await set_cache_entry_implementation(key, payload, ttl)
+
+    async def add(self, key: str, payload: bytes, ttl: float) -> bool:
+        from database.core.cache_core import add_cache_entry_implementation
+
+        return await add_cache_entry_implementation(key, payload, ttl)
+
+    async def delete(self, key: str) -> None:
+        from database.core.cache_core import delete_cache_entry_implementation
+
+        await delete_cache_entry_implementation(key)
+
+
+CACHE_BACKENDS = ("none", "memory", "redis", "postgres")
+
+
+def make_backend(name: str, redis_url: str, purge_interval: float) -> CacheBackend | None:
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        return RedisBackend(redis_url)
+    if name == "postgres":
+        return PostgresBackend(purge_interval)
+    raise ValueError(f"CACHE_BACKEND should be one of {CACHE_BACKENDS}, got {name!r}")
+
+
+class LayeredCache:
+    """Process-local TTLCache (L1) in front of an optional shared backend (L2).
+
+    L2 entries carry their wall-clock expiry, so every process gives a value
+    the same remaining lifetime. They are kept ``stale_ttl`` seconds past it
+    and land in L1 already expired, which keeps stale-while-revalidate
+    working across processes. ``fill`` takes a short lock in L2 so that one
+    process in the fleet calls upstream per key; the others wait for its
+    result. L2 errors are logged and treated as misses. Without L2 this is
+    just the L1 cache.
+    """
+
+    FILL_POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        name: str,
+        l1: TTLCache,
+        l2: CacheBackend | None = None,
+        codec: Codec | None = None,
+        key_prefix: str = "",
+        stale_ttl: float = 0,
+        default_l2_ttl: float = 86400,
+        fill_lock_ttl: float = 5,
+        fill_wait: float = 2,
+        dump: tp.Callable[[tp.Any], tp.Any] = lambda value: value,
+        load: tp.Callable[[tp.Any], tp.Any] = lambda value: value,
+    ) -> None:
+        self.name = name
+        self.l1 = l1
+        self.l2 = l2
+        self.codec = codec or Codec()
+        self.key_prefix = f"{key_prefix}{name}:"
+        self.stale_ttl = stale_ttl
+        self.default_l2_ttl = default_l2_ttl
+        self.fill_lock_ttl = fill_lock_ttl
+        self.fill_wait = fill_wait
+        self.dump = dump
+        self.load = load
+
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+        self.fill_waits = 0
+
+    def _l2_key(self, key: tp.Hashable) -> str:
+        if isinstance(key, tuple):
+            return self.key_prefix + ":".join(map(str, key))
+        return self.key_prefix + str(key)
+
+    def peek(self, key: tp.Hashable) -> tuple[tp.Any, float] | None:
+        return self.l1.peek(key)
+
+    async def get(self, key: tp.Hashable, min_ttl: float = 0) -> tp.Any:
+        value = self.l1.get(key)
+        if value is not None or self.l2 is None:
+            return value
+        return (await self._load([key], min_ttl)).get(key)
+
+    async def get_many(self, keys: tp.Iterable[tp.Hashable]) -> dict[tp.Hashable, tp.Any]:
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.l1.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        if missing and self.l2 is not None:
+            found.update(await self._load(missing))
+        return found
+
+    async def _load(self, keys: list[tp.Hashable], min_ttl: float = 0) -> dict[tp.Hashable, tp.Any]:
+        """Reads keys from L2 into L1, returning those with more than ``min_ttl`` seconds to live."""
+        l2_keys = {self._l2_key(key): key for key in keys}
+        try:
+            payloads = await self.l2.get_many(list(l2_keys))
+        except Exception as e:
+            self.l2_errors += 1
+            logger.warning(f"{self.name} cache backend read failed: {e}")
+            return {}
+
+        found = {}
+        for l2_key, payload in payloads.items():
+            key = l2_keys[l2_key]
+            try:
+                envelope = self.codec.loads(payload)
+                value = self.load(envelope["v"])
+            except Exception as e:
+                self.l2_errors += 1
+                logger.warning(f"{self.name} cache entry {l2_key} is unreadable: {e}")
+                continue
+            remaining = None if envelope["e"] is None else envelope["e"] - time.time()
+            # An expired entry still goes to L1, where it can be served stale.
+            self.l1.set(key, value, ttl=remaining)
+            if remaining is None or remaining > min_ttl:
+                found[key] = value
+        self.l2_hits += len(found)
+        self.l2_misses += len(keys) - len(found)
+        return found
+
+    async def set(self, key: tp.Hashable, value: tp.Any, ttl: float | None = None) -> None:
+        ttl = self.l1.ttl if ttl is None else ttl
+        self.l1.set(key, value, ttl=ttl)
+        if self.l2 is None:
+            return
+        try:
+            payload = self.codec.dumps({"v": self.dump(value), "e": None if ttl is None else time.time() + ttl})
+            l2_ttl = self.default_l2_ttl if ttl is None else ttl + self.stale_ttl
+            await self.l2.set(self._l2_key(key), payload, l2_ttl)
+        except Exception as e:
+            self.l2_errors += 1
+            logger.warning(f"{self.name} cache backend write failed: {e}")
+
+    async def fill(self, key: tp.Hashable, fetch: tp.Callable[[], tp.Awaitable[tp.Any]], min_ttl: float = 0) -> tp.Any:
+        """Returns a value with more than ``min_ttl`` seconds to live, calling ``fetch`` only if no process has one."""
+        if self.l2 is None:
+            value = await fetch()
+            await self.set(key, value)
+            return value
+
+        found = await self._load([key], min_ttl)
+        if key in found:
+            return found[key]
+
+        lock_key = self._l2_key(key) + ":lock"
+        try:
+            locked = await self.l2.add(lock_key, b"1", self.fill_lock_ttl)
+        except Exception as e:
+            self.l2_errors += 1
+            logger.warning(f"{self.name} cache fill lock failed: {e}")
+            locked = False
+        else:
+            if not locked:
+                # Another process is fetching this key; give it fill_wait seconds to publish.
+                self.fill_waits += 1
+                deadline = time.monotonic() + self.fill_wait
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(self.FILL_POLL_INTERVAL)
+                    found = await self._load([key], min_ttl)
+                    if key in found:
+                        return found[key]
+
+        try:
+            value = await fetch()
+            await self.set(key, value)
+            return value
+        finally:
+            if locked:
+                try:
+                    await self.l2.delete(lock_key)
+                except Exception as e:
+                    logger.warning(f"{self.name} cache fill unlock failed: {e}")
+
+    def clear(self) -> None:
+        self.l1.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            **self.l1.stats(),
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            "l2_errors": self.l2_errors,
+            "fill_waits": self.fill_waits,
+        }
+
+    def __len__(self) -> int:
+        return len(self.l1)
+
+    def __contains__(self, key: tp.Hashable) -> bool:
+        return key in self.l1
@@ -0,0 +1,50 @@
+import asyncio
+import typing as tp
+
+from services.resilience import UpstreamTimeoutError, remaining_time
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight task.
+
+    The upstream call runs as its own task, so a cancelled waiter never cancels
+    the work other waiters depend on; its result or exception is delivered to
+    every caller that joined while it was running. Each caller waits no longer
+    than its own deadline, whoever started the task.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[tp.Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: tp.Hashable, func: tp.Callable[[], tp.Awaitable[tp.Any]]) -> tp.Any:
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self.shared += 1
+
+        remaining = remaining_time()
+        if remaining is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(remaining, 0))
+        except asyncio.TimeoutError:
+            if task.done():
+                # The timeout came from the shared call itself.
+                return task.result()
+            raise UpstreamTimeoutError(f"Deadline exceeded waiting for shared call {key!r}") from None
+
+    def _forget(self, key: tp.Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved when every waiter was cancelled.
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
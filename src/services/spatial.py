@@ -0,0 +1,109 @@
+import math
+import time
+import typing as tp
+from collections import OrderedDict
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class SpatialIndex:
+    """Grid index of recent observations for nearest-neighbour lookups.
+
+    Points are bucketed into ``cell_deg``-degree cells, and a query scans
+    only the cells overlapping the bounding box of its radius, so its cost
+    depends on local density rather than on the index size. Points older
+    than ``max_age`` seconds are skipped and dropped as they are met; above
+    ``maxsize`` points the least recently added are evicted. Adding a point
+    under an existing key moves it.
+    """
+
+    def __init__(self, cell_deg: float = 0.1, max_age: float = 600, maxsize: int = 10000) -> None:
+        self.cell_deg = cell_deg
+        self.max_age = max_age
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cells: dict[tuple[int, int], dict[tp.Hashable, tuple[float, float, float, tp.Any]]] = {}
+        self._order: OrderedDict[tp.Hashable, tuple[int, int]] = OrderedDict()
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def add(self, key: tp.Hashable, lat: float, lon: float, value: tp.Any, observed_at: float | None = None) -> None:
+        """Indexes ``value`` at (lat, lon); ``observed_at`` is a unix time, now by default."""
+        observed_at = time.time() if observed_at is None else observed_at
+        if time.time() - observed_at > self.max_age:
+            return
+        self.discard(key)
+        cell = self._cell(lat, lon)
+        self._cells.setdefault(cell, {})[key] = (lat, lon, observed_at, value)
+        self._order[key] = cell
+        while len(self._order) > self.maxsize:
+            self.discard(next(iter(self._order)))
+            self.evictions += 1
+
+    def discard(self, key: tp.Hashable) -> None:
+        cell = self._order.pop(key, None)
+        if cell is None:
+            return
+        points = self._cells[cell]
+        del points[key]
+        if not points:
+            del self._cells[cell]
+
+    def nearest(self, lat: float, lon: float, max_km: float) -> tuple[tp.Any, float, float] | None:
+        """Returns (value, distance in km, observed_at) of the closest fresh point within ``max_km``, or None."""
+        dlat = max_km / KM_PER_DEGREE
+        dlon = min(max_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)), 180.0)
+        min_row, min_col = self._cell(max(lat - dlat, -90.0), max(lon - dlon, -180.0))
+        max_row, max_col = self._cell(min(lat + dlat, 90.0), min(lon + dlon, 180.0))
+
+        oldest = time.time() - self.max_age
+        best = None
+        best_km = max_km
+        best_observed_at = 0.0
+        expired = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for key, (point_lat, point_lon, observed_at, value) in self._cells.get((row, col), {}).items():
+                    if observed_at < oldest:
+                        expired.append(key)
+                        continue
+                    km = haversine_km(lat, lon, point_lat, point_lon)
+                    if km <= best_km:
+                        best, best_km, best_observed_at = value, km, observed_at
+        for key in expired:
+            self.discard(key)
+
+        if best is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return best, best_km, best_observed_at
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._order.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._order),
+            "cells": len(self._cells),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._order)
@@ -0,0 +1,159 @@
+import asyncio
+import typing as tp
+
+import orjson
+from loguru import logger
+
+from services.cache import round_coords
+
+
+class Subscription:
+    """One client's locations and the latest undelivered update of each.
+
+    An update replaces the pending one of the same location, so a slow
+    client skips intermediate values instead of growing a queue: memory per
+    connection is bounded by its number of locations.
+    """
+
+    def __init__(self, locations: dict[tuple[float, float], list[dict[str, tp.Any]]]) -> None:
+        # Cache key -> the client's locations that map to it.
+        self.locations = locations
+        self.closed = False
+        self.coalesced = 0
+        self._pending: dict[tuple[float, float], dict[str, tp.Any]] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, key: tuple[float, float], observation: dict[str, tp.Any]) -> None:
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = observation
+        self._ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def next(self, timeout: float) -> list[dict[str, tp.Any]] | None:
+        """Waits up to ``timeout`` seconds for updates; [] on timeout, None once closed."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        if self.closed:
+            return None
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return [
+            {"location": location, "weather": orjson.Fragment(observation["response_body"])}
+            for key, observation in pending.items()
+            for location in self.locations.get(key, [])
+        ]
+
+
+class SubscriptionHub:
+    """Polls each subscribed location once per ``interval`` and fans changes out to subscribers.
+
+    A location has one poller however many clients follow it; the poller
+    stops with its last subscriber. Polls go through the weather cache, so
+    an observation younger than ``interval`` costs no upstream call, and
+    subscribers are notified only when the observation's ETag changes.
+    """
+
+    def __init__(self, weather_api, interval: float, ttl: float, grid: float, max_connections: int) -> None:
+        self.weather_api = weather_api
+        self.interval = interval
+        self.ttl = ttl
+        self.grid = grid
+        self.max_connections = max_connections
+        self._subscribers: dict[tuple[float, float], set[Subscription]] = {}
+        self._pollers: dict[tuple[float, float], asyncio.Task] = {}
+        self._last: dict[tuple[float, float], dict[str, tp.Any]] = {}
+        self._connections: set[Subscription] = set()
+
+        self.polls = 0
+        self.poll_failures = 0
+        self.changes = 0
+        self.slow_disconnects = 0
+        self._coalesced_closed = 0
+
+    async def resolve(self, locations: list[dict[str, tp.Any]]) -> dict[tuple[float, float], list[dict[str, tp.Any]]]:
+        """Groups client locations by weather cache key; cities are geocoded here."""
+        coords = await asyncio.gather(*(
+            self.weather_api.resolve_location(lat=location.get("lat"), lon=location.get("lon"), city=location.get("city"))
+            for location in locations
+        ))
+        grouped: dict[tuple[float, float], list[dict[str, tp.Any]]] = {}
+        for location, (lat, lon) in zip(locations, coords):
+            grouped.setdefault(round_coords(lat, lon, self.grid), []).append(location)
+        return grouped
+
+    def is_full(self) -> bool:
+        return len(self._connections) >= self.max_connections
+
+    def attach(self, subscription: Subscription) -> None:
+        self._connections.add(subscription)
+        for key in subscription.locations:
+            self._subscribers.setdefault(key, set()).add(subscription)
+            if key in self._last:
+                subscription.push(key, self._last[key])
+            if key not in self._pollers:
+                self._pollers[key] = asyncio.create_task(self._poll(key))
+
+    def detach(self, subscription: Subscription) -> None:
+        if subscription in self._connections:
+            self._connections.discard(subscription)
+            self._coalesced_closed += subscription.coalesced
+        for key in subscription.locations:
+            subscribers = self._subscribers.get(key)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[key]
+                self._last.pop(key, None)
+                poller = self._pollers.pop(key, None)
+                if poller is not None:
+                    poller.cancel()
+
+    async def stop(self) -> None:
+        pollers = list(self._pollers.values())
+        for subscription in list(self._connections):
+            subscription.close()
+            self.detach(subscription)
+        await asyncio.gather(*pollers, return_exceptions=True)
+
+    async def _fetch(self, key: tuple[float, float]) -> dict[str, tp.Any]:
+        # An entry with at least ttl - interval left was fetched less than interval ago.
+        min_ttl = max(self.ttl - self.interval, 0)
+        entry = self.weather_api.weather_cache.peek(key)
+        if entry is not None and entry[1] >= min_ttl:
+            return entry[0]
+        return await self.weather_api.refresh_weather(key, min_ttl=min_ttl)
+
+    async def _poll(self, key: tuple[float, float]) -> None:
+        while True:
+            try:
+                observation = await self._fetch(key)
+            except Exception as e:
+                self.poll_failures += 1
+                logger.warning(f"Subscription poll of {key} failed: {e}")
+            else:
+                self.polls += 1
+                last = self._last.get(key)
+                if last is None or last["etag"] != observation["etag"]:
+                    self._last[key] = observation
+                    self.changes += 1
+                    for subscription in self._subscribers.get(key, ()):
+                        subscription.push(key, observation)
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "connections": len(self._connections),
+            "locations": len(self._pollers),
+            "polls": self.polls,
+            "poll_failures": self.poll_failures,
+            "changes": self.changes,
+            "coalesced": self._coalesced_closed + sum(subscription.coalesced for subscription in self._connections),
+            "slow_disconnects": self.slow_disconnects,
+        }
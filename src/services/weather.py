@@ -1,47 +1,571 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
 import httpx
+import numpy as np
 import typing as tp
-import os
+
+from services.config import (
+    OPEN_WEATHER_KEY,
+    OPEN_WEATHER_URL,
+    HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2,
+    WEATHER_CACHE_TTL,
+    WEATHER_CACHE_GRID,
+    WEATHER_CACHE_MAXSIZE,
+    WEATHER_STALE_TTL,
+    GEOCODE_CACHE_MAXSIZE,
+    BATCH_CONCURRENCY,
+    GROUP_MAX_IDS,
+    HOT_REFRESH_TOP_N,
+    HOT_REFRESH_LEAD,
+    HOT_REFRESH_BUDGET,
+    HOT_REFRESH_TICK,
+    HOT_HALF_LIFE,
+    HOT_REFRESH_MIN_SCORE,
+    OPEN_WEATHER_CALLS_PER_MINUTE,
+    OPEN_WEATHER_BURST,
+    UPSTREAM_RETRIES,
+    UPSTREAM_BACKOFF_BASE,
+    UPSTREAM_BACKOFF_MAX,
+    UPSTREAM_MIN_CALL_TIME,
+    BREAKER_FAILURE_RATIO,
+    BREAKER_MIN_CALLS,
+    BREAKER_WINDOW,
+    BREAKER_OPEN_SECONDS,
+    CACHE_BACKEND,
+    CACHE_REDIS_URL,
+    CACHE_KEY_PREFIX,
+    CACHE_COMPRESS_MIN_BYTES,
+    CACHE_GEOCODE_TTL,
+    CACHE_FILL_LOCK_TTL,
+    CACHE_FILL_WAIT,
+    CACHE_PURGE_INTERVAL,
+    FORECAST_TTL,
+    FORECAST_CACHE_GRID,
+    FORECAST_CACHE_MAXSIZE,
+    NEAREST_CELL_DEG,
+    NEAREST_MAX_AGE,
+    NEAREST_INDEX_MAXSIZE,
+    NEAREST_WARM_ROWS,
+    GAZETTEER_PATH,
+    SUBSCRIPTION_POLL_INTERVAL,
+    SUBSCRIPTION_MAX_CONNECTIONS,
+)
+from templates.schemas.weather_responses import encode_weather
+from services.cache import TTLCache, round_coords, normalize_city
+from services.shared_cache import Codec, LayeredCache, make_backend
+from services.forecast import parse_forecast, series_to_json, series_from_json
+from services.spatial import SpatialIndex
+from services.gazetteer import Gazetteer
+from services.http_cache import strong_etag
+from services.singleflight import SingleFlight
+from services.metrics import UPSTREAM_SECONDS, UPSTREAM_ENDPOINTS
+from services.refresher import HotLocations, HotLocationRefresher
+from services.subscriptions import SubscriptionHub
+from services.resilience import (
+    CircuitBreaker,
+    TokenBucket,
+    UpstreamTimeoutError,
+    UpstreamUnavailableError,
+    backoff_delay,
+    current_deadline,
+    remaining_time,
+)
+from database.config import app_timezone
+from database.retry import retry_policy_scope, NO_RETRY
+from database.core.geocode_core import get_geocode_implementation, post_geocode_implementation
+from database.core.history_core import get_recent_history_implementation
+from loguru import logger
+
 
 class WeatherAPI:
-    API_KEY = os.environ.get("OPEN_WEATHER_KEY")
+    API_KEY = OPEN_WEATHER_KEY
+
+    def __init__(self, client: httpx.AsyncClient | None = None, cache_backend=None, gazetteer: Gazetteer | None = None) -> None:
+        self.client = client
+        self.gazetteer = gazetteer
+        self.cache_backend = cache_backend or make_backend(CACHE_BACKEND, CACHE_REDIS_URL, CACHE_PURGE_INTERVAL)
+        codec = Codec(compress_min_bytes=CACHE_COMPRESS_MIN_BYTES)
+        shared = dict(
+            l2=self.cache_backend,
+            codec=codec,
+            key_prefix=CACHE_KEY_PREFIX,
+            fill_lock_ttl=CACHE_FILL_LOCK_TTL,
+            fill_wait=CACHE_FILL_WAIT,
+        )
+        self.weather_cache = LayeredCache(
+            "weather",
+            TTLCache(maxsize=WEATHER_CACHE_MAXSIZE, ttl=WEATHER_CACHE_TTL),
+            stale_ttl=WEATHER_STALE_TTL,
+            dump=self._observation_fields,
+            load=self._with_response_body,
+            **shared,
+        )
+        self.geocode_cache = LayeredCache(
+            "geocode",
+            TTLCache(maxsize=GEOCODE_CACHE_MAXSIZE),
+            default_l2_ttl=CACHE_GEOCODE_TTL,
+            load=tuple,
+            **shared,
+        )
+        self.forecast_cache = LayeredCache(
+            "forecast",
+            TTLCache(maxsize=FORECAST_CACHE_MAXSIZE, ttl=FORECAST_TTL),
+            dump=series_to_json,
+            load=series_from_json,
+            **shared,
+        )
+        self.nearby = SpatialIndex(cell_deg=NEAREST_CELL_DEG, max_age=NEAREST_MAX_AGE, maxsize=NEAREST_INDEX_MAXSIZE)
+        self.station_ids = TTLCache(maxsize=WEATHER_CACHE_MAXSIZE)
+        self.inflight = SingleFlight()
+        self.hot_locations = HotLocations(half_life=HOT_HALF_LIFE, max_tracked=WEATHER_CACHE_MAXSIZE)
+        self._background: set[asyncio.Task] = set()
+        self.rate_limiter = TokenBucket(rate=OPEN_WEATHER_CALLS_PER_MINUTE / 60, capacity=OPEN_WEATHER_BURST)
+        self.breaker = CircuitBreaker(
+            failure_ratio=BREAKER_FAILURE_RATIO,
+            min_calls=BREAKER_MIN_CALLS,
+            window=BREAKER_WINDOW,
+            open_seconds=BREAKER_OPEN_SECONDS,
+        )
+        self.upstream_calls = 0
+        self.upstream_retries = 0
+
+    async def start(self) -> None:
+        """Opens the shared OpenWeather connection pool, the cache backend and the gazetteer, called from the lifespan hook."""
+        if self.gazetteer is None and GAZETTEER_PATH:
+            try:
+                self.gazetteer = Gazetteer(GAZETTEER_PATH)
+                logger.info(f"Gazetteer loaded: {self.gazetteer.stats()}")
+            except Exception as e:
+                logger.error(f"Gazetteer {GAZETTEER_PATH} could not be loaded, cities are geocoded upstream: {e}")
+        if self.cache_backend is not None:
+            await self.cache_backend.start()
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=OPEN_WEATHER_URL,
+                timeout=HTTP_TIMEOUT,
+                http2=HTTP2,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self.cache_backend is not None:
+            await self.cache_backend.close()
 
     async def get_weather_by_loc(self,
                                  *,
                                  lat: float | None = None,
                                  lon: float | None = None,
-                                 city: str | None = None) -> dict[str, tp.Any]:
+                                 city: str | None = None,
+                                 max_distance_km: float | None = None) -> dict[str, tp.Any]:
+        """Current weather at a location.
+
+        With ``max_distance_km``, a fresh observation indexed within that
+        distance is served first, so jittery coordinates of one place share
+        a single upstream call.
+        """
+        lat, lon = await self.resolve_location(lat=lat, lon=lon, city=city)
+
+        if max_distance_km is not None:
+            found = self.nearby.nearest(lat, lon, max_distance_km)
+            if found is not None:
+                observation, _, observed_at = found
+                return {"lat": lat, "lon": lon, **observation, "expires_in": observed_at + NEAREST_MAX_AGE - time.time()}
+
+        cache_key = round_coords(lat, lon, WEATHER_CACHE_GRID)
+        self.hot_locations.record(cache_key)
+        observation = await self.weather_cache.get(cache_key)
+        if observation is None:
+            observation = self._get_stale(cache_key)
+        if observation is None:
+            try:
+                observation = await self.refresh_weather(cache_key)
+            except UpstreamUnavailableError:
+                # Upstream is failing fast: any old observation beats an error.
+                entry = self.weather_cache.peek(cache_key)
+                if entry is None:
+                    raise
+                observation = entry[0]
+
+        entry = self.weather_cache.peek(cache_key)
+        expires_in = entry[1] if entry is not None and entry[0] is observation else 0.0
+        return {"lat": lat, "lon": lon, **observation, "expires_in": expires_in}
+
+    async def get_forecast(self,
+                           *,
+                           lat: float | None = None,
+                           lon: float | None = None,
+                           city: str | None = None) -> tuple[float, float, np.ndarray]:
+        """Returns (lat, lon, forecast series); the series is fetched once per grid cell per FORECAST_TTL."""
+        lat, lon = await self.resolve_location(lat=lat, lon=lon, city=city)
+        return lat, lon, await self._get_forecast_series(round_coords(lat, lon, FORECAST_CACHE_GRID))
+
+    async def get_forecast_many(self,
+                                locations: list[dict[str, tp.Any]],
+                                concurrency: int = BATCH_CONCURRENCY) -> list[tuple[float, float, np.ndarray] | Exception]:
+        """get_forecast for many locations, returning a result or an exception per item; duplicates are resolved once."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def resolve(key: tuple) -> tuple[float, float, np.ndarray]:
+            async with semaphore:
+                if key[0] == "city":
+                    return await self.get_forecast(city=key[1])
+                return await self.get_forecast(lat=key[1], lon=key[2])
+
+        keys = [self._location_key(**location) for location in locations]
+        unique_keys = list(dict.fromkeys(keys))
+        resolved = await asyncio.gather(*(resolve(key) for key in unique_keys), return_exceptions=True)
+        results = dict(zip(unique_keys, resolved))
+        return [results[key] for key in keys]
+
+    async def _get_forecast_series(self, cache_key: tuple[float, float]) -> np.ndarray:
+        series = await self.forecast_cache.get(cache_key)
+        if series is not None:
+            return series
+        try:
+            return await self.inflight.do(
+                ("forecast", cache_key),
+                lambda: self.forecast_cache.fill(cache_key, lambda: self._fetch_forecast(*cache_key)),
+            )
+        except UpstreamUnavailableError:
+            # An old forecast still covers most of its horizon.
+            entry = self.forecast_cache.peek(cache_key)
+            if entry is None:
+                raise
+            return entry[0]
+
+    async def resolve_location(self,
+                               *,
+                               lat: float | None = None,
+                               lon: float | None = None,
+                               city: str | None = None) -> tuple[float, float]:
+        """Coordinates of a location given as (lat, lon) or city; coordinates win when both are set."""
         if lat is None and lon is None and city is None:
             raise ValueError(f"You should pass (lat, lon) or city")
 
+        if lat is None or lon is None:
+            if city is None:
+                raise ValueError("You should pass both lat and lon")
+            lat, lon = await self._get_coords_by_city(city)
+        return lat, lon
+
+    async def refresh_weather(self, cache_key: tuple[float, float], min_ttl: float = 0) -> dict[str, tp.Any]:
+        """Fetches the observation for a cache key from upstream and stores it.
+
+        With a shared cache backend, an observation another process stored
+        with more than ``min_ttl`` seconds left is used instead.
+        """
+        return await self.inflight.do(("weather", cache_key), lambda: self._refresh_weather(cache_key, min_ttl))
+
+    def _get_stale(self, cache_key: tuple[float, float]) -> dict[str, tp.Any] | None:
+        """Serves an entry expired less than WEATHER_STALE_TTL ago and revalidates it in the background."""
+        entry = self.weather_cache.peek(cache_key)
+        if entry is None or entry[1] < -WEATHER_STALE_TTL:
+            return None
+
+        task = asyncio.ensure_future(self.refresh_weather(cache_key))
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+        return entry[0]
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background weather refresh failed: {task.exception()}")
+
+    async def get_weather_many(self,
+                               locations: list[dict[str, tp.Any]],
+                               concurrency: int = BATCH_CONCURRENCY) -> list[dict[str, tp.Any] | Exception]:
+        """Resolves many locations at once, returning a result or an exception per item.
+
+        Identical locations are fetched once. Cache misses whose grid cell was
+        already mapped to an OpenWeather city id are refreshed through the
+        ``group`` endpoint, up to ``GROUP_MAX_IDS`` ids per call; the rest are
+        fetched one by one. At most ``concurrency`` upstream calls run at a time.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(func: tp.Callable[[], tp.Awaitable[tp.Any]]) -> tp.Any:
+            async with semaphore:
+                return await func()
+
+        keys = [self._location_key(**location) for location in locations]
+        unique_keys = list(dict.fromkeys(keys))
+
+        async def resolve(key: tuple) -> tuple[float, float]:
+            if key[0] == "city":
+                return await bounded(lambda: self._get_coords_by_city(key[1]))
+            return key[1], key[2]
+
+        resolved = await asyncio.gather(*(resolve(key) for key in unique_keys), return_exceptions=True)
+        coords = dict(zip(unique_keys, resolved))
+
+        cells = {key: round_coords(*value, WEATHER_CACHE_GRID)
+                 for key, value in coords.items() if not isinstance(value, Exception)}
+        unique_cells = list(dict.fromkeys(cells.values()))
+        for cell in unique_cells:
+            self.hot_locations.record(cell)
+        observations: dict[tuple[float, float], dict[str, tp.Any] | Exception] = await self.weather_cache.get_many(unique_cells)
+        for cell in unique_cells:
+            if cell not in observations:
+                observation = self._get_stale(cell)
+                if observation is not None:
+                    observations[cell] = observation
+
+        missing = [cell for cell in unique_cells if cell not in observations]
+        by_id: dict[int, list[tuple[float, float]]] = {}
+        for cell in missing:
+            station_id = self.station_ids.get(cell)
+            if station_id:
+                by_id.setdefault(station_id, []).append(cell)
+
+        ids = list(by_id)
+        groups = [ids[i:i + GROUP_MAX_IDS] for i in range(0, len(ids), GROUP_MAX_IDS)]
+        fetched = await asyncio.gather(*(bounded(lambda chunk=chunk: self._fetch_group(chunk)) for chunk in groups),
+                                       return_exceptions=True)
+        for result in fetched:
+            if isinstance(result, Exception):
+                logger.warning(f"Group weather fetch failed, falling back to single calls: {result}")
+                continue
+            for station_id, observation in result.items():
+                for cell in by_id.get(station_id, []):
+                    await self.weather_cache.set(cell, observation)
+                    self.nearby.add(cell, *cell, observation)
+                    observations[cell] = observation
+
+        missing = [cell for cell in missing if cell not in observations]
+        fetched = await asyncio.gather(
+            *(bounded(lambda cell=cell: self.refresh_weather(cell)) for cell in missing),
+            return_exceptions=True,
+        )
+        for cell, observation in zip(missing, fetched):
+            if isinstance(observation, UpstreamUnavailableError):
+                # As on /weather: any old observation beats an error.
+                entry = self.weather_cache.peek(cell)
+                if entry is not None:
+                    observation = entry[0]
+            observations[cell] = observation
+
+        results = []
+        for key in keys:
+            value = coords[key]
+            if isinstance(value, Exception):
+                results.append(value)
+                continue
+            observation = observations[cells[key]]
+            if isinstance(observation, Exception):
+                results.append(observation)
+                continue
+            results.append({"lat": value[0], "lon": value[1], **observation})
+        return results
+
+    @staticmethod
+    def _location_key(*,
+                      lat: float | None = None,
+                      lon: float | None = None,
+                      city: str | None = None) -> tuple:
         if lat is not None and lon is not None:
-            async with httpx.AsyncClient(timeout=20) as client:
-                resp = await client.get("https://api.openweathermap.org/data/2.5/weather", params={"lat": lat, "lon": lon, "appid": self.API_KEY, "units": "metric"})
-        elif city is not None:
-            async with httpx.AsyncClient(timeout=20) as client:
-                lat, lon = await self._get_coords_by_city(city)
-                resp = await client.get("https://api.openweathermap.org/data/2.5/weather", params={"lat": lat, "lon": lon, "appid": self.API_KEY, "units": "metric"})
-        else:
-            raise ValueError("You should pass both lat and lon")
-        
-        resp.raise_for_status()
-        resp = resp.json()
-
-        weather = {
-            "lat": lat,
-            "lon": lon,
+            return "coords", lat, lon
+        if city is not None:
+            return "city", normalize_city(city)
+        raise ValueError("You should pass (lat, lon) or city")
+
+    async def _refresh_weather(self, cache_key: tuple[float, float], min_ttl: float = 0) -> dict[str, tp.Any]:
+        observation = await self.weather_cache.fill(cache_key, lambda: self._fetch_weather(*cache_key), min_ttl=min_ttl)
+        # The value may come from another process, so its age is taken from the remaining TTL.
+        entry = self.weather_cache.peek(cache_key)
+        remaining = entry[1] if entry is not None else WEATHER_CACHE_TTL
+        self.nearby.add(cache_key, *cache_key, observation, observed_at=time.time() - (WEATHER_CACHE_TTL - remaining))
+        return observation
+
+    async def warm_nearby(self, limit: int = NEAREST_WARM_ROWS) -> int:
+        """Loads recent history rows into the nearest-neighbour index, returning how many were indexed."""
+        if limit <= 0:
+            return 0
+        date_from = datetime.now(app_timezone) - timedelta(seconds=NEAREST_MAX_AGE)
+        try:
+            with retry_policy_scope(NO_RETRY):
+                rows = await get_recent_history_implementation(date_from, limit)
+        except Exception as e:
+            logger.warning(f"Nearest-neighbour index warm-up failed: {e}")
+            return 0
+
+        # Oldest first, so the newest row of a grid cell wins.
+        for row in reversed(rows):
+            observation = self._with_response_body({key: row[key] for key in ("weather_main", "temp", "wind_speed")})
+            observed_at = datetime.fromisoformat(row["created_at"]).replace(tzinfo=app_timezone).timestamp()
+            self.nearby.add(round_coords(row["lat"], row["lon"], WEATHER_CACHE_GRID), row["lat"], row["lon"], observation, observed_at=observed_at)
+        logger.info(f"Nearest-neighbour index warmed with {len(rows)} history rows")
+        return len(rows)
+
+    async def _fetch_weather(self, lat: float, lon: float) -> dict[str, tp.Any]:
+        resp = await self._get("/data/2.5/weather", params={"lat": lat, "lon": lon, "appid": self.API_KEY, "units": "metric"})
+
+        if resp.get("id"):
+            self.station_ids.set((lat, lon), resp["id"])
+        return self._parse_observation(resp)
+
+    async def _fetch_forecast(self, lat: float, lon: float) -> np.ndarray:
+        resp = await self._get("/data/2.5/forecast", params={"lat": lat, "lon": lon, "appid": self.API_KEY, "units": "metric"})
+
+        series = parse_forecast(resp)
+        if len(series) == 0:
+            # Never cached: sampling needs at least one step, and an older forecast is a better answer.
+            raise UpstreamUnavailableError(f"OpenWeather returned an empty forecast for {lat}, {lon}")
+        return series
+
+    async def _fetch_group(self, station_ids: list[int]) -> dict[int, dict[str, tp.Any]]:
+        resp = await self._get("/data/2.5/group", params={"id": ",".join(map(str, station_ids)), "appid": self.API_KEY, "units": "metric"})
+
+        return {item["id"]: self._parse_observation(item) for item in resp["list"]}
+
+    @staticmethod
+    def _parse_observation(resp: dict[str, tp.Any]) -> dict[str, tp.Any]:
+        return WeatherAPI._with_response_body({
             "weather_main": " ".join([x["main"] for x in resp["weather"]]),
             "temp": resp["main"]["temp"],
             "wind_speed": resp["wind"]["speed"]
-        }
+        })
 
-        return weather
-        
-                
+    @staticmethod
+    def _with_response_body(observation: dict[str, tp.Any]) -> dict[str, tp.Any]:
+        # Encoded once per fetch (or shared cache read); cache hits answer with these bytes as is.
+        observation["response_body"] = encode_weather(observation["temp"], observation["wind_speed"], observation["weather_main"])
+        observation["etag"] = strong_etag(observation["response_body"])
+        return observation
+
+    @staticmethod
+    def _observation_fields(observation: dict[str, tp.Any]) -> dict[str, tp.Any]:
+        return {key: observation[key] for key in ("weather_main", "temp", "wind_speed")}
 
     async def _get_coords_by_city(self, city: str) -> tuple[float, float]:
-        async with httpx.AsyncClient(timeout=20) as client:
-            resp = await client.get("http://api.openweathermap.org/geo/1.0/direct", params={"q": city, "appid": self.API_KEY, "limit": 1})
-            resp.raise_for_status()
-            resp = resp.json()[0]
+        query = normalize_city(city)
+        if self.gazetteer is not None:
+            coords = self.gazetteer.resolve(query)
+            if coords is not None:
+                return coords
+
+        coords = await self.geocode_cache.get(query)
+        if coords is not None:
+            return coords
+
+        return await self.inflight.do(("geocode", query), lambda: self.geocode_cache.fill(query, lambda: self._resolve_coords(query)))
+
+    async def _resolve_coords(self, query: str) -> tuple[float, float]:
+        coords = None
+        try:
+            coords = await get_geocode_implementation(query)
+        except Exception as e:
+            logger.warning(f"Geocode cache lookup failed: {e}")
+
+        if coords is None:
+            coords = await self._fetch_coords(query)
+            try:
+                await post_geocode_implementation(query, *coords)
+            except Exception as e:
+                logger.warning(f"Geocode cache write failed: {e}")
+
+        return coords
+
+    async def _fetch_coords(self, city: str) -> tuple[float, float]:
+        resp = (await self._get("/geo/1.0/direct", params={"q": city, "appid": self.API_KEY, "limit": 1}))[0]
+
+        return resp['lat'], resp['lon']
+
+    async def _get(self, path: str, params: dict[str, tp.Any]) -> tp.Any:
+        """GET an OpenWeather endpoint through the rate limiter and circuit breaker.
+
+        429, 5xx and transport errors are retried with jittered exponential
+        backoff (honouring Retry-After) while the request deadline allows,
+        then raised as UpstreamUnavailableError; other 4xx answers are
+        returned to the caller as errors right away.
+        """
+        client = self._get_client()
+        endpoint = UPSTREAM_ENDPOINTS.get(path, path)
+        attempt = 0
+        while True:
+            deadline = current_deadline()
+            if deadline is not None and deadline - time.monotonic() < UPSTREAM_MIN_CALL_TIME:
+                raise UpstreamTimeoutError(f"Deadline exceeded before calling {path}")
+            if not self.breaker.allow():
+                raise UpstreamUnavailableError("OpenWeather circuit is open")
+            if not await self.rate_limiter.acquire(None if deadline is None else deadline - UPSTREAM_MIN_CALL_TIME):
+                raise UpstreamTimeoutError(f"Deadline exceeded waiting for the rate limit on {path}")
+
+            remaining = remaining_time()
+            if remaining is not None and remaining < UPSTREAM_MIN_CALL_TIME:
+                raise UpstreamTimeoutError(f"Deadline exceeded before calling {path}")
+            timeout = HTTP_TIMEOUT if remaining is None else min(HTTP_TIMEOUT, remaining)
+            self.upstream_calls += 1
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                # httpx timeouts are per phase; wait_for bounds the whole call.
+                resp = await asyncio.wait_for(client.get(path, params=params, timeout=timeout), timeout)
+            except (httpx.TimeoutException, asyncio.TimeoutError):
+                UPSTREAM_SECONDS.labels(endpoint, "timeout").observe(time.perf_counter() - started)
+                if timeout < HTTP_TIMEOUT:
+                    # Cut short by the caller's deadline, which says nothing about OpenWeather's health.
+                    raise UpstreamTimeoutError(f"Deadline exceeded while calling {path}")
+                self.breaker.record_failure()
+                error: Exception = UpstreamTimeoutError(f"OpenWeather timed out on {path}")
+            except httpx.TransportError as e:
+                UPSTREAM_SECONDS.labels(endpoint, "transport_error").observe(time.perf_counter() - started)
+                self.breaker.record_failure()
+                error = e
+            else:
+                UPSTREAM_SECONDS.labels(endpoint, str(resp.status_code)).observe(time.perf_counter() - started)
+                if resp.status_code != 429 and resp.status_code < 500:
+                    self.breaker.record_success()
+                    resp.raise_for_status()
+                    return resp.json()
+                self.breaker.record_failure()
+                error = httpx.HTTPStatusError(f"OpenWeather answered {resp.status_code} on {path}", request=resp.request, response=resp)
+                retry_after = resp.headers.get("Retry-After")
+
+            delay = backoff_delay(attempt, UPSTREAM_BACKOFF_BASE, UPSTREAM_BACKOFF_MAX)
+            if retry_after is not None and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            remaining = remaining_time()
+            if attempt >= UPSTREAM_RETRIES or (remaining is not None and delay >= remaining):
+                if isinstance(error, UpstreamUnavailableError):
+                    raise error
+                # Callers serve stale data on UpstreamUnavailableError, not on raw httpx errors.
+                raise UpstreamUnavailableError(f"OpenWeather is unavailable: {error}") from error
+            attempt += 1
+            self.upstream_retries += 1
+            await asyncio.sleep(delay)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            raise RuntimeError("WeatherAPI client is not started, call `await start()` first")
+        return self.client
+
 
-            return resp['lat'], resp['lon']
+weather_api = WeatherAPI()
+weather_refresher = HotLocationRefresher(
+    weather_api,
+    top_n=HOT_REFRESH_TOP_N,
+    lead=HOT_REFRESH_LEAD,
+    budget_per_minute=HOT_REFRESH_BUDGET,
+    tick=HOT_REFRESH_TICK,
+    min_score=HOT_REFRESH_MIN_SCORE,
+)
+subscription_hub = SubscriptionHub(
+    weather_api,
+    interval=SUBSCRIPTION_POLL_INTERVAL,
+    ttl=WEATHER_CACHE_TTL,
+    grid=WEATHER_CACHE_GRID,
+    max_connections=SUBSCRIPTION_MAX_CONNECTIONS,
+)
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+class CitySuggestion(BaseModel):
+    name: str
+    country: str
+    lat: float
+    lon: float
+    population: int
+
+class CitySuggestions(BaseModel):
+    items: list[CitySuggestion]
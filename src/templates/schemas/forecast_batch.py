@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+from services.config import BATCH_MAX_ITEMS
+from templates.schemas.weather_batch import BatchLocation
+from templates.schemas.forecast_responses import Forecast
+
+class ForecastBatchRequest(BaseModel):
+    locations: list[BatchLocation] = Field(max_length=BATCH_MAX_ITEMS)
+    hours: int = Field(default=24, ge=1, description="Сколько часов вперёд, с шагом в час")
+
+class ForecastBatchItem(BaseModel):
+    location: BatchLocation
+    forecast: Forecast | None = None
+    error: str | None = None
+
+class ForecastBatchResponse(BaseModel):
+    items: list[ForecastBatchItem]
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class ForecastPoint(BaseModel):
+    time: datetime
+    temperature: float
+    wind_speed: float
+    weather_main: str
+
+class Forecast(BaseModel):
+    lat: float
+    lon: float
+    points: list[ForecastPoint]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class HistoryItem(BaseModel):
+    id: int
+    created_at: datetime
+    lat: float
+    lon: float
+    weather_main: str
+    temp: float
+    wind_speed: float
+
+class HistoryPage(BaseModel):
+    items: list[HistoryItem]
+    next_cursor: str | None = None
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class StatsBucket(BaseModel):
+    bucket_start: datetime
+    cell_lat: float | None = None
+    cell_lon: float | None = None
+    count: int
+    temp_min: float
+    temp_max: float
+    temp_avg: float
+    wind_speed_min: float
+    wind_speed_max: float
+    wind_speed_avg: float
+    weather_main: dict[str, int]
+
+class Stats(BaseModel):
+    granularity: str
+    buckets: list[StatsBucket]
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field, model_validator
+
+from services.config import BATCH_MAX_ITEMS
+from templates.schemas.weather_responses import Weather
+
+class BatchLocation(BaseModel):
+    """Location in a batch: an incomplete one fails its own item, not the whole request."""
+    city: str | None = Field(default=None, description="Название города")
+    lat: float | None = Field(default=None, ge=-90, le=90, description="Широта")
+    lon: float | None = Field(default=None, ge=-180, le=180, description="Долгота")
+
+    def location_error(self) -> str | None:
+        has_coords = self.lat is not None and self.lon is not None
+        has_city = self.city is not None and self.city.strip() != ""
+        if not (has_coords or has_city):
+            return "Укажите либо city, либо пару lat+lon."
+        return None
+
+class WeatherLocation(BatchLocation):
+    @model_validator(mode="after")
+    def check_location(self):
+        error = self.location_error()
+        if error is not None:
+            raise ValueError(error)
+        return self
+
+class WeatherBatchRequest(BaseModel):
+    locations: list[BatchLocation] = Field(max_length=BATCH_MAX_ITEMS)
+
+class WeatherBatchItem(BaseModel):
+    location: BatchLocation
+    weather: Weather | None = None
+    error: str | None = None
+
+class WeatherBatchResponse(BaseModel):
+    items: list[WeatherBatchItem]
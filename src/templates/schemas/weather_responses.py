@@ -1,6 +1,11 @@
+import orjson
 from pydantic import BaseModel
 
 class Weather(BaseModel):
     temperature: float
     wind_speed: float
     weather_main: str
+
+def encode_weather(temperature: float, wind_speed: float, weather_main: str) -> bytes:
+    """JSON body of Weather built without model validation, for trusted internal data."""
+    return orjson.dumps({"temperature": temperature, "wind_speed": wind_speed, "weather_main": weather_main})
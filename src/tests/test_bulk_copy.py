@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+
+from database.core import history_core
+from database.orm import GeocodeCache, WeatherRequests
+
+pytestmark = pytest.mark.anyio
+
+
+def history_rows(count: int, start: datetime, step: timedelta) -> list[dict]:
+    return [
+        {
+            "created_at": start + i * step,
+            "lat": 55.0 + i / 100,
+            "lon": 37.0,
+            "weather_main": "Rain",
+            "temp": float(i),
+            "wind_speed": 1.0,
+        }
+        for i in range(count)
+    ]
+
+
+async def test_copy_routes_rows_into_partitions(database_worker):
+    # From the legacy partition over the premade ones into DEFAULT.
+    rows = history_rows(30, datetime(2026, 1, 1), timedelta(days=40))
+
+    copied = await database_worker.custom_copy(WeatherRequests, rows, chunk_size=7)
+
+    assert copied == 30
+    stored = await database_worker.session_execute(
+        select(func.count(), func.count(func.distinct(WeatherRequests.id)), func.sum(WeatherRequests.temp))
+    )
+    assert stored == [(30, 30, sum(range(30)))]
+    partitions = await database_worker.session_execute(
+        text("SELECT count(DISTINCT tableoid) FROM public.weather_requests")
+    )
+    assert partitions[0][0] > 2
+
+
+async def test_copy_accepts_async_tuples(database_worker):
+    columns = ["created_at", "lat", "lon", "weather_main", "temp", "wind_speed"]
+
+    async def source():
+        for row in history_rows(5, datetime(2026, 1, 1), timedelta(hours=1)):
+            yield tuple(row[x] for x in columns)
+
+    assert await database_worker.custom_copy(WeatherRequests, source(), columns=columns, chunk_size=2) == 5
+    assert await database_worker.session_scalars(select(func.count()).select_from(WeatherRequests)) == [5]
+
+
+async def test_copy_merge_updates_conflicts(database_worker):
+    created_at = datetime(2026, 1, 1)
+    await database_worker.custom_insert(
+        cls_to=GeocodeCache,
+        data=[{"query": "moscow", "lat": 0.0, "lon": 0.0, "created_at": created_at}],
+    )
+    rows = [
+        {"query": "moscow", "lat": 55.75, "lon": 37.62, "created_at": created_at},
+        {"query": "paris", "lat": 48.85, "lon": 2.35, "created_at": created_at},
+        {"query": "oslo", "lat": 59.91, "lon": 10.75, "created_at": created_at},
+    ]
+
+    merged = await database_worker.custom_copy(
+        GeocodeCache, rows, chunk_size=2, index_elements=["query"], update_set=["lat", "lon"]
+    )
+
+    assert merged == 3
+    stored = await database_worker.session_execute(
+        select(GeocodeCache.query, GeocodeCache.lat, GeocodeCache.lon).order_by(GeocodeCache.query)
+    )
+    assert stored == [("moscow", 55.75, 37.62), ("oslo", 59.91, 10.75), ("paris", 48.85, 2.35)]
+    # The staging table is dropped with the transaction.
+    staged = await database_worker.session_execute(text("SELECT count(*) FROM pg_class WHERE relname LIKE '_stage_%'"))
+    assert staged == [(0,)]
+
+
+async def test_copy_merge_without_update_set_keeps_existing_rows(database_worker):
+    created_at = datetime(2026, 1, 1)
+    await database_worker.custom_insert(
+        cls_to=GeocodeCache,
+        data=[{"query": "moscow", "lat": 0.0, "lon": 0.0, "created_at": created_at}],
+    )
+    rows = [
+        {"query": "moscow", "lat": 55.75, "lon": 37.62, "created_at": created_at},
+        {"query": "paris", "lat": 48.85, "lon": 2.35, "created_at": created_at},
+    ]
+
+    assert await database_worker.custom_copy(GeocodeCache, rows, index_elements=["query"]) == 1
+    stored = await database_worker.session_execute(select(GeocodeCache.query, GeocodeCache.lat).order_by(GeocodeCache.query))
+    assert stored == [("moscow", 0.0), ("paris", 48.85)]
+
+
+async def test_copy_of_nothing_opens_no_transaction(database_worker):
+    assert await database_worker.custom_copy(WeatherRequests, []) == 0
+
+
+async def test_history_backfill_bumps_the_data_version(database_worker, monkeypatch):
+    monkeypatch.setattr(history_core, "database_worker", database_worker)
+    version = await history_core.get_history_version_implementation()
+
+    rows = history_rows(3, datetime(2026, 1, 1), timedelta(hours=1))
+    assert await history_core.copy_history_implementation(rows) == 3
+
+    assert await history_core.get_history_version_implementation() == version + 1
+
+
+async def test_failed_backfill_keeps_the_data_version(database_worker, monkeypatch):
+    monkeypatch.setattr(history_core, "database_worker", database_worker)
+    version = await history_core.get_history_version_implementation()
+
+    rows = history_rows(3, datetime(2026, 1, 1), timedelta(hours=1))
+    rows[2]["lat"] = None
+    with pytest.raises(Exception):
+        await history_core.copy_history_implementation(rows)
+
+    assert await history_core.get_history_version_implementation() == version
+    assert await database_worker.session_scalars(select(func.count()).select_from(WeatherRequests)) == [0]
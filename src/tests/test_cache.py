@@ -0,0 +1,58 @@
+from services.cache import TTLCache, normalize_city, round_coords
+
+
+def test_expired_entries_miss_but_can_be_peeked():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("fresh", 1)
+    cache.set("expired", 2, ttl=-1)
+
+    assert cache.get("fresh") == 1
+    assert cache.get("expired") is None
+    assert "expired" not in cache
+    value, remaining = cache.peek("expired")
+    assert value == 2 and remaining < 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_no_ttl_never_expires():
+    cache = TTLCache(maxsize=10)
+    cache.set("key", "value")
+
+    assert cache.peek("key")[1] == float("inf")
+    assert cache.get("key") == "value"
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_peek_does_not_touch_lru_order():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.peek("a")
+    cache.set("c", 3)
+
+    assert "a" not in cache and "b" in cache
+
+
+def test_stats():
+    cache = TTLCache(maxsize=5, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    assert cache.stats() == {"size": 1, "maxsize": 5, "hits": 1, "misses": 1, "evictions": 0, "hit_ratio": 0.5}
+
+
+def test_cache_keys():
+    assert round_coords(55.7512, 37.6184, 0.01) == (55.75, 37.62)
+    assert normalize_city("  Nizhny   NOVGOROD ") == "nizhny novgorod"
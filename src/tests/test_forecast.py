@@ -0,0 +1,61 @@
+import numpy as np
+
+from services.forecast import FORECAST_DTYPE, forecast_points, sample_many, series_from_json, series_to_json, CONDITION_MAIN
+
+STEP = 3 * 3600
+
+
+def series(start: int, steps: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    data = np.empty(steps, dtype=FORECAST_DTYPE)
+    data["time"] = start + np.arange(steps) * STEP
+    data["temp"] = rng.uniform(-30, 30, steps)
+    data["wind_speed"] = rng.uniform(0, 20, steps)
+    data["code"] = rng.choice([500, 600, 800], steps)
+    return data
+
+
+def test_sample_many_matches_np_interp():
+    series_list = [series(1_700_000_000, 40, 1), series(1_700_000_000 + 5400, 40, 2), series(1_700_003_600, 37, 3)]
+    times = np.arange(1_700_000_000 - 3600, 1_700_000_000 + 40 * STEP, 1800, dtype=np.int64)
+
+    sample = sample_many(series_list, times)
+
+    for row, data in enumerate(series_list):
+        valid = times <= data["time"][-1]
+        assert (sample["valid"][row] == valid).all()
+        for field in ("temp", "wind_speed"):
+            expected = np.interp(times, data["time"], data[field].astype(np.float64))
+            np.testing.assert_allclose(sample[field][row][valid], expected[valid], rtol=1e-9)
+        # The step in effect: the latest at or before the time, or the first one before the series starts.
+        step = np.clip(np.searchsorted(data["time"], times, side="right") - 1, 0, None)
+        assert (sample["code"][row][valid] == data["code"][step][valid]).all()
+
+
+def test_sample_many_of_a_single_step_series():
+    data = series(1_700_000_000, 1, 4)
+    times = np.array([1_700_000_000 - 60, 1_700_000_000, 1_700_000_000 + 60], dtype=np.int64)
+
+    sample = sample_many([data], times)
+
+    assert sample["valid"][0].tolist() == [True, True, False]
+    np.testing.assert_allclose(sample["temp"][0][:2], [data["temp"][0]] * 2)
+
+
+def test_forecast_points_drop_times_past_the_horizon():
+    CONDITION_MAIN.setdefault(800, "Clear")
+    data = series(1_700_000_000, 2, 5)
+    data["code"] = 800
+    times = np.array([1_700_000_000, 1_700_000_000 + STEP, 1_700_000_000 + 2 * STEP], dtype=np.int64)
+
+    points = forecast_points(sample_many([data], times), 0, ["t0", "t1", "t2"])
+
+    assert [point["time"] for point in points] == ["t0", "t1"]
+    assert points[0]["weather_main"] == "Clear"
+    assert points[1]["temperature"] == round(float(data["temp"][1]), 2)
+
+
+def test_series_json_round_trip():
+    data = series(1_700_000_000, 5, 6)
+
+    assert (series_from_json(series_to_json(data)) == data).all()
@@ -0,0 +1,76 @@
+import pytest
+
+from services.gazetteer import SCAN_LIMIT, Gazetteer, build_gazetteer
+
+PLACES = [
+    # name, asciiname, alternate names, lat, lon, feature class, country, population
+    ("Moscow", "Moscow", "Москва,Moskau", 55.75222, 37.61556, "P", "RU", 10381222),
+    ("Moscow", "Moscow", "", 46.73239, -117.00017, "P", "US", 25435),
+    ("Zürich", "Zurich", "Zuerich", 47.36667, 8.55, "P", "CH", 341730),
+    ("Mostar", "Mostar", "", 43.34333, 17.80806, "P", "BA", 104518),
+    ("Moscow Lake", "Moscow Lake", "", 45.0, 30.0, "H", "RU", 0),
+]
+
+
+def geonames_line(geoname_id: int, name, asciiname, alternate, lat, lon, feature_class, country, population) -> str:
+    fields = [str(geoname_id), name, asciiname, alternate, str(lat), str(lon), feature_class, "PPL", country,
+              "", "", "", "", "", str(population), "", "", "Europe/Moscow", "2024-01-01"]
+    return "\t".join(fields) + "\n"
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    # Enough "Sa..." places for short prefixes to be answered from the top table.
+    places = PLACES + [
+        (f"Sa{i:03d}", f"Sa{i:03d}", "", 10.0, 10.0, "P", "XX", i) for i in range(SCAN_LIMIT + 50)
+    ]
+    source = tmp_path / "cities.txt"
+    source.write_text("".join(geonames_line(i, *place) for i, place in enumerate(places)), encoding="utf-8")
+
+    count = build_gazetteer(str(source), str(tmp_path / "index"))
+
+    assert count == len(places) - 1
+    return Gazetteer(str(tmp_path / "index"))
+
+
+def test_resolve_prefers_the_most_populous(gazetteer):
+    assert gazetteer.resolve("moscow") == pytest.approx((55.75222, 37.61556))
+    assert gazetteer.resolve("  МОСКВА ") == pytest.approx((55.75222, 37.61556))
+
+
+def test_resolve_with_country_code(gazetteer):
+    assert gazetteer.resolve("Moscow, US") == pytest.approx((46.73239, -117.00017))
+    assert gazetteer.resolve("Moscow, DE") is None
+
+
+def test_resolve_ignores_diacritics(gazetteer):
+    assert gazetteer.resolve("ZURICH") == pytest.approx((47.36667, 8.55))
+    assert gazetteer.resolve("zuerich") == pytest.approx((47.36667, 8.55))
+
+
+def test_resolve_misses(gazetteer):
+    assert gazetteer.resolve("Moscow Lake") is None
+    assert gazetteer.resolve("Mos") is None
+    assert gazetteer.stats()["misses"] == 2
+
+
+def test_suggest_ranks_by_population(gazetteer):
+    suggestions = gazetteer.suggest("mos")
+
+    assert [(item["name"], item["country"]) for item in suggestions] == [
+        ("Moscow", "RU"),
+        ("Mostar", "BA"),
+        ("Moscow", "US"),
+    ]
+    assert suggestions[0]["population"] == 10381222
+    assert [item["name"] for item in gazetteer.suggest("zü", limit=1)] == ["Zürich"]
+    assert gazetteer.suggest("xyz") == []
+    assert gazetteer.suggest("") == []
+
+
+def test_suggest_from_the_top_table_matches_a_scan(gazetteer):
+    expected = [f"Sa{i:03d}" for i in range(SCAN_LIMIT + 49, SCAN_LIMIT + 39, -1)]
+
+    # "sa" is answered from the precomputed table, "sa" + digit by ranking the range.
+    assert [item["name"] for item in gazetteer.suggest("sa", limit=10)] == expected
+    assert [item["name"] for item in gazetteer.suggest("sa2", limit=3)] == ["Sa299", "Sa298", "Sa297"]
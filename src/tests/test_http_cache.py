@@ -0,0 +1,38 @@
+import pytest
+
+from services.http_cache import cache_control, etag_matches, strong_etag
+
+ETAG = strong_etag(b"body")
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "matches"),
+    [
+        (None, False),
+        ("", False),
+        (ETAG, True),
+        ('"other"', False),
+        (f"W/{ETAG}", True),
+        (f'"a", {ETAG} ,"b"', True),
+        (f'"a", W/{ETAG}', True),
+        ('"a", "b"', False),
+        ("*", True),
+        (" * ", True),
+    ],
+)
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, ETAG) is matches
+
+
+def test_weak_etag_matches_its_strong_form():
+    assert etag_matches(ETAG, f"W/{ETAG}")
+
+
+def test_strong_etag_separates_parts():
+    assert strong_etag("ab", "c") != strong_etag("a", "bc")
+    assert strong_etag("ab", "c") == strong_etag(b"ab", b"c")
+
+
+def test_cache_control():
+    assert cache_control(12.7) == "public, max-age=12"
+    assert cache_control(-3, 60) == "public, max-age=0, stale-while-revalidate=60"
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from database.config import app_timezone
+from database.core.partition_core import PartitionMaintainer
+from database.migrate import run_migrations
+from database.oop.database_worker import DatabaseWorkerAsync
+from database.partitions import bound_interval, parse_partition_bound
+
+pytestmark = pytest.mark.anyio
+
+PARTITIONS_SQL = text(
+    """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'public.weather_requests'::regclass
+    ORDER BY 1
+    """
+)
+INSERT_SQL = (
+    "INSERT INTO public.weather_requests (created_at, lat, lon, weather_main, temp, wind_speed) "
+    "VALUES ('{}', 55, 37, 'Rain', 1, 1)"
+)
+
+
+def now() -> datetime:
+    return datetime.now(app_timezone).replace(tzinfo=None)
+
+
+async def partitions(database_worker) -> dict[str, tuple]:
+    return {name: parse_partition_bound(expr) for name, expr in await database_worker.session_execute(PARTITIONS_SQL)}
+
+
+async def test_partitioning_attaches_existing_rows(database_url):
+    engine = create_async_engine(database_url, poolclass=NullPool)
+    database_worker = DatabaseWorkerAsync(engine)
+    await run_migrations(engine, "b1d65b8ae032")
+    await database_worker.session_execute_many_commit([
+        text(INSERT_SQL.format(now() - timedelta(days=days))) for days in (0, 30, 400)
+    ])
+
+    await run_migrations(engine)
+
+    rows = await database_worker.session_execute(
+        text("SELECT tableoid::regclass::text, id FROM public.weather_requests ORDER BY id")
+    )
+    assert rows == [("weather_requests_legacy", 1), ("weather_requests_legacy", 2), ("weather_requests_legacy", 3)]
+    bounds = await partitions(database_worker)
+    lower, cutover = bounds["weather_requests_legacy"]
+    assert lower is None and cutover > now()
+    assert bounds["weather_requests_default"] is None
+    # The cutover CHECK only served the attach.
+    constraints = await database_worker.session_execute(
+        text("SELECT conname FROM pg_constraint WHERE conrelid = 'public.weather_requests_legacy'::regclass ORDER BY 1")
+    )
+    assert constraints == [("weather_requests_legacy_pkey",)]
+    # Legacy indexes were attached to the parent's, not rebuilt next to them.
+    indexes = await database_worker.session_execute(
+        text("SELECT count(*) FROM pg_index WHERE indrelid = 'public.weather_requests_legacy'::regclass")
+    )
+    assert indexes == [(4,)]
+
+    await database_worker.session_execute_commit(text(INSERT_SQL.format(cutover + timedelta(hours=1))))
+    newest = await database_worker.session_execute(
+        text("SELECT tableoid::regclass::text, id FROM public.weather_requests ORDER BY id DESC LIMIT 1")
+    )
+    assert newest[0][1] == 4 and newest[0][0] != "weather_requests_legacy"
+    await engine.dispose()
+
+
+async def test_maintain_moves_rows_out_of_default(database_worker):
+    far = now() + timedelta(days=400)
+    await database_worker.session_execute_commit(text(INSERT_SQL.format(far)))
+    stranded = await database_worker.session_execute(text("SELECT tableoid::regclass::text FROM public.weather_requests"))
+    assert stranded == [("weather_requests_default",)]
+
+    maintainer = PartitionMaintainer(database_worker, interval="month", premake=15, retention_days=0)
+    await maintainer.maintain()
+    await maintainer.maintain()
+
+    moved = await database_worker.session_execute(text("SELECT tableoid::regclass::text FROM public.weather_requests"))
+    assert moved == [(f"weather_requests_p{far:%Y_%m}",)]
+    assert (await partitions(database_worker))["weather_requests_default"] is None
+
+
+async def test_maintain_keeps_the_interval_of_existing_partitions(database_worker):
+    maintainer = PartitionMaintainer(database_worker, interval="day", premake=5, retention_days=0)
+    await maintainer.maintain()
+
+    for name, bound in (await partitions(database_worker)).items():
+        if bound is not None and bound[0] is not None:
+            assert bound_interval(*bound) == "month", name
+
+
+async def test_maintain_drops_expired_partitions(database_worker):
+    await database_worker.session_execute_many_commit([
+        text("ALTER TABLE public.weather_requests DETACH PARTITION public.weather_requests_legacy"),
+        text("DROP TABLE public.weather_requests_legacy"),
+        text(
+            "CREATE TABLE public.weather_requests_p2000_01 PARTITION OF public.weather_requests "
+            "FOR VALUES FROM ('2000-01-01') TO ('2000-02-01')"
+        ),
+        text(INSERT_SQL.format(datetime(2000, 1, 15))),
+    ])
+    before = await partitions(database_worker)
+
+    maintainer = PartitionMaintainer(database_worker, interval="month", premake=1, retention_days=30)
+    await maintainer.maintain()
+
+    after = await partitions(database_worker)
+    assert "weather_requests_p2000_01" not in after
+    assert set(before) - {"weather_requests_p2000_01"} <= set(after)
+    assert await database_worker.session_scalars(text("SELECT count(*) FROM public.weather_requests")) == [0]
@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from services.resilience import (
+    CircuitBreaker,
+    TokenBucket,
+    UpstreamTimeoutError,
+    current_deadline,
+    deadline_scope,
+    remaining_time,
+)
+from services.weather import WeatherAPI
+
+pytestmark = pytest.mark.anyio
+
+OPEN_SECONDS = 0.05
+
+
+def breaker() -> CircuitBreaker:
+    return CircuitBreaker(failure_ratio=0.5, min_calls=4, window=30, open_seconds=OPEN_SECONDS)
+
+
+def test_breaker_opens_on_failure_ratio():
+    circuit = breaker()
+    circuit.record_success()
+    circuit.record_failure()
+    circuit.record_success()
+    assert circuit.state == CircuitBreaker.CLOSED
+
+    circuit.record_failure()
+
+    assert circuit.state == CircuitBreaker.OPEN
+    assert not circuit.allow()
+
+
+def test_breaker_needs_min_calls():
+    circuit = breaker()
+    for _ in range(3):
+        circuit.record_failure()
+
+    assert circuit.state == CircuitBreaker.CLOSED and circuit.allow()
+
+
+def test_breaker_lets_one_probe_through_and_closes_on_success():
+    circuit = breaker()
+    for _ in range(4):
+        circuit.record_failure()
+    time.sleep(OPEN_SECONDS)
+
+    assert circuit.allow()
+    assert circuit.state == CircuitBreaker.HALF_OPEN
+    assert not circuit.allow()
+    circuit.record_success()
+
+    assert circuit.state == CircuitBreaker.CLOSED and circuit.allow()
+
+
+def test_breaker_reopens_when_the_probe_fails():
+    circuit = breaker()
+    for _ in range(4):
+        circuit.record_failure()
+    time.sleep(OPEN_SECONDS)
+    assert circuit.allow()
+
+    circuit.record_failure()
+
+    assert circuit.state == CircuitBreaker.OPEN
+    assert circuit.opened == 2
+
+
+def test_breaker_replaces_a_lost_probe():
+    circuit = breaker()
+    for _ in range(4):
+        circuit.record_failure()
+    time.sleep(OPEN_SECONDS)
+    assert circuit.allow()
+
+    time.sleep(OPEN_SECONDS)
+
+    assert circuit.allow()
+
+
+def test_nested_deadline_scope_only_shortens():
+    assert current_deadline() is None
+    with deadline_scope(1):
+        outer = current_deadline()
+        with deadline_scope(10):
+            assert current_deadline() == outer
+        with deadline_scope(None):
+            assert current_deadline() == outer
+        with deadline_scope(0.5):
+            assert current_deadline() < outer
+            assert 0 < remaining_time() <= 0.5
+    assert remaining_time() is None
+
+
+async def test_bucket_serves_a_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=2)
+    started = time.monotonic()
+
+    assert all(await asyncio.gather(*(bucket.acquire() for _ in range(4))))
+
+    # Two from the burst, then one every 50 ms.
+    assert 0.09 <= time.monotonic() - started < 0.2
+
+
+async def test_bucket_rejects_tokens_due_after_the_deadline():
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert await bucket.acquire()
+
+    started = time.monotonic()
+    assert not await bucket.acquire(deadline=time.monotonic() + 0.05)
+    assert time.monotonic() - started < 0.01
+    assert bucket.rejected == 1
+
+    # A rejected caller reserved nothing: the next token is still due in 100 ms.
+    assert await bucket.acquire(deadline=time.monotonic() + 0.15)
+
+
+async def test_bucket_waiters_do_not_hold_each_other_up():
+    bucket = TokenBucket(rate=2, capacity=1)
+    assert await bucket.acquire()
+    sleeper = asyncio.ensure_future(bucket.acquire())
+    await asyncio.sleep(0)
+
+    started = time.monotonic()
+    # Due after the sleeper's token, a second away: refused at once rather than after the sleeper's wait.
+    assert not await bucket.acquire(deadline=time.monotonic() + 0.6)
+    assert time.monotonic() - started < 0.01
+    assert await sleeper
+
+
+async def test_deadline_bounds_upstream_calls_without_opening_the_breaker():
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"ok": True})
+
+    api = WeatherAPI()
+    api.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream), base_url="http://openweather")
+    api.rate_limiter = TokenBucket(rate=10, capacity=5)
+    latencies = []
+
+    async def call() -> bool:
+        started = time.monotonic()
+        try:
+            with deadline_scope(0.5):
+                await api._get("/data/2.5/weather", params={})
+            return True
+        except UpstreamTimeoutError:
+            return False
+        finally:
+            latencies.append(time.monotonic() - started)
+
+    results = await asyncio.gather(*(call() for _ in range(30)))
+
+    # The burst plus about 0.3 s of paced tokens; the rest give up right away.
+    assert 5 < sum(results) < 15
+    assert max(latencies) < 0.5
+    assert api.breaker.state == CircuitBreaker.CLOSED and api.breaker.opened == 0
+    await api.client.aclose()
+
+
+async def test_timeout_of_the_callers_deadline_is_not_an_upstream_failure():
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"ok": True})
+
+    api = WeatherAPI()
+    api.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream), base_url="http://openweather")
+
+    with pytest.raises(UpstreamTimeoutError), deadline_scope(0.3):
+        await api._get("/data/2.5/weather", params={})
+
+    assert not api.breaker._outcomes
+    await api.client.aclose()
@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from database.core import history_core, rollup_core
+from database.core.history_writer import HistoryWriter
+from database.orm import WeatherRollups
+
+pytestmark = pytest.mark.anyio
+
+ROWS = [
+    {"created_at": datetime(2026, 1, 1, 10, 5), "lat": 55.71, "lon": 37.61, "weather_main": "Rain", "temp": 1.5, "wind_speed": 3.0},
+    {"created_at": datetime(2026, 1, 1, 10, 40), "lat": 55.72, "lon": 37.62, "weather_main": "Rain", "temp": -2.5, "wind_speed": 1.0},
+    {"created_at": datetime(2026, 1, 1, 11, 0), "lat": 55.73, "lon": 37.63, "weather_main": "Snow", "temp": 0.5, "wind_speed": 2.0},
+    {"created_at": datetime(2026, 1, 1, 11, 30), "lat": 59.93, "lon": 30.31, "weather_main": "Clear", "temp": 4.0, "wind_speed": 5.0},
+]
+
+
+async def rollups(database_worker) -> list[tuple]:
+    return await database_worker.session_execute(
+        select(WeatherRollups.__table__).order_by(*WeatherRollups.__table__.primary_key.columns)
+    )
+
+
+async def write_history(database_worker, batches: list[list[dict]]) -> None:
+    # One flush per batch, as the write path does it.
+    for batch in batches:
+        writer = HistoryWriter(database_worker, batch_size=len(batch), flush_interval=60)
+        await writer.start()
+        for row in batch:
+            await writer.submit(row)
+        await writer.stop()
+        assert writer.flushed == len(batch) and writer.failed == 0
+
+
+async def test_upsert_merges_batches(database_worker):
+    await write_history(database_worker, [ROWS[:2], ROWS[2:]])
+
+    moscow_day = [row for row in await rollups(database_worker) if row.granularity == "day" and row.cell_lat == 55.7]
+    assert len(moscow_day) == 1
+    day = moscow_day[0]
+    assert (day.count, day.temp_min, day.temp_max, day.temp_sum) == (3, -2.5, 1.5, -0.5)
+    assert (day.wind_speed_min, day.wind_speed_max, day.wind_speed_sum) == (1.0, 3.0, 6.0)
+    assert day.weather_main_hist == {"Rain": 2, "Snow": 1}
+
+    hours = {(row.bucket_start.hour, row.cell_lat): row.count for row in await rollups(database_worker) if row.granularity == "hour"}
+    assert hours == {(10, 55.7): 2, (11, 55.7): 1, (11, 59.9): 1}
+
+
+async def test_rebuild_matches_the_write_path(database_worker, monkeypatch):
+    await write_history(database_worker, [ROWS[:1], ROWS[1:3], ROWS[3:]])
+    written = await rollups(database_worker)
+    monkeypatch.setattr(rollup_core, "database_worker", database_worker)
+    monkeypatch.setattr(history_core, "database_worker", database_worker)
+    version = await history_core.get_history_version_implementation()
+
+    await rollup_core.rebuild_rollups_implementation(datetime(2026, 1, 1), datetime(2026, 1, 2))
+
+    assert await rollups(database_worker) == written
+    assert await history_core.get_history_version_implementation() == version + 1
+
+
+async def test_stats_sum_histograms_across_cells(database_worker, monkeypatch):
+    await write_history(database_worker, [ROWS])
+    monkeypatch.setattr(rollup_core, "database_worker", database_worker)
+
+    stats = await rollup_core.get_stats_implementation("day", date_from=datetime(2026, 1, 1), date_to=datetime(2026, 1, 2))
+
+    assert len(stats) == 1
+    assert stats[0]["count"] == 4
+    assert stats[0]["weather_main"] == {"Rain": 2, "Snow": 1, "Clear": 1}
+    assert (stats[0]["temp_min"], stats[0]["temp_max"]) == (-2.5, 4.0)
+
+
+async def test_batches_over_the_bind_parameter_limit(database_worker):
+    # 6000 rows in 6000 cells: 36000 insert and 144000 upsert parameters, over asyncpg's 32767.
+    rows = [
+        {**ROWS[0], "lat": 40.05 + i // 100 * 0.1, "lon": 10.05 + i % 100 * 0.1, "temp": float(i % 7)}
+        for i in range(6000)
+    ]
+    await write_history(database_worker, [rows])
+
+    stored = await rollups(database_worker)
+    assert sum(row.count for row in stored if row.granularity == "day") == 6000
+    assert len(stored) == 12000
+
+
+async def test_rebuild_widens_bounds_to_whole_days(database_worker, monkeypatch):
+    await write_history(database_worker, [ROWS])
+    written = await rollups(database_worker)
+    monkeypatch.setattr(rollup_core, "database_worker", database_worker)
+
+    # A window inside the day must not rebuild the day bucket from part of its rows.
+    await rollup_core.rebuild_rollups_implementation(datetime(2026, 1, 1, 11), datetime(2026, 1, 1, 12))
+
+    assert await rollups(database_worker) == written
+
+
+async def test_rebuild_waits_for_history_flushes(database_worker, engine, monkeypatch):
+    monkeypatch.setattr(rollup_core, "database_worker", database_worker)
+    async with engine.connect() as conn:
+        await conn.execute(rollup_core.rollup_write_lock())
+        rebuild = asyncio.ensure_future(
+            rollup_core.rebuild_rollups_implementation(datetime(2026, 1, 1), datetime(2026, 1, 2))
+        )
+        await asyncio.sleep(0.5)
+        assert not rebuild.done()
+        await conn.rollback()
+    await asyncio.wait_for(rebuild, 5)
@@ -0,0 +1,97 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from services.cache import TTLCache
+from services.shared_cache import Codec, LayeredCache, RedisBackend
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def process_cache(server, **kwargs) -> LayeredCache:
+    """A cache as one worker process sees it: its own L1, the shared Redis as L2."""
+    backend = RedisBackend(client=fakeredis.FakeAsyncRedis(server=server))
+    return LayeredCache("weather", TTLCache(maxsize=100, ttl=60), backend, key_prefix="test:", **kwargs)
+
+
+async def test_value_set_in_one_process_is_read_in_another(server):
+    first, second = process_cache(server), process_cache(server)
+
+    await first.set((55.75, 37.62), {"temp": 1.5})
+
+    assert await second.get((55.75, 37.62)) == {"temp": 1.5}
+    assert (55.75, 37.62) in second
+    assert second.stats()["l2_hits"] == 1
+    assert await second.get_many([(55.75, 37.62), (1.0, 2.0)]) == {(55.75, 37.62): {"temp": 1.5}}
+
+
+async def test_expired_value_reaches_l1_as_stale(server):
+    first, second = process_cache(server, stale_ttl=60), process_cache(server, stale_ttl=60)
+
+    await first.set("key", "old", ttl=-1)
+
+    assert await second.get("key") is None
+    value, remaining = second.peek("key")
+    assert value == "old" and remaining < 0
+
+
+async def test_min_ttl_skips_values_about_to_expire(server):
+    first, second = process_cache(server), process_cache(server)
+    await first.set("key", "value", ttl=5)
+
+    assert await second.get("key", min_ttl=10) is None
+    assert await second.get("key", min_ttl=1) == "value"
+
+
+async def test_fill_fetches_once_across_processes(server):
+    caches = [process_cache(server) for _ in range(3)]
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return "value"
+
+    results = await asyncio.gather(*(cache.fill("key", fetch) for cache in caches))
+
+    assert results == ["value"] * 3
+    assert calls == 1
+    assert sum(cache.fill_waits for cache in caches) == 2
+
+
+async def test_unreadable_entry_is_a_miss(server):
+    cache = process_cache(server)
+    await cache.l2.set(cache._l2_key("key"), b"garbage", 60)
+
+    assert await cache.get("key") is None
+    assert cache.l2_errors == 1
+
+
+async def test_backend_errors_are_misses():
+    class BrokenBackend(RedisBackend):
+        async def get_many(self, keys):
+            raise ConnectionError("redis is down")
+
+    cache = LayeredCache("weather", TTLCache(maxsize=10, ttl=60), BrokenBackend())
+
+    assert await cache.get("key") is None
+    assert cache.l2_errors == 1
+
+
+def test_codec_compresses_only_large_payloads():
+    codec = Codec(compress_min_bytes=100)
+    small, large = {"a": 1}, {"a": "x" * 1000}
+
+    assert codec.dumps(small).startswith(Codec.RAW)
+    assert codec.dumps(large).startswith(Codec.ZLIB)
+    assert len(codec.dumps(large)) < 100
+    # Entries written with another setting stay readable.
+    assert Codec().loads(codec.dumps(large)) == large
+    assert codec.loads(Codec().dumps(small)) == small
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from services.resilience import UpstreamTimeoutError, deadline_scope
+from services.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+class Upstream:
+    def __init__(self, delay: float = 0.05, error: Exception | None = None) -> None:
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return "value"
+
+
+async def test_concurrent_calls_share_one_task():
+    flight = SingleFlight()
+    upstream = Upstream()
+
+    results = await asyncio.gather(*(flight.do("key", upstream) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert upstream.calls == 1
+    assert (flight.calls, flight.shared) == (1, 4)
+    assert flight.in_flight() == 0
+
+
+async def test_keys_do_not_share():
+    flight = SingleFlight()
+    upstream = Upstream()
+
+    await asyncio.gather(flight.do("a", upstream), flight.do("b", upstream))
+
+    assert upstream.calls == 2
+
+
+async def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    upstream = Upstream(error=RuntimeError("upstream failed"))
+
+    results = await asyncio.gather(*(flight.do("key", upstream) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert upstream.calls == 1
+
+
+async def test_cancelled_waiter_leaves_the_shared_call_running():
+    flight = SingleFlight()
+    upstream = Upstream()
+    first = asyncio.ensure_future(flight.do("key", upstream))
+    second = asyncio.ensure_future(flight.do("key", upstream))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+
+    assert await second == "value"
+    assert first.cancelled()
+
+
+async def test_waiter_gives_up_at_its_own_deadline():
+    flight = SingleFlight()
+    upstream = Upstream(delay=0.3)
+    # Started without a deadline, like the refresher or a subscription poller.
+    background = asyncio.ensure_future(flight.do("key", upstream))
+    await asyncio.sleep(0)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(UpstreamTimeoutError), deadline_scope(0.05):
+        await flight.do("key", upstream)
+
+    assert loop.time() - started < 0.1
+    assert await background == "value"
+    assert upstream.calls == 1
+
+
+async def test_deadline_waiter_still_gets_errors_of_the_shared_call():
+    flight = SingleFlight()
+    error = TimeoutError("upstream timed out")
+
+    with pytest.raises(TimeoutError) as raised, deadline_scope(1):
+        await flight.do("key", Upstream(delay=0, error=error))
+
+    assert raised.value is error
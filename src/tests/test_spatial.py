@@ -0,0 +1,58 @@
+import time
+
+from services.spatial import SpatialIndex, haversine_km
+
+
+def test_haversine():
+    # Moscow - Saint Petersburg.
+    assert 630 < haversine_km(55.7558, 37.6173, 59.9343, 30.3351) < 636
+
+
+def test_nearest_picks_the_closest_point_within_radius():
+    index = SpatialIndex(cell_deg=0.05)
+    index.add("a", 55.75, 37.60, "a")
+    index.add("b", 55.76, 37.62, "b")
+    index.add("far", 56.50, 37.60, "far")
+
+    value, km, _ = index.nearest(55.761, 37.621, max_km=10)
+
+    assert value == "b" and km < 0.2
+    assert index.nearest(56.0, 38.5, max_km=10) is None
+    assert (index.hits, index.misses) == (1, 1)
+
+
+def test_nearest_looks_across_cells():
+    index = SpatialIndex(cell_deg=0.01)
+    index.add("a", 55.7499, 37.6, "a")
+
+    assert index.nearest(55.7501, 37.6, max_km=1)[0] == "a"
+
+
+def test_stale_points_are_skipped_and_dropped():
+    index = SpatialIndex(max_age=60)
+    index.add("too_old", 55.75, 37.60, "too_old", observed_at=time.time() - 120)
+    index.add("old", 55.75, 37.60, "old", observed_at=time.time() - 59.95)
+    assert len(index) == 1
+    time.sleep(0.1)
+
+    assert index.nearest(55.75, 37.60, max_km=1) is None
+    assert len(index) == 0
+
+
+def test_readding_a_key_moves_it():
+    index = SpatialIndex()
+    index.add("key", 55.75, 37.60, "first")
+    index.add("key", 59.93, 30.31, "second")
+
+    assert len(index) == 1
+    assert index.nearest(55.75, 37.60, max_km=5) is None
+    assert index.nearest(59.93, 30.31, max_km=5)[0] == "second"
+
+
+def test_oldest_added_is_evicted():
+    index = SpatialIndex(maxsize=2)
+    for i, key in enumerate("abc"):
+        index.add(key, 55.0 + i, 37.0, key)
+
+    assert len(index) == 2 and index.evictions == 1
+    assert index.nearest(55.0, 37.0, max_km=5) is None
@@ -0,0 +1,97 @@
+import asyncio
+
+import orjson
+import pytest
+
+from services.cache import TTLCache
+from services.subscriptions import Subscription, SubscriptionHub
+
+pytestmark = pytest.mark.anyio
+
+MOSCOW = (55.75, 37.62)
+PITER = (59.93, 30.31)
+
+
+class FakeWeatherAPI:
+    """Stands in for WeatherAPI: every refresh returns the next reading of the location."""
+
+    def __init__(self) -> None:
+        self.weather_cache = TTLCache(maxsize=10, ttl=600)
+        self.refreshes: dict[tuple[float, float], int] = {}
+
+    async def refresh_weather(self, key: tuple[float, float], min_ttl: float = 0) -> dict:
+        self.refreshes[key] = self.refreshes.get(key, 0) + 1
+        temp = float(self.refreshes[key])
+        return {"etag": f'"{key}-{temp}"', "response_body": orjson.dumps({"temperature": temp})}
+
+
+def subscription(*keys: tuple[float, float]) -> Subscription:
+    return Subscription({key: [{"lat": key[0], "lon": key[1]}] for key in keys})
+
+
+@pytest.fixture
+async def hub():
+    hub = SubscriptionHub(FakeWeatherAPI(), interval=0.05, ttl=600, grid=0.01, max_connections=2)
+    yield hub
+    await hub.stop()
+
+
+async def test_one_poller_per_location(hub):
+    first, second = subscription(MOSCOW), subscription(MOSCOW, PITER)
+
+    hub.attach(first)
+    hub.attach(second)
+
+    assert hub.stats()["locations"] == 2
+    assert hub.stats()["connections"] == 2
+    assert hub.is_full()
+
+
+async def test_last_detach_stops_the_poller(hub):
+    first, second = subscription(MOSCOW), subscription(MOSCOW)
+    hub.attach(first)
+    hub.attach(second)
+    poller = hub._pollers[MOSCOW]
+
+    hub.detach(first)
+    await asyncio.sleep(0)
+    assert not poller.done()
+
+    hub.detach(second)
+    await asyncio.sleep(0)
+
+    assert poller.cancelled()
+    assert hub.stats()["locations"] == 0 and hub.stats()["connections"] == 0
+    polls = hub.weather_api.refreshes[MOSCOW]
+    await asyncio.sleep(0.1)
+    assert hub.weather_api.refreshes[MOSCOW] == polls
+
+
+async def test_subscribers_get_changes(hub):
+    client = subscription(MOSCOW)
+    hub.attach(client)
+
+    updates = await client.next(timeout=1)
+
+    assert len(updates) == 1
+    assert updates[0]["location"] == {"lat": 55.75, "lon": 37.62}
+    assert orjson.loads(orjson.dumps(updates[0]["weather"])) == {"temperature": 1.0}
+
+    # A late subscriber gets the last known value at once.
+    late = subscription(MOSCOW)
+    hub.attach(late)
+    assert len(await late.next(timeout=0.01)) == 1
+
+
+async def test_slow_client_keeps_only_the_latest_update():
+    client = subscription(MOSCOW)
+    client.push(MOSCOW, {"response_body": b"1"})
+    client.push(MOSCOW, {"response_body": b"2"})
+
+    updates = await client.next(timeout=0.01)
+
+    assert [bytes(orjson.dumps(update["weather"])) for update in updates] == [b"2"]
+    assert client.coalesced == 1
+    assert await client.next(timeout=0.01) == []
+    client.close()
+    assert await client.next(timeout=1) is None